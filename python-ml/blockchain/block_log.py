@@ -0,0 +1,268 @@
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Record header: payload length and CRC-32 of the payload
+_HEADER = struct.Struct('>II')
+
+# Block offset index entry: byte offset of the block's record in the log
+_OFFSET = struct.Struct('>Q')
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Write JSON via a temp file and rename so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def read_json(path: str) -> Optional[Any]:
+    """Read a JSON file, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class BlockLog:
+    """
+    Append-only log of length-prefixed, CRC-checked JSON records
+
+    Each record is an 8-byte header (payload length, CRC-32) followed by a
+    compact JSON payload. A crash can only leave a torn record at the end
+    of the file; replay stops at the first incomplete or corrupt record
+    and truncates the log there.
+    """
+
+    def __init__(self, path: str, fsync: str = 'interval', fsync_interval: float = 1.0):
+        """
+        Open (or create) a log
+
+        Args:
+            path: Log file path
+            fsync: 'always' (every append), 'interval' (at most once per
+                fsync_interval seconds) or 'never' (leave it to the OS)
+            fsync_interval: Seconds between fsyncs for the 'interval' policy
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._writer = open(path, 'ab')
+        self._reader = open(path, 'rb')
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self.end = self._writer.tell()
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """
+        Append a record
+
+        Returns:
+            Byte offset of the record, for read()
+        """
+        payload = json.dumps(record, separators=(',', ':')).encode()
+        with self._lock:
+            offset = self.end
+            self._writer.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._writer.flush()
+            self.end = offset + _HEADER.size + len(payload)
+
+            if self.fsync == 'always' or (
+                self.fsync == 'interval' and time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+        return offset
+
+    def _read_at(self, offset: int) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Read the record at offset, or None if it is torn or corrupt"""
+        self._reader.seek(offset)
+        header = self._reader.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+        length, crc = _HEADER.unpack(header)
+        payload = self._reader.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return json.loads(payload), offset + _HEADER.size + length
+
+    def read(self, offset: int) -> Dict[str, Any]:
+        """Read the record at a byte offset returned by append()"""
+        with self._lock:
+            result = self._read_at(offset)
+        if result is None:
+            raise ValueError(f"No valid record at offset {offset} of {self.path}")
+        return result[0]
+
+    def replay(self, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (offset, record) for every record from offset onwards
+
+        A torn or corrupt tail is truncated once reached.
+        """
+        while True:
+            with self._lock:
+                result = self._read_at(offset)
+                if result is None:
+                    if offset < self.end:
+                        print(f"Truncating torn tail of {self.path} at offset {offset}")
+                        self._writer.truncate(offset)
+                        self.end = offset
+                    return
+            record, next_offset = result
+            yield offset, record
+            offset = next_offset
+
+    def _sync(self) -> None:
+        os.fsync(self._writer.fileno())
+        self._last_sync = time.monotonic()
+
+    def sync(self) -> None:
+        """Flush and fsync everything appended so far"""
+        with self._lock:
+            self._writer.flush()
+            self._sync()
+
+    def close(self) -> None:
+        """Sync and close the log"""
+        self.sync()
+        self._writer.close()
+        self._reader.close()
+
+class BlockOffsets:
+    """Fixed-width file mapping block height to the offset of its log record"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) an offset index
+
+        Args:
+            path: Index file path
+        """
+        self.path = path
+        self._file = open(path, 'a+b')
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return os.fstat(self._file.fileno()).st_size // _OFFSET.size
+
+    def truncate(self, height: int) -> None:
+        """Drop entries from height onwards (they are rebuilt by replay)"""
+        with self._lock:
+            self._file.truncate(min(height, len(self)) * _OFFSET.size)
+
+    def append(self, offset: int) -> None:
+        """Record the log offset of the next block"""
+        with self._lock:
+            self._file.write(_OFFSET.pack(offset))
+            self._file.flush()
+
+    def get(self, height: int) -> int:
+        """Log offset of the block at height"""
+        with self._lock:
+            self._file.seek(height * _OFFSET.size)
+            entry = self._file.read(_OFFSET.size)
+        if len(entry) < _OFFSET.size:
+            raise IndexError(f"No block at height {height}")
+        return _OFFSET.unpack(entry)[0]
+
+    def sync(self) -> None:
+        """Fsync the index"""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Sync and close the index"""
+        self.sync()
+        self._file.close()
+
+class PersistentChain:
+    """
+    List-like chain whose older blocks live only in the block log
+
+    Blocks below base_height are read from the log on access (through a
+    small LRU cache); newer blocks are kept in memory. Releasing blocks
+    covered by a snapshot keeps memory bounded regardless of chain length.
+    """
+
+    def __init__(self, log: BlockLog, offsets: BlockOffsets,
+                 decode: Callable[[Dict[str, Any]], Any], base_height: int = 0, cache_size: int = 256):
+        """
+        Initialize a persistent chain
+
+        Args:
+            log: Block log holding block records
+            offsets: Height to log offset index
+            decode: Builds a block from its to_dict() record
+            base_height: Number of blocks already released to the log
+            cache_size: Number of blocks read from the log to keep cached
+        """
+        self.log = log
+        self.offsets = offsets
+        self.decode = decode
+        self.cache_size = cache_size
+        self.base_height = base_height
+        self._recent = []
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.base_height + len(self._recent)
+
+    def _load(self, height: int):
+        """Read a released block back from the log"""
+        with self._lock:
+            block = self._cache.get(height)
+            if block is not None:
+                self._cache.move_to_end(height)
+                return block
+
+        block = self.decode(self.log.read(self.offsets.get(height))['block'])
+
+        with self._lock:
+            self._cache[height] = block
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return block
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chain index out of range")
+        if index >= self.base_height:
+            return self._recent[index - self.base_height]
+        return self._load(index)
+
+    def __iter__(self):
+        for height in range(len(self)):
+            yield self[height]
+
+    def append(self, block) -> None:
+        """Append a block held in memory until released"""
+        self._recent.append(block)
+
+    def release(self, height: int) -> None:
+        """Drop in-memory blocks below height; they are read from the log from now on"""
+        height = min(height, len(self))
+        if height > self.base_height:
+            del self._recent[:height - self.base_height]
+            self.base_height = height
@@ -1,14 +1,27 @@
 import hashlib
 import json
+import os
+import threading
 import time
-from typing import List, Dict, Any, Optional
-import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from datetime import datetime
 
+from .block_log import BlockLog, BlockOffsets, PersistentChain, read_json, write_json_atomic
+from .market_stats import MarketStats
+from .mempool import BlockProducer, Mempool
+from .merkle import merkle_proof, merkle_root, transaction_hash
+from .mining import ProofOfWorkMiner, meets_difficulty
+from .order_book import OrderBook, read_meter_orders
+from .transaction import CONFIRMED, Transaction
+
 class Block:
     """A block in the energy trading blockchain"""
     
-    def __init__(self, index: int, timestamp: float, transactions: List[Dict[str, Any]], 
+    __slots__ = ('index', 'timestamp', 'transactions', 'previous_hash', 'proof',
+                 'merkle_root', 'hash')
+    
+    def __init__(self, index: int, timestamp: float, transactions: List[Transaction], 
                  previous_hash: str, proof: int = 0):
         """
         Initialize a new block
@@ -16,57 +29,222 @@ class Block:
         Args:
             index: Position of the block in the chain
             timestamp: When the block was created
-            transactions: List of energy trading transactions
+            transactions: List of energy trading transactions (Transaction
+                objects, or dictionaries in to_dict() form)
             previous_hash: Hash of the previous block
             proof: Proof of work number
         """
         self.index = index
         self.timestamp = timestamp
-        self.transactions = transactions
+        self.transactions = [
+            tx if isinstance(tx, Transaction) else Transaction.from_dict(tx) for tx in transactions
+        ]
         self.previous_hash = previous_hash
         self.proof = proof
+        self.merkle_root = self.compute_merkle_root()
         self.hash = self.compute_hash()
         
-    def compute_hash(self) -> str:
-        """Compute SHA-256 hash of the block"""
-        block_string = json.dumps({
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Block':
+        """Rebuild a block from to_dict() output without recomputing its hashes"""
+        block = cls.__new__(cls)
+        block.index = data['index']
+        block.timestamp = data['timestamp']
+        block.transactions = [Transaction.from_dict(tx) for tx in data['transactions']]
+        block.previous_hash = data['previous_hash']
+        block.proof = data['proof']
+        block.merkle_root = data['merkle_root']
+        block.hash = data['hash']
+        return block
+        
+    def compute_merkle_root(self) -> str:
+        """Compute the Merkle root over the block's transactions"""
+        return merkle_root([transaction_hash(tx) for tx in self.transactions])
+        
+    def get_proof(self, position: int) -> List[Dict[str, str]]:
+        """Merkle inclusion proof for the transaction at the given position"""
+        return merkle_proof([transaction_hash(tx) for tx in self.transactions], position)
+        
+    def header_prefix(self) -> bytes:
+        """
+        Serialize the block header except the proof, which is appended as digits
+        
+        Transactions enter only through the Merkle root, so the header has a
+        fixed size regardless of how many transactions the block holds.
+        """
+        return json.dumps({
             'index': self.index,
             'timestamp': self.timestamp,
-            'transactions': self.transactions,
-            'previous_hash': self.previous_hash,
-            'proof': self.proof
+            'merkle_root': self.merkle_root,
+            'previous_hash': self.previous_hash
         }, sort_keys=True).encode()
         
-        return hashlib.sha256(block_string).hexdigest()
+    def compute_hash(self) -> str:
+        """Compute SHA-256 hash of the block"""
+        return hashlib.sha256(self.header_prefix() + str(self.proof).encode()).hexdigest()
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert block to dictionary"""
         return {
             'index': self.index,
             'timestamp': self.timestamp,
-            'transactions': self.transactions,
+            'transactions': [tx.to_dict() for tx in self.transactions],
+            'merkle_root': self.merkle_root,
             'previous_hash': self.previous_hash,
             'proof': self.proof,
             'hash': self.hash
         }
 
+def _transaction_key(tx_id: str) -> Optional[bytes]:
+    """Binary key of a hex transaction id, or None if it is malformed"""
+    try:
+        return bytes.fromhex(tx_id)
+    except (TypeError, ValueError):
+        return None
+
+def verify_block(block: Block, previous_hash: str, difficulty: int) -> bool:
+    """Check a block's Merkle root, hash, link to the previous block and proof of work"""
+    # Odd Merkle levels duplicate their last node, so a block repeating its
+    # trailing transactions has the same root (CVE-2012-2459); reject repeats
+    if len({tx.key for tx in block.transactions}) != len(block.transactions):
+        return False
+        
+    # Check if the block's transactions match its Merkle root
+    if block.merkle_root != block.compute_merkle_root():
+        return False
+        
+    # Check if the block's hash is correctly computed
+    if block.hash != block.compute_hash():
+        return False
+        
+    # Check if the block points to the previous block's hash
+    if block.previous_hash != previous_hash:
+        return False
+        
+    # Check if the block has a valid proof
+    return meets_difficulty(block.hash, difficulty)
+
+def _verify_range(records: List[Dict[str, Any]], previous_hash: str, difficulty: int) -> Optional[int]:
+    """
+    Verify consecutive blocks given as to_dict() records (runs in audit workers)
+    
+    Returns:
+        Index of the first invalid block, or None if all are valid
+    """
+    for record in records:
+        block = Block.from_dict(record)
+        if not verify_block(block, previous_hash, difficulty):
+            return block.index
+        previous_hash = block.hash
+    return None
+
 class Blockchain:
     """Energy trading blockchain implementation"""
     
-    def __init__(self):
-        """Initialize the blockchain with a genesis block"""
-        self.chain: List[Block] = []
-        self.pending_transactions: List[Dict[str, Any]] = []
+    def __init__(self, difficulty: int = 4, miner: Optional[ProofOfWorkMiner] = None,
+                 mempool_capacity: int = 100000, max_block_transactions: int = 1000,
+                 priority: str = 'fee'):
+        """
+        Initialize the blockchain with a genesis block
+        
+        Args:
+            difficulty: Number of leading hex zeroes required in block hashes
+            miner: Proof-of-work miner (default: a process-pool miner for difficulty)
+            mempool_capacity: Maximum number of pending transactions
+            max_block_transactions: Maximum transactions per block, including the reward
+            priority: Order pending transactions leave the mempool: 'fee' or 'age'
+        """
+        if max_block_transactions < 2:
+            raise ValueError("max_block_transactions must leave room for the reward")
+        self.difficulty = difficulty
+        self.miner = miner or ProofOfWorkMiner(difficulty)
+        self.mempool = Mempool(mempool_capacity, priority)
+        self.max_block_transactions = max_block_transactions
         self.nodes = set()
         
+        # Serializes block production
+        self._mining_lock = threading.Lock()
+        
+        # Callbacks run with each block appended to the chain
+        self.block_listeners: List[Callable[[Block], None]] = []
+        
         # Create genesis block
+        self.reset([])
         self.create_genesis_block()
         
+    def reset(self, chain: List[Block]) -> None:
+        """Replace the chain with an empty one and clear all indexes"""
+        self.chain = chain
+        
+        # Blocks below this height have been validated by is_chain_valid
+        self.verified_height = 0
+        
+        # Indexes over confirmed transactions, maintained as blocks are appended
+        self.tx_index: Dict[bytes, Tuple[int, int]] = {}  # binary tx id -> (block index, position)
+        self.address_index: Dict[str, List[Tuple[int, int]]] = {}  # address -> tx locations
+        self.balances: Dict[str, float] = {}  # address -> token balance
+        
+    def index_state(self) -> Dict[str, Any]:
+        """
+        Copy of the transaction indexes and balances
+        
+        Containers are copied so the result can be serialized while new
+        blocks are appended; binary tx ids are hex-encoded for JSON.
+        """
+        return {
+            'height': len(self.chain),
+            'verified_height': self.verified_height,
+            'tx_index': {key.hex(): location for key, location in self.tx_index.items()},
+            'address_index': {address: list(locations) for address, locations in self.address_index.items()},
+            'balances': dict(self.balances)
+        }
+        
+    def load_index_state(self, state: Dict[str, Any]) -> None:
+        """Restore indexes and balances from index_state() output"""
+        self.tx_index = {bytes.fromhex(tx_id): tuple(location) for tx_id, location in state['tx_index'].items()}
+        self.address_index = {
+            address: [tuple(location) for location in locations]
+            for address, locations in state['address_index'].items()
+        }
+        self.balances = dict(state['balances'])
+        self.verified_height = state.get('verified_height', 0)
+        
     def create_genesis_block(self) -> None:
         """Create the first block in the chain"""
         genesis_block = Block(0, time.time(), [], "0")
         genesis_block.hash = genesis_block.compute_hash()
-        self.chain.append(genesis_block)
+        self.append_block(genesis_block)
+        
+    def append_block(self, block: Block) -> None:
+        """Append a block to the chain and index its transactions"""
+        self.chain.append(block)
+        self.index_transactions(block.index, block.transactions)
+            
+        for listener in self.block_listeners:
+            listener(block)
+            
+    def index_transactions(self, block_index: int, transactions: List[Transaction]) -> None:
+        """Add a block's transactions to the indexes and balances"""
+        for position, tx in enumerate(transactions):
+            location = (block_index, position)
+            self.tx_index[tx.key] = location
+            
+            self.address_index.setdefault(tx.sender, []).append(location)
+            if tx.receiver != tx.sender:
+                self.address_index.setdefault(tx.receiver, []).append(location)
+                
+            self.balances[tx.receiver] = self.balances.get(tx.receiver, 0.0) + tx.total
+            self.balances[tx.sender] = self.balances.get(tx.sender, 0.0) - tx.total
+        
+    @property
+    def pending_transactions(self) -> List[Transaction]:
+        """Pending transactions in arrival order"""
+        return list(self.mempool.transactions.values())
+        
+    @property
+    def pending_index(self) -> Dict[str, Transaction]:
+        """Pending transactions by ID"""
+        return self.mempool.transactions
         
     @property
     def last_block(self) -> Block:
@@ -75,23 +253,16 @@ class Blockchain:
     
     def proof_of_work(self, block: Block) -> int:
         """
-        Simple Proof of Work algorithm:
-        - Find a number p' such that hash(pp') contains 4 leading zeroes
-        - p is the previous proof, p' is the new proof
+        Proof of Work: find a proof such that the block hash has `difficulty`
+        leading zeroes, and set the block's proof and hash
         """
-        block.proof = 0
-        computed_hash = block.compute_hash()
-        
-        while not computed_hash.startswith('0000'):
-            block.proof += 1
-            computed_hash = block.compute_hash()
-            
+        block.proof, block.hash = self.miner.mine(block.header_prefix())
         return block.proof
     
     def add_transaction(self, sender: str, receiver: str, amount: float, 
-                         price: float, timestamp: Optional[float] = None) -> Dict[str, Any]:
+                         price: float, timestamp: Optional[float] = None, fee: float = 0.0) -> Transaction:
         """
-        Add a new energy trading transaction
+        Add a new energy trading transaction to the mempool
         
         Args:
             sender: Address of the energy seller
@@ -99,31 +270,30 @@ class Blockchain:
             amount: Amount of energy in kWh
             price: Price per kWh
             timestamp: When the transaction occurred (default: current time)
+            fee: Priority fee; higher fees are mined first under 'fee' priority
         
         Returns:
-            Transaction details
-        """
-        if timestamp is None:
-            timestamp = time.time()
-            
-        transaction = {
-            'id': str(uuid.uuid4()).replace('-', ''),
-            'sender': sender,
-            'receiver': receiver,
-            'amount': amount,
-            'price': price,
-            'total': round(amount * price, 2),
-            'timestamp': timestamp,
-            'energy_type': 'solar',  # Default to solar energy
-            'status': 'pending'
-        }
+            Transaction details (supports dictionary access; to_dict() for JSON)
         
-        self.pending_transactions.append(transaction)
+        Raises:
+            ValueError: If the mempool is full
+        """
+        transaction = self._new_transaction(sender, receiver, amount, price, timestamp)
+        self.mempool.add(transaction, fee)
         return transaction
     
+    def _new_transaction(self, sender: str, receiver: str, amount: float,
+                         price: float, timestamp: Optional[float] = None) -> Transaction:
+        """Build a pending transaction (solar energy by default)"""
+        return Transaction.create(sender, receiver, amount, price, timestamp)
+    
     def mine_pending_transactions(self, miner_address: str) -> Block:
         """
-        Create a new block with all pending transactions and add it to the chain
+        Create a new block from the highest-priority pending transactions
+        and add it to the chain
+        
+        A block holds at most max_block_transactions transactions including
+        the mining reward; the rest stay in the mempool for the next block.
         
         Args:
             miner_address: Address that will receive mining reward
@@ -131,122 +301,456 @@ class Blockchain:
         Returns:
             The new Block
         """
-        if not self.pending_transactions:
-            return None
+        with self._mining_lock:
+            transactions = self.mempool.take(self.max_block_transactions - 1)
+            if not transactions:
+                return None
+                
+            # Create mining reward transaction
+            transactions.append(self._new_transaction(
+                sender="SYSTEM",
+                receiver=miner_address,
+                amount=1.0,
+                price=0.0
+            ))
             
-        # Create mining reward transaction
-        self.add_transaction(
-            sender="SYSTEM",
-            receiver=miner_address,
-            amount=1.0,
-            price=0.0
-        )
-        
-        # Create a new block
-        block = Block(
-            index=len(self.chain),
-            timestamp=time.time(),
-            transactions=self.pending_transactions,
-            previous_hash=self.last_block.hash
-        )
-        
-        # Find the proof of work
-        self.proof_of_work(block)
-        
-        # Add the new block to the chain
-        self.chain.append(block)
-        
-        # Update transaction status
-        for tx in self.pending_transactions:
-            tx['status'] = 'confirmed'
-        
-        # Reset pending transactions
-        self.pending_transactions = []
-        
-        return block
+            # Create a new block
+            block = Block(
+                index=len(self.chain),
+                timestamp=time.time(),
+                transactions=transactions,
+                previous_hash=self.last_block.hash
+            )
+            
+            # Find the proof of work
+            self.proof_of_work(block)
+            
+            # Update transaction status
+            for tx in transactions:
+                tx.status = CONFIRMED
+            
+            # Add the new block to the chain
+            self.append_block(block)
+            
+            return block
     
-    def is_chain_valid(self) -> bool:
+    def is_chain_valid(self, full: bool = False) -> bool:
         """
         Check if the blockchain is valid:
-        1. Each block's hash is correctly computed
-        2. Each block's previous_hash matches the hash of the previous block
-        3. All blocks have valid proofs
+        1. Each block's Merkle root matches its transactions
+        2. Each block's hash is correctly computed
+        3. Each block's previous_hash matches the hash of the previous block
+        4. All blocks have valid proofs
+        
+        Blocks below the verified_height checkpoint were checked by an
+        earlier call and are skipped unless full is set, so periodic checks
+        only cost as much as the blocks appended since the last one.
         """
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i-1]
-            
-            # Check if current block's hash is correctly computed
-            if current.hash != current.compute_hash():
-                return False
-                
-            # Check if current block points to previous block's hash
-            if current.previous_hash != previous.hash:
-                return False
-                
-            # Check if current block has a valid proof
-            if not current.hash.startswith('0000'):
+        start = 1 if full else max(self.verified_height, 1)
+        for i in range(start, len(self.chain)):
+            if not verify_block(self.chain[i], self.chain[i-1].hash, self.difficulty):
                 return False
+            self.verified_height = max(self.verified_height, i + 1)
                 
         return True
     
-    def get_transactions_for_address(self, address: str) -> List[Dict[str, Any]]:
-        """Get all transactions where the specified address is sender or receiver"""
-        transactions = []
+    def audit_chain(self, workers: Optional[int] = None, blocks_per_task: int = 500) -> Dict[str, Any]:
+        """
+        Verify every block from scratch, splitting block ranges across a process pool
+        
+        Each range is checked against the hash of the block before it, so
+        the ranges together cover every link in the chain. Ranges are
+        serialized only when submitted, with at most two per worker in
+        flight, and no ranges past the first invalid block are submitted.
+        
+        Args:
+            workers: Size of the process pool (default: CPU count; 1 runs in-process)
+            blocks_per_task: Number of consecutive blocks verified per task
         
-        # Check all blocks in the chain
-        for block in self.chain:
-            for tx in block.transactions:
-                if tx['sender'] == address or tx['receiver'] == address:
-                    transactions.append(tx)
+        Returns:
+            Whether the chain is valid, the first invalid block index (or
+            None) and the number of blocks checked (up to the first invalid one)
+        """
+        workers = workers or os.cpu_count() or 1
+        height = len(self.chain)
+        
+        def task(start):
+            records = [self.chain[index].to_dict() for index in range(start, min(start + blocks_per_task, height))]
+            return records, self.chain[start - 1].hash, self.difficulty
+            
+        starts = iter(range(1, height, blocks_per_task))
+        first_invalid = None
+        if workers == 1:
+            for start in starts:
+                first_invalid = _verify_range(*task(start))
+                if first_invalid is not None:
+                    break
+        else:
+            failures = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = set()
+                for start in starts:
+                    if failures and start > min(failures):
+                        break
+                    pending.add(executor.submit(_verify_range, *task(start)))
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        failures.extend(future.result() for future in done if future.result() is not None)
+                failures.extend(future.result() for future in pending if future.result() is not None)
+            first_invalid = min(failures) if failures else None
+            
+        if first_invalid is None:
+            self.verified_height = max(self.verified_height, height)
+            
+        return {
+            'valid': first_invalid is None,
+            'first_invalid': first_invalid,
+            'blocks_checked': first_invalid if first_invalid is not None else max(height - 1, 0)
+        }
+    
+    def get_transactions_for_address(self, address: str) -> List[Transaction]:
+        """Get all transactions where the specified address is sender or receiver"""
+        # Confirmed transactions in chain order
+        transactions = [
+            self.chain[block_index].transactions[position]
+            for block_index, position in self.address_index.get(address, [])
+        ]
                     
-        # Also check pending transactions
-        for tx in self.pending_transactions:
-            if tx['sender'] == address or tx['receiver'] == address:
-                transactions.append(tx)
-                
+        # Followed by pending transactions, from the mempool's address index
+        transactions.extend(self.mempool.for_address(address))
         return transactions
     
     def get_balance(self, address: str) -> float:
-        """Calculate the balance of energy tokens for an address"""
-        balance = 0.0
-        
-        # Check all blocks in the chain
-        for block in self.chain:
-            for tx in block.transactions:
-                if tx['receiver'] == address:
-                    balance += tx['total']
-                if tx['sender'] == address:
-                    balance -= tx['total']
-                    
-        return balance
+        """Get the balance of energy tokens for an address from confirmed transactions"""
+        return self.balances.get(address, 0.0)
+    
+    def export_chain(self, start: int = 0, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Export blocks from start to end (default: the entire blockchain) as a list of dictionaries"""
+        return [block.to_dict() for block in self.chain[start:end]]
+    
+    def _height_at(self, timestamp: float) -> int:
+        """First block height whose timestamp is at or after the given time"""
+        # Blocks are appended in mining order, so timestamps never decrease
+        lo, hi = 0, len(self.chain)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.chain[mid].timestamp < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def block_range(self, start_height: int = 0, end_height: Optional[int] = None,
+                    start_time: Optional[float] = None, end_time: Optional[float] = None) -> range:
+        """
+        Heights of the blocks selected by a height and/or timestamp range
+        
+        Args:
+            start_height: First block height
+            end_height: Height to stop before (default: current chain length)
+            start_time: Only blocks mined at or after this time (epoch seconds)
+            end_time: Only blocks mined before this time (epoch seconds)
+        """
+        height = len(self.chain)
+        start = max(start_height, 0)
+        end = height if end_height is None else min(end_height, height)
+        if start_time is not None:
+            start = max(start, self._height_at(start_time))
+        if end_time is not None:
+            end = min(end, self._height_at(end_time))
+        return range(start, max(start, end))
     
-    def export_chain(self) -> List[Dict[str, Any]]:
-        """Export the entire blockchain as a list of dictionaries"""
-        return [block.to_dict() for block in self.chain]
+    def export_page(self, start_height: int = 0, limit: int = 100,
+                    start_time: Optional[float] = None, end_time: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Export one page of blocks
+        
+        Args:
+            start_height: First block height of the page (the previous page's next_height)
+            limit: Maximum number of blocks in the page
+            start_time: Only blocks mined at or after this time (epoch seconds)
+            end_time: Only blocks mined before this time (epoch seconds)
+        
+        Returns:
+            Blocks of the page, the height to request next (None on the last
+            page) and the chain height
+        """
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        heights = self.block_range(start_height, None, start_time, end_time)
+        page = heights[:limit]
+        return {
+            'blocks': [self.chain[height].to_dict() for height in page],
+            'next_height': page.stop if page.stop < heights.stop else None,
+            'height': len(self.chain)
+        }
+    
+    def stream_chain(self, start_height: int = 0, end_height: Optional[int] = None,
+                     start_time: Optional[float] = None, end_time: Optional[float] = None) -> Iterator[str]:
+        """
+        Export blocks as JSON lines, one block at a time
+        
+        Only one block is serialized at a time, so the output can be sent
+        as a chunked HTTP response. The range is fixed when iteration
+        starts; blocks mined meanwhile are not included.
+        
+        Yields:
+            One JSON document per block, each ending with a newline
+        """
+        for height in self.block_range(start_height, end_height, start_time, end_time):
+            yield json.dumps(self.chain[height].to_dict()) + '\n'
     
-    def get_transaction(self, tx_id: str) -> Optional[Dict[str, Any]]:
+    def get_transaction(self, tx_id: str) -> Optional[Transaction]:
         """Get a specific transaction by ID"""
-        # Check all blocks in the chain
-        for block in self.chain:
-            for tx in block.transactions:
-                if tx['id'] == tx_id:
-                    return tx
-                    
+        location = self.tx_index.get(_transaction_key(tx_id))
+        if location is not None:
+            block_index, position = location
+            return self.chain[block_index].transactions[position]
+            
         # Also check pending transactions
-        for tx in self.pending_transactions:
-            if tx['id'] == tx_id:
-                return tx
-                
-        return None
+        return self.pending_index.get(tx_id)
+    
+    def get_transaction_proof(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a confirmed transaction with its Merkle inclusion proof
+        
+        The result can be checked with merkle.verify_proof(transaction,
+        proof, merkle_root) against a block header, without the other
+        transactions of the block.
+        
+        Returns:
+            Transaction, block header fields and proof, or None if the
+            transaction is unknown or still pending
+        """
+        location = self.tx_index.get(_transaction_key(tx_id))
+        if location is None:
+            return None
+            
+        block_index, position = location
+        block = self.chain[block_index]
+        return {
+            'transaction': block.transactions[position].to_dict(),
+            'block_index': block.index,
+            'block_hash': block.hash,
+            'merkle_root': block.merkle_root,
+            'proof': block.get_proof(position)
+        }
 
 class EnergyTrading:
     """Energy trading system using blockchain"""
     
-    def __init__(self):
-        """Initialize energy trading system"""
-        self.blockchain = Blockchain()
+    def __init__(self, difficulty: int = 4, data_dir: Optional[str] = None,
+                 fsync: str = 'interval', snapshot_interval: int = 100,
+                 mempool_capacity: int = 100000, max_block_transactions: int = 1000):
+        """
+        Initialize energy trading system
+        
+        Args:
+            difficulty: Proof-of-work difficulty of the underlying blockchain
+            mempool_capacity: Maximum number of pending transactions
+            max_block_transactions: Maximum transactions per block
+            data_dir: Directory to persist the ledger in (default: memory only)
+            fsync: Block log fsync policy: 'always', 'interval' or 'never'
+            snapshot_interval: Blocks between snapshots of indexes and balances
+                (taken in a background thread)
+        """
+        self.blockchain = Blockchain(difficulty, mempool_capacity=mempool_capacity,
+                                     max_block_transactions=max_block_transactions)
+        self.block_producer = None
+        self.market = MarketStats()
+        for block in self.blockchain.chain:
+            self.market.add_block(block)
+        self.blockchain.block_listeners.append(self.market.add_block)
+        
+        # Energy totals count confirmed trades only, so transactions evicted
+        # from the mempool never show up in them
+        self.blockchain.block_listeners.append(self._apply_user_stats)
         self.users = {}  # Address -> User info mapping
+        self.user_addresses = {}  # User ID -> address of their first registration
+        
+        # Limit order book; matched trades become blockchain transactions
+        self.order_book = OrderBook(on_trade=self.create_energy_transaction)
+        
+        self.log = None
+        if data_dir is not None:
+            self._open_ledger(data_dir, fsync, snapshot_interval)
+            
+    def _snapshot_path(self, name: str = 'snapshot.json') -> str:
+        return os.path.join(self.data_dir, name)
+        
+    def _open_ledger(self, data_dir: str, fsync: str, snapshot_interval: int) -> None:
+        """
+        Persist the chain and user registry under data_dir, restoring saved state
+        
+        State is restored from the latest snapshot plus the log records
+        appended after it, so restart time depends on the tail since the
+        snapshot rather than on chain length. Blocks covered by the
+        snapshot stay on disk and are read from the log on access.
+        
+        A snapshot is a manifest (snapshot.json) naming a base file with
+        the full indexes and market series, plus delta files holding the
+        transactions of the blocks added since the base.
+        """
+        os.makedirs(data_dir, exist_ok=True)
+        self.data_dir = data_dir
+        self.snapshot_interval = snapshot_interval
+        self.log = BlockLog(os.path.join(data_dir, 'blocks.log'), fsync)
+        self.block_offsets = BlockOffsets(os.path.join(data_dir, 'blocks.idx'))
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread = None
+        
+        manifest = read_json(self._snapshot_path())
+        self.snapshot_manifest = manifest
+        height = manifest['height'] if manifest else 0
+        
+        # Offsets past the snapshot are rebuilt from the replayed tail
+        self.block_offsets.truncate(height)
+        self.blockchain.reset(PersistentChain(self.log, self.block_offsets, Block.from_dict, base_height=height))
+        if manifest:
+            base = read_json(self._snapshot_path(manifest['base']))
+            self.blockchain.load_index_state(base['chain'])
+            self.market.load_state(base['market'])
+            for name in manifest['deltas']:
+                for record in read_json(self._snapshot_path(name))['blocks']:
+                    transactions = [Transaction.from_dict(tx) for tx in record['transactions']]
+                    self.blockchain.index_transactions(record['index'], transactions)
+                    for tx in transactions:
+                        self.market.add_transaction(tx)
+            self.blockchain.verified_height = manifest['verified_height']
+            self.users = manifest['users']
+            self.user_addresses = manifest['user_addresses']
+            
+        for offset, record in self.log.replay(manifest['log_offset'] if manifest else 0):
+            if record['type'] == 'user':
+                self._add_user(record['user'])
+            elif record['type'] == 'block':
+                self.block_offsets.append(offset)
+                self.blockchain.append_block(Block.from_dict(record['block']))
+                
+        # Only blocks appended from here on are written to the log
+        self.blockchain.block_listeners.append(self._persist_block)
+        if len(self.blockchain.chain) == 0:
+            self.blockchain.create_genesis_block()
+            
+    def _persist_block(self, block: Block) -> None:
+        """Append a new block to the log and snapshot every snapshot_interval blocks"""
+        self.block_offsets.append(self.log.append({'type': 'block', 'block': block.to_dict()}))
+        if block.index and block.index % self.snapshot_interval == 0:
+            # Listeners run under the mining lock, which snapshot() takes itself
+            if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+                self._snapshot_thread = threading.Thread(
+                    target=self._background_snapshot, name='ledger-snapshot', daemon=True
+                )
+                self._snapshot_thread.start()
+                
+    def _background_snapshot(self) -> None:
+        try:
+            self.snapshot()
+        except Exception as e:
+            print(f"Ledger snapshot failed: {e}")
+            
+    def _apply_user_stats(self, block: Block) -> None:
+        """Count a block's trades in the users' energy totals"""
+        for tx in block.transactions:
+            if tx.sender in self.users and tx.receiver in self.users:
+                self.users[tx.sender]['energy_produced'] += tx.amount
+                self.users[tx.receiver]['energy_consumed'] += tx.amount
+                
+    def _add_user(self, user: Dict[str, Any]) -> None:
+        self.users[user['address']] = user
+        self.user_addresses.setdefault(user['id'], user['address'])
+        
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Write a snapshot of indexes, balances, market stats and users
+        
+        Restarts replay only the log after the latest snapshot. Blocks it
+        covers are released from memory and read back from the log on access.
+        
+        Snapshots are incremental: usually only the transactions of the
+        blocks added since the previous snapshot are written, as a delta.
+        Once the deltas hold as many transactions as the base, a new full
+        base is written instead, so the cost per block stays constant on
+        average. State is captured under the mining lock and serialized
+        after releasing it.
+        
+        Returns:
+            Log offset and chain height covered by the snapshot
+        """
+        if self.log is None:
+            raise ValueError("Ledger persistence is not enabled")
+            
+        with self._snapshot_lock:
+            previous = self.snapshot_manifest
+            previous_height = previous['height'] if previous else 0
+            base_transactions = previous['base_transactions'] if previous else 0
+            delta_transactions = previous['delta_transactions'] if previous else 0
+            
+            with self.blockchain._mining_lock:
+                chain = self.blockchain.chain
+                height = len(chain)
+                log_offset = self.log.end
+                blocks = [chain[index] for index in range(previous_height, height)]
+                added = sum(len(block.transactions) for block in blocks)
+                full = previous is None or delta_transactions + added > base_transactions
+                base = {'chain': self.blockchain.index_state(), 'market': self.market.state()} if full else None
+                users = {address: dict(user) for address, user in self.users.items()}
+                user_addresses = dict(self.user_addresses)
+                verified_height = self.blockchain.verified_height
+                
+            # The snapshot must never point past what is durable in the log
+            self.log.sync()
+            self.block_offsets.sync()
+            
+            if full:
+                base_name = f'snapshot-base-{height}.json'
+                write_json_atomic(self._snapshot_path(base_name), base)
+                base_transactions, delta_transactions, deltas = len(base['chain']['tx_index']), 0, []
+            else:
+                base_name = previous['base']
+                delta_name = f'snapshot-delta-{height}.json'
+                write_json_atomic(self._snapshot_path(delta_name), {
+                    'blocks': [
+                        {'index': block.index, 'transactions': [tx.to_dict() for tx in block.transactions]}
+                        for block in blocks
+                    ]
+                })
+                delta_transactions += added
+                deltas = previous['deltas'] + [delta_name]
+                
+            manifest = {
+                'log_offset': log_offset,
+                'height': height,
+                'verified_height': verified_height,
+                'created_at': datetime.now().isoformat(),
+                'base': base_name,
+                'deltas': deltas,
+                'base_transactions': base_transactions,
+                'delta_transactions': delta_transactions,
+                'users': users,
+                'user_addresses': user_addresses
+            }
+            write_json_atomic(self._snapshot_path(), manifest)
+            self.snapshot_manifest = manifest
+            
+            # Files of the previous snapshot that the new one no longer uses
+            if full and previous:
+                for name in [previous['base']] + previous['deltas']:
+                    if name != base_name and os.path.exists(self._snapshot_path(name)):
+                        os.remove(self._snapshot_path(name))
+                        
+            with self.blockchain._mining_lock:
+                self.blockchain.chain.release(height)
+        return {'log_offset': log_offset, 'height': height}
+        
+    def close(self) -> None:
+        """Flush the ledger to disk and close its files"""
+        if self.log is not None:
+            if self._snapshot_thread is not None:
+                self._snapshot_thread.join()
+            self.log.close()
+            self.block_offsets.close()
+            self.log = None
         
     def register_user(self, user_id: str, name: str, energy_type: str = 'solar') -> Dict[str, Any]:
         """Register a new user in the energy trading system"""
@@ -262,37 +766,97 @@ class EnergyTrading:
             'energy_consumed': 0.0
         }
         
-        self.users[address] = user
+        self._add_user(user)
+        if self.log is not None:
+            self.log.append({'type': 'user', 'user': user})
         return user
     
     def create_energy_transaction(self, seller_address: str, buyer_address: str, 
-                                 amount: float, price: float) -> Dict[str, Any]:
-        """Create an energy trading transaction"""
+                                 amount: float, price: float) -> Transaction:
+        """
+        Create an energy trading transaction
+        
+        The users' energy totals are updated when the transaction is mined.
+        
+        Raises:
+            ValueError: If an address is unknown
+            MempoolFullError: If the mempool is full
+        """
         # Validate addresses
         if seller_address not in self.users or buyer_address not in self.users:
             raise ValueError("Invalid seller or buyer address")
             
         # Add transaction to the blockchain
-        transaction = self.blockchain.add_transaction(
+        return self.blockchain.add_transaction(
             sender=seller_address,
             receiver=buyer_address,
             amount=amount,
             price=price
         )
+    
+    def submit_order(self, address: str, side: str, amount: float, price: float,
+                     delivery_hour=None) -> Dict[str, Any]:
+        """
+        Place a limit order in the order book
         
-        # Update user stats
-        self.users[seller_address]['energy_produced'] += amount
-        self.users[buyer_address]['energy_consumed'] += amount
+        Args:
+            address: Address of the trader
+            side: 'buy' or 'sell'
+            amount: Energy in kWh
+            price: Limit price per kWh
+            delivery_hour: Delivery hour (default: current hour)
         
-        return transaction
+        Returns:
+            The order, the trades it produced and whether matching stopped
+            early because the mempool is full (backpressure), in which case
+            the remainder is left unfilled
+        """
+        if address not in self.users:
+            raise ValueError("Invalid trader address")
+        return self.order_book.submit(address, side, amount, price, delivery_hour)
+    
+    def submit_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Place many limit orders (dicts with owner, side, amount, price, delivery_hour)"""
+        for order in orders:
+            if order['owner'] not in self.users:
+                raise ValueError(f"Invalid trader address {order['owner']}")
+        return self.order_book.submit_many(orders)
+    
+    def cancel_order(self, order_id: int) -> bool:
+        """Cancel a resting order"""
+        return self.order_book.cancel(order_id)
+    
+    def submit_meter_orders(self, path: str, ask_price: float = 0.10, bid_price: float = 0.12,
+                            register: bool = True) -> List[Dict[str, Any]]:
+        """
+        Place surplus sell and demand buy orders derived from meter readings
+        
+        Args:
+            path: Meter data CSV (e.g. client/data/energy_data.csv)
+            ask_price: Limit price of surplus sell orders
+            bid_price: Limit price of demand buy orders
+            register: Register households that have no user yet, using the
+                household id as user id
+        
+        Returns:
+            One submit result per order
+        """
+        def address_for(household_id):
+            address = self.user_addresses.get(household_id)
+            if address is None and register:
+                address = self.register_user(household_id, f"Household {household_id}")['address']
+            return address
+            
+        return self.order_book.submit_many(read_meter_orders(path, address_for, ask_price, bid_price))
+    
+    def _miner_address(self) -> str:
+        """Choose a miner (in a real system, this would be more complex)"""
+        return next(iter(self.users), "SYSTEM")
     
     def process_transactions(self) -> Dict[str, Any]:
         """Process pending transactions and create a new block"""
-        # Choose a random miner (in a real system, this would be more complex)
-        miner = list(self.users.keys())[0] if self.users else "SYSTEM"
-        
         # Mine the block
-        block = self.blockchain.mine_pending_transactions(miner)
+        block = self.blockchain.mine_pending_transactions(self._miner_address())
         
         if block:
             return {
@@ -306,15 +870,28 @@ class EnergyTrading:
                 'error': 'No pending transactions to process'
             }
     
-    def get_user_transactions(self, user_id: str) -> List[Dict[str, Any]]:
+    def start_block_producer(self, interval: float = 5.0, min_transactions: Optional[int] = None) -> None:
+        """
+        Mine blocks in the background instead of on process_transactions calls
+        
+        Args:
+            interval: Maximum seconds between blocks while transactions are pending
+            min_transactions: Pending count that triggers a block immediately
+                (default: the maximum block size)
+        """
+        if self.block_producer is None:
+            self.block_producer = BlockProducer(self.blockchain, self._miner_address, interval, min_transactions)
+        self.block_producer.start()
+    
+    def stop_block_producer(self) -> None:
+        """Stop background block production"""
+        if self.block_producer is not None:
+            self.block_producer.stop()
+            self.block_producer = None
+    
+    def get_user_transactions(self, user_id: str) -> List[Transaction]:
         """Get all transactions for a user"""
-        # Find user address by ID
-        user_address = None
-        for address, user in self.users.items():
-            if user['id'] == user_id:
-                user_address = address
-                break
-                
+        user_address = self.user_addresses.get(user_id)
         if not user_address:
             return []
             
@@ -322,31 +899,27 @@ class EnergyTrading:
     
     def get_user_balance(self, user_id: str) -> float:
         """Get the energy token balance for a user"""
-        # Find user address by ID
-        user_address = None
-        for address, user in self.users.items():
-            if user['id'] == user_id:
-                user_address = address
-                break
-                
+        user_address = self.user_addresses.get(user_id)
         if not user_address:
             return 0.0
             
         return self.blockchain.get_balance(user_address)
     
-    def get_market_stats(self) -> Dict[str, Any]:
-        """Get market statistics for energy trading"""
-        total_energy_traded = 0.0
-        total_value_traded = 0.0
-        transaction_count = 0
+    def get_market_stats(self, start: Optional[float] = None, end: Optional[float] = None,
+                         energy_type: Optional[str] = None, seller: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get market statistics for energy trading
         
-        # Calculate statistics from confirmed transactions
-        for block in self.blockchain.chain:
-            for tx in block.transactions:
-                if tx['sender'] != "SYSTEM" and tx['receiver'] != "SYSTEM":
-                    total_energy_traded += tx['amount']
-                    total_value_traded += tx['total']
-                    transaction_count += 1
+        Args:
+            start: Only count trades from this time (epoch seconds, hour-aligned)
+            end: Only count trades before this time (epoch seconds, hour-aligned)
+            energy_type: Only count trades of this energy type
+            seller: Only count trades sold by this address
+        """
+        # Statistics from confirmed transactions, maintained as blocks are mined
+        totals = self.market.totals(start, end, energy_type, seller)
+        total_energy_traded = totals['total_energy_traded']
+        total_value_traded = totals['total_value_traded']
         
         # Calculate average price
         avg_price = total_value_traded / total_energy_traded if total_energy_traded > 0 else 0
@@ -354,18 +927,31 @@ class EnergyTrading:
         return {
             'total_energy_traded': round(total_energy_traded, 2),
             'total_value_traded': round(total_value_traded, 2),
-            'transaction_count': transaction_count,
+            'transaction_count': totals['transaction_count'],
             'average_price': round(avg_price, 4),
             'active_users': len(self.users),
-            'pending_transactions': len(self.blockchain.pending_transactions)
+            'pending_transactions': len(self.blockchain.mempool)
         }
+    
+    def get_market_history(self, start: Optional[float] = None, end: Optional[float] = None,
+                           bucket: str = 'hour', energy_type: Optional[str] = None,
+                           seller: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get traded energy, value and average price per hour or day over a time range"""
+        return self.market.rollup(start, end, bucket, energy_type, seller)
 
-# Create a singleton instance
-energy_trading = EnergyTrading()
+# Create a singleton instance, persisted when ENERGY_LEDGER_DIR is set
+energy_trading = EnergyTrading(data_dir=os.environ.get('ENERGY_LEDGER_DIR'))
 
 # Add some initial users for testing
 def initialize_test_data():
     """Initialize test data for the energy trading system"""
+    # A restored ledger already has its users
+    if energy_trading.users:
+        return {
+            'users': list(energy_trading.users.values()),
+            'market_stats': energy_trading.get_market_stats()
+        }
+        
     # Register sample users
     user1 = energy_trading.register_user("user1", "Solar Farm A", "solar")
     user2 = energy_trading.register_user("user2", "Wind Farm B", "wind")
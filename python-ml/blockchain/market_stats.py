@@ -0,0 +1,237 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+# Width of one rollup bucket in seconds
+HOUR = 3600
+
+# Open-ended range bounds in hours
+_MIN_HOUR = -2 ** 62
+_MAX_HOUR = 2 ** 62
+
+Timestamp = Union[float, datetime, None]
+
+def _to_hour(timestamp: Timestamp, default: int) -> int:
+    """Hour bucket index of an epoch timestamp or datetime"""
+    if timestamp is None:
+        return default
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.timestamp()
+    return int(timestamp // HOUR)
+
+class _PrefixSeries:
+    """
+    Hourly buckets with cumulative sums
+
+    Buckets are kept sorted by hour, so the total over any range is the
+    difference of two prefix sums found by binary search.
+    """
+
+    __slots__ = ('hours', 'energy', 'value', 'count')
+
+    def __init__(self):
+        self.hours: List[int] = []
+        # Cumulative totals up to and including each bucket
+        self.energy: List[float] = []
+        self.value: List[float] = []
+        self.count: List[int] = []
+
+    def add(self, hour: int, energy: float, value: float) -> None:
+        """Add one transaction to its hour bucket"""
+        if self.hours and hour == self.hours[-1]:
+            self.energy[-1] += energy
+            self.value[-1] += value
+            self.count[-1] += 1
+            return
+
+        if not self.hours or hour > self.hours[-1]:
+            self.hours.append(hour)
+            self.energy.append((self.energy[-1] if self.energy else 0.0) + energy)
+            self.value.append((self.value[-1] if self.value else 0.0) + value)
+            self.count.append((self.count[-1] if self.count else 0) + 1)
+            return
+
+        # Late transaction: open its bucket if needed and shift later prefixes
+        position = bisect_left(self.hours, hour)
+        if position == len(self.hours) or self.hours[position] != hour:
+            insort(self.hours, hour)
+            previous = position - 1
+            self.energy.insert(position, self.energy[previous] if previous >= 0 else 0.0)
+            self.value.insert(position, self.value[previous] if previous >= 0 else 0.0)
+            self.count.insert(position, self.count[previous] if previous >= 0 else 0)
+        for i in range(position, len(self.hours)):
+            self.energy[i] += energy
+            self.value[i] += value
+            self.count[i] += 1
+
+    def state(self) -> Dict[str, list]:
+        """JSON-serializable copy of the series"""
+        return {name: list(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, list]) -> '_PrefixSeries':
+        """Rebuild a series from state()"""
+        series = cls()
+        for name in cls.__slots__:
+            setattr(series, name, list(state[name]))
+        return series
+
+    def _prefix(self, position: int):
+        """Totals of the first `position` buckets"""
+        if position == 0:
+            return 0.0, 0.0, 0
+        return self.energy[position - 1], self.value[position - 1], self.count[position - 1]
+
+    def total(self, start_hour: int, end_hour: int):
+        """Totals over buckets with start_hour <= hour < end_hour"""
+        lo = bisect_left(self.hours, start_hour)
+        hi = bisect_left(self.hours, end_hour)
+        lo_energy, lo_value, lo_count = self._prefix(lo)
+        hi_energy, hi_value, hi_count = self._prefix(hi)
+        return hi_energy - lo_energy, hi_value - lo_value, hi_count - lo_count
+
+    def buckets(self, start_hour: int, end_hour: int):
+        """Per-bucket totals (hour, energy, value, count) over a range"""
+        lo = bisect_left(self.hours, start_hour)
+        hi = bisect_left(self.hours, end_hour)
+        previous = self._prefix(lo)
+        for position in range(lo, hi):
+            current = (self.energy[position], self.value[position], self.count[position])
+            yield (self.hours[position], current[0] - previous[0],
+                   current[1] - previous[1], current[2] - previous[2])
+            previous = current
+
+class MarketStats:
+    """
+    Incremental energy market statistics
+
+    Confirmed trades (transactions not involving SYSTEM) are folded into
+    running totals and into hourly prefix-sum series for the whole market,
+    each energy type and each seller as blocks are appended, so stats over
+    any time range cost O(log n) instead of a walk over the chain.
+    """
+
+    def __init__(self):
+        """Initialize empty market statistics"""
+        self.total_energy = 0.0
+        self.total_value = 0.0
+        self.transaction_count = 0
+        self.by_market = _PrefixSeries()
+        self.by_energy_type: Dict[str, _PrefixSeries] = {}
+        self.by_seller: Dict[str, _PrefixSeries] = {}
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of all statistics"""
+        return {
+            'total_energy': self.total_energy,
+            'total_value': self.total_value,
+            'transaction_count': self.transaction_count,
+            'by_market': self.by_market.state(),
+            'by_energy_type': {key: series.state() for key, series in self.by_energy_type.items()},
+            'by_seller': {key: series.state() for key, series in self.by_seller.items()}
+        }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Replace all statistics with a state() snapshot"""
+        self.total_energy = state['total_energy']
+        self.total_value = state['total_value']
+        self.transaction_count = state['transaction_count']
+        self.by_market = _PrefixSeries.from_state(state['by_market'])
+        self.by_energy_type = {key: _PrefixSeries.from_state(value) for key, value in state['by_energy_type'].items()}
+        self.by_seller = {key: _PrefixSeries.from_state(value) for key, value in state['by_seller'].items()}
+
+    def add_block(self, block) -> None:
+        """Fold a newly appended block's trades into the statistics"""
+        for tx in block.transactions:
+            self.add_transaction(tx)
+
+    def add_transaction(self, tx: Dict[str, Any]) -> None:
+        """Fold one confirmed transaction into the statistics"""
+        if tx['sender'] == "SYSTEM" or tx['receiver'] == "SYSTEM":
+            return
+
+        self.total_energy += tx['amount']
+        self.total_value += tx['total']
+        self.transaction_count += 1
+
+        hour = _to_hour(tx['timestamp'], 0)
+        self.by_market.add(hour, tx['amount'], tx['total'])
+        self.by_energy_type.setdefault(tx['energy_type'], _PrefixSeries()).add(hour, tx['amount'], tx['total'])
+        self.by_seller.setdefault(tx['sender'], _PrefixSeries()).add(hour, tx['amount'], tx['total'])
+
+    def _series(self, energy_type: Optional[str], seller: Optional[str]) -> Optional[_PrefixSeries]:
+        """Series for a filter; combining energy type and seller is not supported"""
+        if energy_type is not None and seller is not None:
+            raise ValueError("Filter by energy_type or seller, not both")
+        if energy_type is not None:
+            return self.by_energy_type.get(energy_type)
+        if seller is not None:
+            return self.by_seller.get(seller)
+        return self.by_market
+
+    def totals(self, start: Timestamp = None, end: Timestamp = None,
+               energy_type: Optional[str] = None, seller: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Trade totals over a time range
+
+        Args:
+            start: Range start (epoch seconds or datetime), rounded down to the hour
+            end: Range end (exclusive), rounded down to the hour
+            energy_type: Only count trades of this energy type
+            seller: Only count trades sold by this address
+
+        Returns:
+            Dictionary with energy, value and transaction count
+        """
+        if start is None and end is None and energy_type is None and seller is None:
+            energy, value, count = self.total_energy, self.total_value, self.transaction_count
+        else:
+            series = self._series(energy_type, seller)
+            if series is None:
+                energy, value, count = 0.0, 0.0, 0
+            else:
+                energy, value, count = series.total(_to_hour(start, _MIN_HOUR), _to_hour(end, _MAX_HOUR))
+
+        return {
+            'total_energy_traded': energy,
+            'total_value_traded': value,
+            'transaction_count': count
+        }
+
+    def rollup(self, start: Timestamp = None, end: Timestamp = None, bucket: str = 'hour',
+               energy_type: Optional[str] = None, seller: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Trade totals per hour or day over a time range
+
+        Args:
+            start: Range start (epoch seconds or datetime), rounded down to the hour
+            end: Range end (exclusive), rounded down to the hour
+            bucket: 'hour' or 'day' (UTC days)
+            energy_type: Only count trades of this energy type
+            seller: Only count trades sold by this address
+
+        Returns:
+            One entry per non-empty bucket, oldest first
+        """
+        if bucket not in ('hour', 'day'):
+            raise ValueError("bucket must be 'hour' or 'day'")
+        series = self._series(energy_type, seller)
+        if series is None:
+            return []
+
+        hours_per_bucket = 1 if bucket == 'hour' else 24
+        rows = []
+        for hour, energy, value, count in series.buckets(_to_hour(start, _MIN_HOUR), _to_hour(end, _MAX_HOUR)):
+            bucket_start = (hour // hours_per_bucket) * hours_per_bucket * HOUR
+            if rows and rows[-1]['start'] == bucket_start:
+                rows[-1]['energy'] += energy
+                rows[-1]['value'] += value
+                rows[-1]['transaction_count'] += count
+            else:
+                rows.append({'start': bucket_start, 'energy': energy, 'value': value, 'transaction_count': count})
+
+        for row in rows:
+            row['average_price'] = round(row['value'] / row['energy'], 4) if row['energy'] > 0 else 0
+            row['energy'] = round(row['energy'], 2)
+            row['value'] = round(row['value'], 2)
+        return rows
@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional, Union
+
+from .transaction import Transaction
+
+PRIORITIES = ('fee', 'age')
+
+class MempoolFullError(ValueError):
+    """Raised when a full mempool rejects a transaction (backpressure)"""
+
+class Mempool:
+    """
+    Bounded pool of pending transactions
+
+    Transactions leave in priority order: highest fee first (ties by
+    arrival) or strictly by arrival. When the pool is full a new
+    transaction evicts the lowest-priority one if it outranks it, and is
+    rejected otherwise. Removed entries are dropped lazily from the heaps.
+    Pending transactions are also indexed by sender and receiver address.
+    """
+
+    def __init__(self, capacity: int = 100000, priority: str = 'fee'):
+        """
+        Initialize a mempool
+
+        Args:
+            capacity: Maximum number of pending transactions
+            priority: 'fee' (highest fee first) or 'age' (oldest first)
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}")
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.priority = priority
+        self.transactions: Dict[str, Transaction] = {}  # tx id -> transaction, in arrival order
+        self.by_address: Dict[str, Dict[str, Transaction]] = {}  # address -> {tx id: transaction}, in arrival order
+        self._best = []   # (-fee, seq, tx id): next to leave
+        self._worst = []  # (fee, -seq, tx id): next to be evicted
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def _fee(self, fee: float) -> float:
+        return fee if self.priority == 'fee' else 0.0
+
+    def add(self, transaction: Transaction, fee: float = 0.0) -> None:
+        """
+        Add a pending transaction
+
+        Args:
+            transaction: Pending transaction
+            fee: Priority fee (only used with 'fee' priority)
+
+        Raises:
+            MempoolFullError: If the pool is full and the transaction does
+                not outrank the lowest-priority pending one
+        """
+        fee = self._fee(fee)
+        with self._condition:
+            if len(self.transactions) >= self.capacity:
+                self._drop_removed(self._worst)
+                lowest_fee = self._worst[0][0]
+                if fee <= lowest_fee:
+                    raise MempoolFullError("Mempool is full")
+                _, _, evicted = heapq.heappop(self._worst)
+                self._unindex(self.transactions.pop(evicted))
+
+            seq = next(self._seq)
+            self.transactions[transaction.id] = transaction
+            self._index(transaction)
+            heapq.heappush(self._best, (-fee, seq, transaction.id))
+            heapq.heappush(self._worst, (fee, -seq, transaction.id))
+            self._compact()
+            self._condition.notify_all()
+
+    def _index(self, transaction: Transaction) -> None:
+        """Add a transaction to the address index"""
+        for address in {transaction.sender, transaction.receiver}:
+            self.by_address.setdefault(address, {})[transaction.id] = transaction
+
+    def _unindex(self, transaction: Transaction) -> None:
+        """Remove a transaction that left the pool from the address index"""
+        for address in {transaction.sender, transaction.receiver}:
+            pending = self.by_address.get(address)
+            if pending is not None:
+                pending.pop(transaction.id, None)
+                if not pending:
+                    del self.by_address[address]
+
+    def for_address(self, address: str) -> List[Transaction]:
+        """Pending transactions sent or received by an address, in arrival order"""
+        with self._condition:
+            return list(self.by_address.get(address, {}).values())
+
+    def _drop_removed(self, heap: list) -> None:
+        """Pop entries whose transaction already left the pool"""
+        while heap and heap[0][2] not in self.transactions:
+            heapq.heappop(heap)
+
+    def _compact(self) -> None:
+        """Rebuild a heap once its stale entries outnumber the pending transactions"""
+        bound = 2 * len(self.transactions) + 1024
+        if len(self._best) > bound:
+            self._best = [entry for entry in self._best if entry[2] in self.transactions]
+            heapq.heapify(self._best)
+        if len(self._worst) > bound:
+            self._worst = [entry for entry in self._worst if entry[2] in self.transactions]
+            heapq.heapify(self._worst)
+
+    def take(self, limit: int) -> List[Transaction]:
+        """Remove and return up to `limit` transactions in priority order"""
+        taken = []
+        with self._condition:
+            while self._best and len(taken) < limit:
+                _, _, tx_id = heapq.heappop(self._best)
+                transaction = self.transactions.pop(tx_id, None)
+                if transaction is not None:
+                    self._unindex(transaction)
+                    taken.append(transaction)
+            self._compact()
+        return taken
+
+    def remove(self, tx_id: str) -> Optional[Transaction]:
+        """Remove a pending transaction by ID"""
+        with self._condition:
+            transaction = self.transactions.pop(tx_id, None)
+            if transaction is not None:
+                self._unindex(transaction)
+                self._compact()
+            return transaction
+
+    def wait(self, min_size: int, timeout: float) -> bool:
+        """Block until at least min_size transactions are pending or timeout; returns whether reached"""
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.transactions) >= min_size, timeout)
+
+    def notify(self) -> None:
+        """Wake up waiters so they re-check their condition"""
+        with self._condition:
+            self._condition.notify_all()
+
+class BlockProducer:
+    """
+    Background thread that mines pending transactions into blocks
+
+    A block is produced every `interval` seconds if anything is pending,
+    or as soon as `min_transactions` are pending. Bursts are drained as a
+    sequence of size-bounded blocks.
+    """
+
+    def __init__(self, blockchain, miner_address: Union[str, Callable[[], str]],
+                 interval: float = 5.0, min_transactions: Optional[int] = None):
+        """
+        Initialize a block producer
+
+        Args:
+            blockchain: Blockchain to mine on
+            miner_address: Reward address, or a callable returning it
+            interval: Maximum seconds between blocks while transactions are pending
+            min_transactions: Pending count that triggers a block immediately
+                (default: the blockchain's maximum block size)
+        """
+        self.blockchain = blockchain
+        self.miner_address = miner_address
+        self.interval = interval
+        self.min_transactions = min_transactions or blockchain.max_block_transactions
+        self.blocks_produced = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the producer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='block-producer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the producer thread after the block being mined, if any"""
+        self._stop.set()
+        self.blockchain.mempool.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        mempool = self.blockchain.mempool
+        while not self._stop.is_set():
+            mempool.wait(self.min_transactions, self.interval)
+            if self._stop.is_set():
+                break
+            # Drain full blocks, then whatever is left once the interval elapsed
+            while len(mempool) and not self._stop.is_set():
+                address = self.miner_address() if callable(self.miner_address) else self.miner_address
+                if self.blockchain.mine_pending_transactions(address) is not None:
+                    self.blocks_produced += 1
+                if len(mempool) < self.min_transactions:
+                    break
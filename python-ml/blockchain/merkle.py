@@ -0,0 +1,88 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+# Fields that change after a transaction is mined and so are not committed to
+MUTABLE_FIELDS = ('status',)
+
+# Domain separation between leaves and inner nodes (prevents a node being
+# passed off as a leaf in a forged proof)
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+def transaction_hash(transaction: Dict[str, Any]) -> bytes:
+    """Leaf hash of a transaction over its immutable fields"""
+    committed = {key: value for key, value in transaction.items() if key not in MUTABLE_FIELDS}
+    return hashlib.sha256(_LEAF_PREFIX + json.dumps(committed, sort_keys=True).encode()).digest()
+
+def _parent(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+def _next_level(level: List[bytes]) -> List[bytes]:
+    """Hash pairs of nodes; an odd last node is paired with itself"""
+    if len(level) % 2:
+        level = level + [level[-1]]
+    return [_parent(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+
+def merkle_root(leaves: List[bytes]) -> str:
+    """
+    Merkle root over leaf hashes
+
+    Args:
+        leaves: Leaf hashes in block order
+
+    Returns:
+        Hex root hash (hash of the empty string for an empty block)
+    """
+    if not leaves:
+        return hashlib.sha256(b'').hexdigest()
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+def merkle_proof(leaves: List[bytes], index: int) -> List[Dict[str, str]]:
+    """
+    Inclusion proof for the leaf at index
+
+    Args:
+        leaves: Leaf hashes in block order
+        index: Position of the leaf to prove
+
+    Returns:
+        Sibling hashes from the leaf up to the root, each with the side it
+        is concatenated on
+    """
+    if not 0 <= index < len(leaves):
+        raise ValueError(f"Leaf index {index} out of range")
+    proof = []
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        sibling = index ^ 1
+        proof.append({
+            'hash': level[sibling].hex(),
+            'position': 'left' if sibling < index else 'right'
+        })
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+def verify_proof(transaction: Dict[str, Any], proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Check that a transaction is included under a Merkle root
+
+    Args:
+        transaction: Transaction dictionary as returned by the chain
+        proof: Output of merkle_proof for that transaction
+        root: Merkle root from the block header
+
+    Returns:
+        True if the proof leads from the transaction to the root
+    """
+    node = transaction_hash(transaction)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        node = _parent(sibling, node) if step['position'] == 'left' else _parent(node, sibling)
+    return node.hex() == root
@@ -0,0 +1,138 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional, Tuple
+
+# Set in each worker process by _init_worker; tells searches to stop early
+_stop_event = None
+
+# Nonces tried between checks of the stop event
+_CHECK_INTERVAL = 4096
+
+def meets_difficulty(block_hash: str, difficulty: int) -> bool:
+    """Whether a hex block hash has the required number of leading zeroes"""
+    return block_hash.startswith('0' * difficulty)
+
+def _search(prefix: bytes, start: int, stop: int, difficulty: int) -> Optional[Tuple[int, str]]:
+    """
+    Try nonces in [start, stop) against a serialized block header
+
+    The header prefix is hashed once; each attempt copies that SHA-256 state
+    and feeds only the nonce digits.
+
+    Returns:
+        Tuple of (nonce, hash) for the first solution, or None
+    """
+    base = hashlib.sha256(prefix)
+    zero_bytes, odd = divmod(difficulty, 2)
+    zeros = bytes(zero_bytes)
+
+    for chunk_start in range(start, stop, _CHECK_INTERVAL):
+        if _stop_event is not None and _stop_event.is_set():
+            return None
+        for nonce in range(chunk_start, min(chunk_start + _CHECK_INTERVAL, stop)):
+            attempt = base.copy()
+            attempt.update(str(nonce).encode())
+            digest = attempt.digest()
+            # Compare raw bytes instead of building the hex string each time
+            if digest[:zero_bytes] == zeros and (not odd or digest[zero_bytes] < 16):
+                return nonce, attempt.hexdigest()
+    return None
+
+def _init_worker(stop_event) -> None:
+    """Process pool initializer sharing the stop event with workers"""
+    global _stop_event
+    _stop_event = stop_event
+
+class ProofOfWorkMiner:
+    """
+    Proof-of-work search over a block header
+
+    The header (everything but the nonce) is serialized once per block and
+    the nonce space is split into chunks searched across a process pool.
+    The first worker to find a solution sets a shared event so the others
+    stop early. Easy searches run in-process, where pool dispatch would
+    cost more than the search itself.
+    """
+
+    def __init__(self, difficulty: int = 4, workers: Optional[int] = None,
+                 chunk_size: int = 1 << 16, parallel_difficulty: int = 5):
+        """
+        Initialize a miner
+
+        Args:
+            difficulty: Number of leading hex zeroes required in a block hash
+            workers: Size of the mining process pool (default: CPU count)
+            chunk_size: Nonces per task handed to a worker
+            parallel_difficulty: Lowest difficulty mined on the process pool
+        """
+        if difficulty < 0 or difficulty > 64:
+            raise ValueError("difficulty must be between 0 and 64")
+        self.difficulty = difficulty
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.parallel_difficulty = parallel_difficulty
+        self._executor = None
+        self._stop_event = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context()
+            self._stop_event = context.Event()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context,
+                initializer=_init_worker, initargs=(self._stop_event,)
+            )
+        return self._executor
+
+    def mine(self, prefix: bytes, start: int = 0) -> Tuple[int, str]:
+        """
+        Find a nonce whose hash with the header prefix meets the difficulty
+
+        Args:
+            prefix: Serialized block header without the nonce
+            start: First nonce to try
+
+        Returns:
+            Tuple of (nonce, hash)
+        """
+        if self.workers <= 1 or self.difficulty < self.parallel_difficulty:
+            nonce = start
+            while True:
+                found = _search(prefix, nonce, nonce + self.chunk_size, self.difficulty)
+                if found is not None:
+                    return found
+                nonce += self.chunk_size
+
+        # One search at a time: the stop event is shared by the whole pool
+        with self._lock:
+            executor = self._get_executor()
+            self._stop_event.clear()
+            next_start = start
+            pending = set()
+            try:
+                while True:
+                    # Keep every worker busy with a chunk queued behind it
+                    while len(pending) < self.workers * 2:
+                        pending.add(executor.submit(
+                            _search, prefix, next_start, next_start + self.chunk_size, self.difficulty
+                        ))
+                        next_start += self.chunk_size
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    solutions = [future.result() for future in done if future.result() is not None]
+                    if solutions:
+                        return min(solutions)
+            finally:
+                self._stop_event.set()
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+
+    def shutdown(self) -> None:
+        """Stop the mining process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
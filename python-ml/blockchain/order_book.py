@@ -0,0 +1,289 @@
+import csv
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .mempool import MempoolFullError
+
+BUY = 'buy'
+SELL = 'sell'
+
+# Remaining amounts below this are treated as fully filled (float rounding)
+_EPSILON = 1e-9
+
+def delivery_hour_of(when: Union[float, datetime, str, None]) -> int:
+    """Delivery hour (hours since the epoch) of a timestamp, datetime or ISO string"""
+    if when is None:
+        when = time.time()
+    elif isinstance(when, str):
+        when = datetime.fromisoformat(when).timestamp()
+    elif isinstance(when, datetime):
+        when = when.timestamp()
+    return int(when // 3600)
+
+class Order:
+    """A limit order resting in (or matched by) the order book"""
+
+    __slots__ = ('id', 'owner', 'side', 'price', 'amount', 'remaining',
+                 'delivery_hour', 'timestamp', 'status')
+
+    def __init__(self, order_id: int, owner: str, side: str, price: float, amount: float,
+                 delivery_hour: int, timestamp: float):
+        self.id = order_id
+        self.owner = owner
+        self.side = side
+        self.price = price
+        self.amount = amount
+        self.remaining = amount
+        self.delivery_hour = delivery_hour
+        self.timestamp = timestamp
+        self.status = 'open'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert order to dictionary"""
+        return {
+            'id': self.id,
+            'owner': self.owner,
+            'side': self.side,
+            'price': self.price,
+            'amount': self.amount,
+            'remaining': round(self.remaining, 6),
+            'delivery_hour': self.delivery_hour,
+            'timestamp': self.timestamp,
+            'status': self.status
+        }
+
+class _HourBook:
+    """Bid and ask heaps for one delivery hour"""
+
+    __slots__ = ('bids', 'asks')
+
+    def __init__(self):
+        # Entries are (sort price, sequence, order): highest bid and lowest
+        # ask first, ties broken by arrival
+        self.bids: List[Tuple[float, int, Order]] = []
+        self.asks: List[Tuple[float, int, Order]] = []
+
+class OrderBook:
+    """
+    Continuous double auction with price-time priority
+
+    Each delivery hour has its own bid and ask heaps. An incoming order
+    trades against the best resting orders on the other side while prices
+    cross, at the resting order's price. Whatever is left rests in the
+    book. Cancelled orders are dropped lazily when they reach the top of a
+    heap. If settlement is backed up (the mempool is full), matching stops
+    and the remainder is returned unfilled rather than rested, since it
+    would cross the book; the caller can resubmit it once the mempool drains.
+    """
+
+    def __init__(self, on_trade: Callable[[str, str, float, float], Any]):
+        """
+        Initialize an order book
+
+        Args:
+            on_trade: Settles a trade given (seller, buyer, amount, price) and
+                returns the resulting transaction (or None); raises
+                MempoolFullError when it cannot accept trades right now
+        """
+        self.on_trade = on_trade
+        self.books: Dict[int, _HourBook] = {}
+        self.orders: Dict[int, Order] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, side: str, amount: float, price: float,
+               delivery_hour: Union[int, float, datetime, str, None] = None) -> Dict[str, Any]:
+        """
+        Submit a limit order and match it against the book
+
+        Args:
+            owner: Address placing the order
+            side: 'buy' or 'sell'
+            amount: Energy in kWh
+            price: Limit price per kWh
+            delivery_hour: Hour index from delivery_hour_of, or a timestamp,
+                datetime or ISO string within the hour (default: current hour)
+
+        Returns:
+            The order, the trades it produced and whether matching stopped
+            early because settlement is backed up (backpressure); such an
+            order does not rest and its remainder is reported as 'unfilled'
+        """
+        if side not in (BUY, SELL):
+            raise ValueError("side must be 'buy' or 'sell'")
+        if amount <= 0 or price < 0:
+            raise ValueError("amount must be positive and price non-negative")
+        if not isinstance(delivery_hour, int):
+            delivery_hour = delivery_hour_of(delivery_hour)
+
+        with self._lock:
+            order = Order(next(self._ids), owner, side, float(price), float(amount), delivery_hour, time.time())
+            trades, backpressure = self._match(order)
+            if backpressure:
+                order.status = 'unfilled'
+            elif order.remaining > _EPSILON:
+                self.orders[order.id] = order
+                book = self.books.setdefault(delivery_hour, _HourBook())
+                if side == BUY:
+                    heapq.heappush(book.bids, (-order.price, order.id, order))
+                else:
+                    heapq.heappush(book.asks, (order.price, order.id, order))
+            else:
+                order.status = 'filled'
+        return {'order': order.to_dict(), 'trades': trades, 'backpressure': backpressure}
+
+    def submit_many(self, orders: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Submit orders in sequence
+
+        Args:
+            orders: Dictionaries with owner, side, amount, price and
+                optionally delivery_hour
+
+        Returns:
+            One submit() result per order
+        """
+        return [
+            self.submit(order['owner'], order['side'], order['amount'], order['price'], order.get('delivery_hour'))
+            for order in orders
+        ]
+
+    def _match(self, order: Order) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Trade an incoming order against the opposite side while prices cross
+
+        Returns:
+            The trades and whether matching stopped because on_trade
+            reported backpressure
+        """
+        book = self.books.get(order.delivery_hour)
+        if book is None:
+            return [], False
+
+        buying = order.side == BUY
+        opposite = book.asks if buying else book.bids
+        trades = []
+        while opposite and order.remaining > _EPSILON:
+            resting = opposite[0][2]
+            if resting.status != 'open':
+                heapq.heappop(opposite)
+                continue
+            if (buying and resting.price > order.price) or (not buying and resting.price < order.price):
+                break
+
+            # Self-trade prevention: the resting order is withdrawn
+            if resting.owner == order.owner:
+                heapq.heappop(opposite)
+                resting.status = 'cancelled'
+                del self.orders[resting.id]
+                continue
+
+            amount = min(order.remaining, resting.remaining)
+            seller, buyer = (resting.owner, order.owner) if buying else (order.owner, resting.owner)
+            try:
+                transaction = self.on_trade(seller, buyer, amount, resting.price)
+            except MempoolFullError:
+                # Nothing was settled for this fill; both orders keep their remainder
+                return trades, True
+            order.remaining -= amount
+            resting.remaining -= amount
+            trades.append({
+                'buy_order': order.id if buying else resting.id,
+                'sell_order': resting.id if buying else order.id,
+                'amount': amount,
+                'price': resting.price,
+                'transaction_id': transaction['id'] if transaction is not None else None
+            })
+
+            if resting.remaining <= _EPSILON:
+                heapq.heappop(opposite)
+                resting.status = 'filled'
+                del self.orders[resting.id]
+        return trades, False
+
+    def cancel(self, order_id: int) -> bool:
+        """Cancel a resting order; returns False if it is not in the book"""
+        with self._lock:
+            order = self.orders.pop(order_id, None)
+            if order is None:
+                return False
+            order.status = 'cancelled'
+            return True
+
+    def get_order(self, order_id: int) -> Optional[Dict[str, Any]]:
+        """Get a resting order by ID"""
+        order = self.orders.get(order_id)
+        return order.to_dict() if order else None
+
+    def depth(self, delivery_hour: Union[int, float, datetime, str, None] = None,
+              levels: int = 10) -> Dict[str, Any]:
+        """
+        Aggregated open amount per price level for a delivery hour
+
+        Returns:
+            Best `levels` bid and ask price levels, best first
+        """
+        if not isinstance(delivery_hour, int):
+            delivery_hour = delivery_hour_of(delivery_hour)
+
+        with self._lock:
+            book = self.books.get(delivery_hour)
+
+            def aggregate(entries, best_first):
+                totals = {}
+                for _, _, order in entries:
+                    if order.status == 'open':
+                        totals[order.price] = totals.get(order.price, 0.0) + order.remaining
+                prices = sorted(totals, reverse=best_first)[:levels]
+                return [{'price': price, 'amount': round(totals[price], 6)} for price in prices]
+
+            return {
+                'delivery_hour': delivery_hour,
+                'bids': aggregate(book.bids, True) if book else [],
+                'asks': aggregate(book.asks, False) if book else []
+            }
+
+def meter_orders(rows: Iterable[Dict[str, Any]], address_for: Callable[[str], Optional[str]],
+                 ask_price: float = 0.10, bid_price: float = 0.12) -> Iterator[Dict[str, Any]]:
+    """
+    Derive orders from household meter readings
+
+    Exported energy (grid_export, or solar_generation above consumption when
+    no export is recorded) becomes a sell order and grid_import a buy order,
+    for delivery in the hour of the reading.
+
+    Args:
+        rows: Readings with timestamp, household_id, consumption,
+            solar_generation, grid_import and grid_export (e.g. csv.DictReader rows)
+        address_for: Maps a household id to its trading address, or None to skip it
+        ask_price: Limit price of surplus sell orders
+        bid_price: Limit price of demand buy orders
+
+    Yields:
+        Order dictionaries for OrderBook.submit_many
+    """
+    for row in rows:
+        owner = address_for(str(row['household_id']))
+        if owner is None:
+            continue
+        delivery_hour = delivery_hour_of(str(row['timestamp']))
+
+        surplus = float(row.get('grid_export') or 0.0)
+        if not surplus:
+            surplus = max(float(row['solar_generation']) - float(row['consumption']), 0.0)
+        if surplus > 0:
+            yield {'owner': owner, 'side': SELL, 'amount': surplus, 'price': ask_price, 'delivery_hour': delivery_hour}
+
+        demand = float(row.get('grid_import') or 0.0)
+        if demand > 0:
+            yield {'owner': owner, 'side': BUY, 'amount': demand, 'price': bid_price, 'delivery_hour': delivery_hour}
+
+def read_meter_orders(path: str, address_for: Callable[[str], Optional[str]],
+                      ask_price: float = 0.10, bid_price: float = 0.12) -> Iterator[Dict[str, Any]]:
+    """Derive orders from a meter data CSV such as energy_data.csv"""
+    with open(path, newline='') as f:
+        yield from meter_orders(csv.DictReader(f), address_for, ask_price, bid_price)
@@ -0,0 +1,137 @@
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Transaction statuses and the default energy type; values stored on
+# transactions are interned so millions of them share one string object
+PENDING = 'pending'
+CONFIRMED = 'confirmed'
+SOLAR = 'solar'
+
+class Transaction:
+    """
+    Energy trading transaction
+
+    Stored with __slots__, a 16-byte binary id and interned address, type
+    and status strings. Supports dictionary-style access (tx['amount'],
+    tx['status'] = ...) so code written against the former dict
+    transactions keeps working; to_dict() returns the original layout.
+    """
+
+    __slots__ = ('key', 'sender', 'receiver', 'amount', 'price', 'total',
+                 'timestamp', 'energy_type', 'status')
+
+    # Dictionary keys in to_dict() order
+    FIELDS = ('id', 'sender', 'receiver', 'amount', 'price', 'total',
+              'timestamp', 'energy_type', 'status')
+
+    def __init__(self, key: bytes, sender: str, receiver: str, amount: float, price: float,
+                 total: float, timestamp: float, energy_type: str = SOLAR, status: str = PENDING):
+        """
+        Initialize a transaction
+
+        Args:
+            key: 16-byte transaction id
+            sender: Address of the energy seller
+            receiver: Address of the energy buyer
+            amount: Amount of energy in kWh
+            price: Price per kWh
+            total: Total value of the trade
+            timestamp: When the transaction occurred
+            energy_type: Type of energy traded
+            status: 'pending' or 'confirmed'
+        """
+        self.key = key
+        self.sender = sys.intern(sender)
+        self.receiver = sys.intern(receiver)
+        self.amount = amount
+        self.price = price
+        self.total = total
+        self.timestamp = timestamp
+        self.energy_type = sys.intern(energy_type)
+        self.status = sys.intern(status)
+
+    @classmethod
+    def create(cls, sender: str, receiver: str, amount: float, price: float,
+               timestamp: Optional[float] = None) -> 'Transaction':
+        """Create a new pending transaction with a random id"""
+        if timestamp is None:
+            timestamp = time.time()
+        return cls(uuid.uuid4().bytes, sender, receiver, amount, price,
+                   round(amount * price, 2), timestamp)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Transaction':
+        """Rebuild a transaction from to_dict() output"""
+        return cls(bytes.fromhex(data['id']), data['sender'], data['receiver'], data['amount'],
+                   data['price'], data['total'], data['timestamp'],
+                   data.get('energy_type', SOLAR), data.get('status', PENDING))
+
+    @property
+    def id(self) -> str:
+        """Transaction id as a 32-character hex string"""
+        return self.key.hex()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert transaction to dictionary"""
+        return {
+            'id': self.key.hex(),
+            'sender': self.sender,
+            'receiver': self.receiver,
+            'amount': self.amount,
+            'price': self.price,
+            'total': self.total,
+            'timestamp': self.timestamp,
+            'energy_type': self.energy_type,
+            'status': self.status
+        }
+
+    # Dictionary-style access for compatibility with dict transactions
+
+    def __getitem__(self, name: str) -> Any:
+        if name == 'id':
+            return self.key.hex()
+        if name not in self.FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        if name == 'id':
+            self.key = bytes.fromhex(value)
+        elif name in ('sender', 'receiver', 'energy_type', 'status'):
+            setattr(self, name, sys.intern(value))
+        elif name in self.FIELDS:
+            setattr(self, name, value)
+        else:
+            raise KeyError(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self[name] if name in self.FIELDS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.FIELDS
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Transaction):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Transaction({self.to_dict()!r})"
@@ -0,0 +1,345 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from utils import generate_time_features_array
+
+# Household CSV exports shipped with the client (repo/client/data)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'client', 'data')
+
+# Columnar cache next to this module (python-ml/data_cache)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_cache')
+
+# Known datasets by name
+DATASETS = {
+    'energy': 'energy_data.csv',
+    'water': 'water_data.csv',
+    'weather': 'weather_data.csv'
+}
+
+# Column renames that line a dataset up with the model target columns
+TRAINING_COLUMNS = {
+    'energy': {'solar_generation': 'solar_output'}
+}
+
+# Calendar feature columns derived from timestamps for training
+TIME_FEATURES = ('hour', 'month', 'day_of_week', 'is_weekend', 'is_day', 'season')
+
+# Bump when the on-disk layout changes so stale caches are rebuilt
+CACHE_FORMAT = 1
+
+# Rows parsed per CSV chunk while building a cache
+CHUNK_ROWS = 1 << 18
+
+def _column_kind(name, series):
+    """Storage kind of a CSV column: datetime, id, categorical or value"""
+    if name == 'timestamp':
+        return 'datetime'
+    if name == 'household_id' or name.endswith('_id'):
+        return 'id'
+    if series.dtype == object:
+        return 'categorical'
+    return 'value'
+
+class ColumnarDataset:
+    """
+    Typed, column-oriented view of a cached CSV dataset
+
+    Columns are NumPy arrays (memory-mapped read-only when loaded from the
+    cache): timestamps as datetime64[ns], ids as int32, measurements as
+    float32 and string columns as int16 codes into a category list (-1 for
+    missing values).
+    """
+
+    def __init__(self, columns, categories, manifest):
+        """
+        Initialize a dataset
+
+        Args:
+            columns: Dictionary of column name to NumPy array, in CSV order
+            categories: Dictionary of categorical column name to its categories
+            manifest: Cache manifest describing the source and schema
+        """
+        self.columns = columns
+        self.categories = categories
+        self.manifest = manifest
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __getitem__(self, name):
+        """Raw column array (codes for categorical columns)"""
+        return self.columns[name]
+
+    def column_names(self):
+        """Column names in CSV order"""
+        return list(self.columns)
+
+    def decode(self, name):
+        """Column as a pandas Categorical for categorical columns, else the raw array"""
+        if name in self.categories:
+            return pd.Categorical.from_codes(self.columns[name], categories=self.categories[name])
+        return self.columns[name]
+
+    def to_frame(self, columns=None):
+        """
+        Build a DataFrame from the cached columns
+
+        Args:
+            columns: Column names to include (default: all)
+
+        Returns:
+            DataFrame with categorical string columns
+        """
+        return pd.DataFrame({name: self.decode(name) for name in (columns or self.columns)})
+
+def _source_path(name, data_dir=None):
+    """CSV path of a known dataset name or an explicit path"""
+    if name in DATASETS:
+        return os.path.join(data_dir or DATA_DIR, DATASETS[name])
+    return name
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _read_manifest(cache_path):
+    path = os.path.join(cache_path, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _is_fresh(manifest, source):
+    """Whether a cache manifest matches the current source file"""
+    if manifest is None or manifest.get('format') != CACHE_FORMAT:
+        return False
+    if not os.path.exists(source):
+        # Source not shipped (e.g. a deployed cache); trust the cache
+        return True
+    stat = _source_stat(source)
+    return manifest['size'] == stat['size'] and manifest['mtime_ns'] == stat['mtime_ns']
+
+def _write_columns(source, directory, chunk_rows):
+    """
+    Parse a CSV chunk by chunk into one typed .npy file per column
+
+    Each chunk is appended to a raw per-column file, so memory use is
+    bounded by the chunk size rather than the CSV size.
+
+    Returns:
+        Tuple of (rows, kinds, dtypes, categories)
+    """
+    kinds = {}
+    dtypes = {}
+    lookups = {}
+    raw_files = {}
+    rows = 0
+    try:
+        for chunk in pd.read_csv(source, chunksize=chunk_rows):
+            if not kinds:
+                kinds = {name: _column_kind(name, chunk[name]) for name in chunk.columns}
+                lookups = {name: {} for name, kind in kinds.items() if kind == 'categorical'}
+                raw_files = {name: open(os.path.join(directory, f'{name}.raw'), 'wb') for name in chunk.columns}
+
+            for name, kind in kinds.items():
+                series = chunk[name]
+                if kind == 'datetime':
+                    values = pd.to_datetime(series, format='ISO8601').to_numpy('datetime64[ns]')
+                elif kind == 'id':
+                    values = series.to_numpy(np.int32)
+                elif kind == 'categorical':
+                    # Factorize the chunk, then map its local codes to global ones
+                    codes, uniques = pd.factorize(series)
+                    lookup = lookups[name]
+                    mapping = np.array([lookup.setdefault(value, len(lookup)) for value in uniques] + [-1], dtype=np.int64)
+                    if len(lookup) > np.iinfo(np.int16).max:
+                        raise ValueError(f"Column '{name}' of {source} has too many distinct values to be categorical")
+                    values = mapping[codes].astype(np.int16)
+                else:
+                    values = series.to_numpy(np.float32)
+                dtypes[name] = values.dtype
+                values.tofile(raw_files[name])
+            rows += len(chunk)
+    finally:
+        for f in raw_files.values():
+            f.close()
+
+    if not kinds:
+        raise ValueError(f"{source} has no rows")
+
+    # Prefix each raw file with an .npy header now that the row count is known
+    for name, dtype in dtypes.items():
+        raw_path = os.path.join(directory, f'{name}.raw')
+        header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (rows,)}
+        with open(os.path.join(directory, f'{name}.npy'), 'wb') as out, open(raw_path, 'rb') as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(raw, out, 1 << 20)
+        os.remove(raw_path)
+
+    categories = {name: list(lookup) for name, lookup in lookups.items()}
+    return rows, kinds, dtypes, categories
+
+def build_cache(name, data_dir=None, cache_dir=None, chunk_rows=CHUNK_ROWS):
+    """
+    Parse a dataset CSV and write its columnar cache
+
+    The CSV is parsed in chunks of chunk_rows rows, and the cache is
+    written to a temp directory and renamed into place, so readers only
+    ever see a complete cache.
+
+    Args:
+        name: Dataset name ('energy', 'water', 'weather') or CSV path
+        data_dir: Directory holding the named CSVs (default: client/data)
+        cache_dir: Cache root (default: python-ml/data_cache)
+        chunk_rows: Rows parsed per CSV chunk
+
+    Returns:
+        Path of the dataset's cache directory
+    """
+    source = _source_path(name, data_dir)
+    stat = _source_stat(source)
+    cache_root = cache_dir or CACHE_DIR
+    os.makedirs(cache_root, exist_ok=True)
+    cache_path = os.path.join(cache_root, os.path.splitext(os.path.basename(source))[0])
+
+    tmp_dir = tempfile.mkdtemp(dir=cache_root, prefix='.tmp-')
+    try:
+        rows, kinds, dtypes, categories = _write_columns(source, tmp_dir, chunk_rows)
+
+        manifest = {
+            'format': CACHE_FORMAT,
+            'source': os.path.abspath(source),
+            'size': stat['size'],
+            'mtime_ns': stat['mtime_ns'],
+            'rows': rows,
+            'columns': [
+                {'name': column, 'kind': kinds[column], 'dtype': str(dtype)}
+                for column, dtype in dtypes.items()
+            ],
+            'categories': categories,
+            'created_at': datetime.now().isoformat()
+        }
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Move the previous cache aside, then rename the new one into place
+        if os.path.exists(cache_path):
+            stale_dir = tempfile.mkdtemp(dir=cache_root, prefix='.stale-')
+            os.replace(cache_path, os.path.join(stale_dir, 'cache'))
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return cache_path
+
+def load_dataset(name, data_dir=None, cache_dir=None, mmap=True, refresh=False):
+    """
+    Load a dataset from its columnar cache, (re)building it if the CSV changed
+
+    Args:
+        name: Dataset name ('energy', 'water', 'weather') or CSV path
+        data_dir: Directory holding the named CSVs (default: client/data)
+        cache_dir: Cache root (default: python-ml/data_cache)
+        mmap: Memory-map the column files read-only instead of reading them
+        refresh: Rebuild the cache even if it is up to date
+
+    Returns:
+        ColumnarDataset
+    """
+    source = _source_path(name, data_dir)
+    cache_path = os.path.join(cache_dir or CACHE_DIR, os.path.splitext(os.path.basename(source))[0])
+
+    manifest = None if refresh else _read_manifest(cache_path)
+    if not _is_fresh(manifest, source):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Dataset source {source} not found")
+        build_cache(name, data_dir, cache_dir)
+        manifest = _read_manifest(cache_path)
+
+    mmap_mode = 'r' if mmap else None
+    columns = {
+        column['name']: np.load(os.path.join(cache_path, f"{column['name']}.npy"), mmap_mode=mmap_mode)
+        for column in manifest['columns']
+    }
+    return ColumnarDataset(columns, manifest['categories'], manifest)
+
+def _training_columns(dataset, name, columns, rows=slice(None)):
+    """Training DataFrame for a row range: renamed columns plus time features"""
+    renames = TRAINING_COLUMNS.get(name, {})
+    sources = {renames.get(column, column): column for column in dataset.columns}
+    frame = {}
+    time_features = None
+    for column in columns:
+        if column in sources:
+            source_column = sources[column]
+            if source_column in dataset.categories:
+                frame[column] = pd.Categorical.from_codes(
+                    dataset[source_column][rows], categories=dataset.categories[source_column]
+                )
+            else:
+                # Copy the slice out of the memory-mapped file
+                frame[column] = np.array(dataset[source_column][rows])
+        else:
+            # Calendar features are derived from the timestamps
+            if time_features is None:
+                time_features = generate_time_features_array(dataset['timestamp'][rows])
+            if column not in time_features:
+                raise ValueError(f"Unknown column '{column}' for dataset {name}")
+            frame[column] = time_features[column]
+    return pd.DataFrame(frame)
+
+def _default_training_columns(dataset, name):
+    """All dataset columns under their training names, plus time features"""
+    columns = [TRAINING_COLUMNS.get(name, {}).get(column, column) for column in dataset.columns]
+    if 'timestamp' in dataset.columns:
+        columns += list(TIME_FEATURES)
+    return columns
+
+def training_frame(name, data_dir=None, cache_dir=None, columns=None):
+    """
+    Training DataFrame for a dataset: its columns plus time features
+
+    Columns are renamed to the model target names (e.g. solar_generation
+    becomes solar_output for the energy model) and the calendar features
+    of generate_time_features_array are derived from the timestamps.
+
+    Args:
+        name: Dataset name ('energy', 'water', 'weather') or CSV path
+        data_dir: Directory holding the named CSVs (default: client/data)
+        cache_dir: Cache root (default: python-ml/data_cache)
+        columns: Columns to include (default: all dataset and time feature columns)
+
+    Returns:
+        DataFrame ready for the matching model's train()
+    """
+    dataset = load_dataset(name, data_dir, cache_dir)
+    columns = columns or _default_training_columns(dataset, name)
+    return _training_columns(dataset, name, columns)
+
+def iter_training_frames(name, chunk_rows=CHUNK_ROWS, columns=None, data_dir=None, cache_dir=None):
+    """
+    Yield training DataFrames over a dataset chunk by chunk
+
+    Rows are read from the memory-mapped cache, so only one chunk and its
+    features are held in memory at a time (e.g. for BaseModel.train_streaming).
+
+    Args:
+        name: Dataset name ('energy', 'water', 'weather') or CSV path
+        chunk_rows: Rows per yielded frame
+        columns: Columns to include (default: all dataset and time feature columns)
+        data_dir: Directory holding the named CSVs (default: client/data)
+        cache_dir: Cache root (default: python-ml/data_cache)
+
+    Yields:
+        DataFrames in the format of training_frame()
+    """
+    dataset = load_dataset(name, data_dir, cache_dir)
+    columns = columns or _default_training_columns(dataset, name)
+    for start in range(0, len(dataset), chunk_rows):
+        yield _training_columns(dataset, name, columns, slice(start, start + chunk_rows))
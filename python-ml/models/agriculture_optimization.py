@@ -3,10 +3,13 @@ import pandas as pd
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from .base_model import BaseModel
-from ..utils import generate_time_features, save_model_data
+from utils import generate_time_features_array
+
+# Columns the moisture model is fitted on
+FEATURES = ['hour', 'temperature', 'is_day', 'season', 'is_weekend']
 
 class IrrigationOptimizationModel(BaseModel):
     """ML model for optimizing irrigation schedules based on soil conditions"""
@@ -16,20 +19,14 @@ class IrrigationOptimizationModel(BaseModel):
         self.scaler = StandardScaler()
         
     def preprocess(self, data):
-        """Transform raw data into features for irrigation optimization"""
-        # Select relevant features
-        features = ['hour', 'temperature', 'is_day', 'season', 'is_weekend']
-        
+        """Transform raw data into features for irrigation optimization (does not modify the model)"""
         # Ensure all required features exist
-        for feature in features:
+        for feature in FEATURES:
             if feature not in data.columns and feature != 'temperature':
                 raise ValueError(f"Required feature '{feature}' not found in data")
                 
         # Combine time features with other variables
-        X = data[features].copy()
-        
-        if self.feature_columns is None:
-            self.feature_columns = features
+        X = data[FEATURES].copy()
             
         # Return features and target if available
         if self.target_column in data.columns:
@@ -50,6 +47,7 @@ class IrrigationOptimizationModel(BaseModel):
         )
         
         model.fit(X, y)
+        self.feature_columns = FEATURES
         self.model = model
         
         # Calculate performance metrics
@@ -68,36 +66,33 @@ class IrrigationOptimizationModel(BaseModel):
         }
         self.metadata['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        save_model_data(self.name, self.metadata)
         return self.metadata['performance']
     
     def predict(self, input_data):
         """Predict soil moisture levels based on input conditions"""
-        if self.model is None:
+        if not self.is_trained:
             raise ValueError("Model not trained or loaded")
             
         # Handle dictionary input
         if isinstance(input_data, dict):
-            time_features = {}
             if 'datetime' in input_data:
                 dt = datetime.fromisoformat(input_data['datetime'])
-                time_features = generate_time_features(dt)
             else:
                 # Use current time
-                time_features = generate_time_features(datetime.now())
+                dt = datetime.now()
+            time_features = generate_time_features_array([dt])
                 
             # Combine with other inputs
-            input_dict = {**time_features, **input_data}
-            
-            # Create DataFrame from dict
-            input_df = pd.DataFrame([input_dict])
+            input_df = pd.DataFrame(time_features).assign(**{
+                key: [value] for key, value in input_data.items() if key != 'datetime'
+            })
             X = input_df[self.feature_columns]
         else:
             # Process DataFrame input
             X = self.preprocess(input_data)
             
         # Make predictions
-        predictions = self.model.predict(X)
+        predictions = self._model_predict(X)
         
         # For single predictions, return a scalar
         if len(predictions) == 1:
@@ -105,90 +100,112 @@ class IrrigationOptimizationModel(BaseModel):
         
         return predictions
     
-    def calculate_optimal_irrigation(self, current_soil_moisture, temperature, timestamp=None):
-        """Calculate optimal irrigation duration based on current conditions"""
-        if timestamp is None:
-            timestamp = datetime.now()
+    def warm_up(self):
+        """Plan irrigation for one reading through the batch path"""
+        super().warm_up()
+        self.calculate_optimal_irrigation_batch([40.0], [25.0], [datetime.now()])
+    
+    def calculate_optimal_irrigation_batch(self, soil_moistures, temperatures, timestamps):
+        """
+        Calculate irrigation plans for many readings
+        
+        Time features, the irrigation math and the soil moisture prediction
+        are computed over whole columns; only the response dicts are built
+        per reading.
+        
+        Returns:
+            One plan per reading, in the format of calculate_optimal_irrigation
+        """
+        if not (len(soil_moistures) == len(temperatures) == len(timestamps)):
+            raise ValueError("soil_moistures, temperatures and timestamps must have the same length")
             
+        if len(soil_moistures) == 0:
+            return []
+            
+        moisture = np.asarray(soil_moistures, dtype=float)
+        temperature = np.asarray(temperatures, dtype=float)
+        time_features = generate_time_features_array(timestamps)
+        is_day = time_features['is_day'] == 1
+        summer = time_features['season'] == 2
+        
         # Optimal soil moisture target (45-55%)
         target_moisture = 50
         
         # Current moisture deficit
-        moisture_deficit = max(0, target_moisture - current_soil_moisture)
+        moisture_deficit = np.maximum(0, target_moisture - moisture)
         
         # Base irrigation rate (% moisture increase per minute of irrigation)
         base_rate = 0.8
         
         # Adjust rate based on temperature (higher temp = faster evaporation)
-        temp_factor = 1.0 + (temperature - 25) * 0.02 if temperature > 25 else 1.0
+        temp_factor = np.where(temperature > 25, 1.0 + (temperature - 25) * 0.02, 1.0)
         
         # Time of day adjustment (less effective during hot daytime)
-        time_features = generate_time_features(timestamp)
-        time_factor = 0.8 if time_features['is_day'] and temperature > 28 else 1.2 if not time_features['is_day'] else 1.0
+        time_factor = np.where(is_day & (temperature > 28), 0.8, np.where(~is_day, 1.2, 1.0))
         
         # Season adjustment
-        season_factor = 1.2 if time_features['season'] == 2 else 1.0  # More in summer
+        season_factor = np.where(summer, 1.2, 1.0)  # More in summer
         
         # Calculate minutes needed to reach target moisture
-        irrigation_minutes = moisture_deficit / (base_rate * time_factor * season_factor / temp_factor)
+        rate = base_rate * time_factor * season_factor / temp_factor
+        irrigation_minutes = moisture_deficit / rate
         
         # Future moisture prediction after irrigation
-        future_moisture = current_soil_moisture + (irrigation_minutes * base_rate * time_factor * season_factor / temp_factor)
-        
-        # Round to nearest minute with a minimum of 0
-        irrigation_minutes = max(0, round(irrigation_minutes))
-        
-        # Create irrigation zones (North, East, South)
-        zones = []
-        
-        # Customize for each zone based on their conditions
-        # North zone (slightly cooler, more shade)
-        north_minutes = max(0, round(irrigation_minutes * 0.9))
-        zones.append({
-            "id": "zone1",
-            "name": "North Field Zone",
-            "active": north_minutes > 0,
-            "duration": f"{north_minutes} min"
-        })
-        
-        # East zone (more sun exposure)
-        east_minutes = max(0, round(irrigation_minutes * 1.1))
-        zones.append({
-            "id": "zone2",
-            "name": "East Field Zone",
-            "active": east_minutes > 0,
-            "duration": f"{east_minutes} min"
-        })
-        
-        # South zone (standard conditions)
-        south_minutes = irrigation_minutes
-        zones.append({
-            "id": "zone3",
-            "name": "South Field Zone",
-            "active": south_minutes > 0,
-            "duration": f"{south_minutes} min"
-        })
-        
-        # Generate recommendations
-        recommendations = [
-            f"Optimal irrigation time: {irrigation_minutes} minutes to reach target soil moisture.",
-            f"Expected soil moisture after irrigation: {round(future_moisture)}%."
-        ]
-        
-        if temperature > 30:
-            recommendations.append("High temperature detected. Consider irrigating during early morning or evening for better efficiency.")
-        
-        if time_features['season'] == 2:  # Summer
-            recommendations.append("Summer season detected. Consider increasing irrigation frequency and monitoring evaporation rates.")
+        future_moisture = moisture + irrigation_minutes * rate
+        
+        # Round to nearest minute with a minimum of 0 (round half to even, like round())
+        irrigation_minutes = np.maximum(0, np.round(irrigation_minutes)).astype(int)
+        
+        # Zone durations: North slightly cooler and shadier, East more sun, South standard
+        north_minutes = np.maximum(0, np.round(irrigation_minutes * 0.9)).astype(int)
+        east_minutes = np.maximum(0, np.round(irrigation_minutes * 1.1)).astype(int)
+        
+        # Predicted soil moisture for every reading in a single model call
+        predicted = None
+        if self.is_trained:
+            input_df = pd.DataFrame(time_features)
+            input_df['temperature'] = temperature
+            predicted = np.atleast_1d(self._model_predict(input_df[self.feature_columns])).tolist()
+            
+        results = []
+        rows = zip(
+            moisture.tolist(), temperature.tolist(), summer.tolist(), moisture_deficit.tolist(),
+            future_moisture.tolist(), irrigation_minutes.tolist(), north_minutes.tolist(), east_minutes.tolist()
+        )
+        for i, (current, temp, is_summer, deficit, future, minutes, north, east) in enumerate(rows):
+            zones = [
+                {"id": "zone1", "name": "North Field Zone", "active": north > 0, "duration": f"{north} min"},
+                {"id": "zone2", "name": "East Field Zone", "active": east > 0, "duration": f"{east} min"},
+                {"id": "zone3", "name": "South Field Zone", "active": minutes > 0, "duration": f"{minutes} min"}
+            ]
+            
+            # Generate recommendations
+            recommendations = [
+                f"Optimal irrigation time: {minutes} minutes to reach target soil moisture.",
+                f"Expected soil moisture after irrigation: {round(future)}%."
+            ]
+            if temp > 30:
+                recommendations.append("High temperature detected. Consider irrigating during early morning or evening for better efficiency.")
+            if is_summer:
+                recommendations.append("Summer season detected. Consider increasing irrigation frequency and monitoring evaporation rates.")
+                
+            result = {
+                "zones": zones,
+                "recommendation": " ".join(recommendations),
+                "moisture_deficit": round(deficit, 1),
+                "current_moisture": round(current, 1),
+                "target_moisture": target_moisture,
+                "expected_moisture": round(future, 1)
+            }
+            if predicted is not None:
+                result['predicted_moisture'] = round(predicted[i], 1)
+            results.append(result)
+            
+        return results
+    
+    def calculate_optimal_irrigation(self, current_soil_moisture, temperature, timestamp=None):
+        """Calculate optimal irrigation duration based on current conditions"""
+        if timestamp is None:
+            timestamp = datetime.now()
             
-        # Generate a single recommendation string
-        recommendation = " ".join(recommendations)
-        
-        return {
-            "zones": zones,
-            "recommendation": recommendation,
-            "moisture_deficit": round(moisture_deficit, 1),
-            "current_moisture": round(current_soil_moisture, 1),
-            "target_moisture": target_moisture,
-            "expected_moisture": round(future_moisture, 1)
-        }
\ No newline at end of file
+        return self.calculate_optimal_irrigation_batch([current_soil_moisture], [temperature], [timestamp])[0]
@@ -1,22 +1,32 @@
-import os
-import json
-import pickle
+import threading
+import uuid
 import numpy as np
 from datetime import datetime
 
+from .compiled_ensemble import CompiledEnsemble
+from .model_store import default_store
+from .sampling import ReservoirSampler
+
 class BaseModel:
     """Base class for all ML models in the system"""
     
-    def __init__(self, name, target_column=None):
+    # Largest batch served by the compiled predictor; beyond this sklearn's
+    # per-tree C loops are faster than the vectorized walk
+    compiled_batch_limit = 256
+    
+    def __init__(self, name, target_column=None, store=None):
         """
         Initialize a base model
         
         Args:
             name: Unique name for the model
             target_column: Name of the target column in the data
+            store: ModelStore holding saved versions (default: shared store)
         """
         self.name = name
         self.target_column = target_column
+        self.store = store or default_store
+        self._load_lock = threading.Lock()
         self.model = None
         self.feature_columns = None
         self.metadata = {
@@ -27,6 +37,89 @@ class BaseModel:
             'performance': {}
         }
     
+    def __getstate__(self):
+        """Pickle everything but the process-local lazy-load lock"""
+        state = self.__dict__.copy()
+        state.pop('_load_lock', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_lock = threading.Lock()
+    
+    @property
+    def model(self):
+        """The underlying estimator, deserialized on first access after load()"""
+        model = self._model
+        if model is None and self._model_loader is not None:
+            # Only the first access after load() takes the lock
+            with self._load_lock:
+                if self._model is None and self._model_loader is not None:
+                    self._model = self._model_loader()
+                    self._model_loader = None
+                model = self._model
+        return model
+    
+    @model.setter
+    def model(self, model):
+        """Replace the estimator, giving it a new version identifier"""
+        self._model = model
+        self._model_loader = None
+        self.version = uuid.uuid4().hex[:12] if model is not None else None
+        self.export_compiled()
+    
+    @property
+    def is_trained(self):
+        """Whether an estimator is available, without forcing a lazy load"""
+        return self._model is not None or self._model_loader is not None
+    
+    def export_compiled(self):
+        """
+        Flatten the trained ensemble into contiguous arrays for fast inference
+        
+        Leaves self.compiled as None when the estimator type is not supported,
+        in which case predictions fall back to sklearn.
+        """
+        self.compiled = None
+        if self._model is not None:
+            try:
+                self.compiled = CompiledEnsemble.from_estimator(self._model)
+            except Exception as e:
+                print(f"Could not compile model {self.name}: {e}")
+        return self.compiled
+    
+    def _use_compiled(self, X):
+        """Whether the compiled predictor should serve this input"""
+        return self.compiled is not None and len(X) <= self.compiled_batch_limit
+    
+    def _model_predict(self, X):
+        """Estimator predict, via the compiled ensemble for small batches"""
+        if self._use_compiled(X):
+            return self.compiled.predict(X)
+        return self.model.predict(X)
+    
+    def _model_decision_function(self, X):
+        """Estimator decision_function, via the compiled ensemble for small batches"""
+        if self._use_compiled(X):
+            return self.compiled.decision_function(X)
+        return self.model.decision_function(X)
+    
+    def preprocessing_arrays(self):
+        """
+        Fitted preprocessing state to persist with the estimator
+        
+        Subclasses with fitted transforms return them as NumPy arrays
+        """
+        return {}
+    
+    def restore_preprocessing(self, arrays):
+        """
+        Restore fitted preprocessing state from the arrays of a saved version
+        
+        Subclasses with fitted transforms override this
+        """
+        pass
+    
     def preprocess(self, data):
         """
         Preprocess data before training or prediction
@@ -43,6 +136,35 @@ class BaseModel:
         """
         pass
     
+    def train_streaming(self, chunks, sample_size=200000, seed=42, stratify=None):
+        """
+        Train on a stream of DataFrame chunks in bounded memory
+        
+        The tree ensembles cannot be updated incrementally, so every chunk is
+        folded into a uniform reservoir sample and the model is trained on
+        that sample once the stream is exhausted.
+        
+        Args:
+            chunks: Iterable of DataFrames in the format train() expects
+            sample_size: Rows kept for training (per stratum when stratifying)
+            seed: Seed for reproducible sampling
+            stratify: Column to sample each value of separately (e.g. 'household_id')
+        
+        Returns:
+            The result of train() on the sample
+        """
+        sampler = ReservoirSampler(sample_size, seed, stratify)
+        for chunk in chunks:
+            sampler.add(chunk)
+        if not sampler.seen:
+            raise ValueError("No training data in stream")
+            
+        sample = sampler.sample()
+        result = self.train(sample)
+        self.metadata['training_rows'] = sampler.seen
+        self.metadata['sample_rows'] = len(sample)
+        return result
+    
     def predict(self, input_data):
         """
         Make predictions using the trained model
@@ -51,62 +173,92 @@ class BaseModel:
         """
         pass
     
+    def warm_up(self):
+        """
+        Run a representative prediction so the first request does not pay
+        for page faults on the mapped arrays
+        
+        Only the compiled path is touched; the sklearn estimator stays on
+        disk unless the model has no compiled form. Subclasses extend this
+        with a prediction on their own input types.
+        """
+        if self.compiled is not None:
+            self.compiled.predict(np.zeros((1, self.compiled.n_features)))
+        elif self.is_trained:
+            self.model
+    
     def save(self):
-        """Save the model and its metadata to disk"""
-        if self.model is None:
+        """Save the model and its metadata as a new version in the model store"""
+        if not self.is_trained:
             raise ValueError("Cannot save model that has not been trained")
             
-        # Ensure directory exists
-        os.makedirs('python-ml/models/saved', exist_ok=True)
+        version_dir = self.store.version_dir(self.name, self.version)
+        paths = {
+            'model_path': f'{version_dir}/estimator.pkl',
+            'metadata_path': f'{version_dir}/metadata.json'
+        }
         
+        # Versions are immutable; saving an unchanged model is a no-op
+        if self.store.has_version(self.name, self.version):
+            return paths
+            
         # Update metadata
         self.metadata['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Save model using pickle
-        model_path = f'python-ml/models/saved/{self.name}_model.pkl'
-        with open(model_path, 'wb') as f:
-            pickle.dump(self.model, f)
+        self.metadata['version'] = self.version
             
         # Save feature columns if they exist
         if self.feature_columns is not None:
             self.metadata['feature_columns'] = list(self.feature_columns)
             
-        # Save metadata as JSON
-        metadata_path = f'python-ml/models/saved/{self.name}_metadata.json'
-        with open(metadata_path, 'w') as f:
-            json.dump(self.metadata, f, indent=2)
+        # Compiled node arrays are stored separately so they can be memory-mapped
+        arrays = {}
+        if self.compiled is not None:
+            arrays = {f'compiled_{key}': value for key, value in self.compiled.arrays().items()}
+            self.metadata['compiled'] = self.compiled.params()
+        else:
+            self.metadata.pop('compiled', None)
+        arrays.update(self.preprocessing_arrays())
             
-        return {
-            'model_path': model_path,
-            'metadata_path': metadata_path
-        }
+        self.store.save(self.name, self.version, estimator=self.model, arrays=arrays, metadata=self.metadata)
+        return paths
     
-    def load(self):
-        """Load the model and its metadata from disk"""
-        model_path = f'python-ml/models/saved/{self.name}_model.pkl'
-        metadata_path = f'python-ml/models/saved/{self.name}_metadata.json'
+    def load(self, version=None):
+        """
+        Load a saved version (default: the store's current version)
         
-        # Check if files exist
-        if not os.path.exists(model_path) or not os.path.exists(metadata_path):
-            print(f"Could not find saved model files for {self.name}")
-            return False
-            
+        Compiled node arrays are memory-mapped read-only and the sklearn
+        estimator is only deserialized when a prediction path needs it.
+        """
         try:
-            # Load model
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
+            loaded = self.store.load(self.name, version)
+            if loaded is None:
+                print(f"Could not find saved model files for {self.name}")
+                return False
+            metadata, arrays, load_estimator = loaded
+            
+            # Defer unpickling the estimator until it is first used
+            self._model = None
+            self._model_loader = load_estimator
+            self.metadata = metadata
+            self.version = metadata['version']
+            
+            # Rebuild the compiled ensemble on top of the mapped arrays
+            self.compiled = None
+            if 'compiled' in metadata:
+                compiled_arrays = {
+                    key[len('compiled_'):]: value for key, value in arrays.items() if key.startswith('compiled_')
+                }
+                self.compiled = CompiledEnsemble.from_arrays(compiled_arrays, metadata['compiled'])
                 
-            # Load metadata
-            with open(metadata_path, 'r') as f:
-                self.metadata = json.load(f)
+            self.restore_preprocessing(arrays)
                 
             # Restore feature columns if they exist in metadata
             if 'feature_columns' in self.metadata:
                 self.feature_columns = self.metadata['feature_columns']
                 
-            print(f"Successfully loaded model {self.name}")
+            print(f"Successfully loaded model {self.name} version {self.version}")
             return True
             
         except Exception as e:
             print(f"Error loading model {self.name}: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,200 @@
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, IsolationForest, RandomForestRegressor
+
+def _average_path_length(n_samples):
+    """Average path length of an unsuccessful BST search over n samples (as in IsolationForest)"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    large = n_samples > 2
+    n = n_samples[large]
+    result[large] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return result
+
+def _node_depths(tree):
+    """Depth of every node of a fitted sklearn tree"""
+    depths = np.zeros(tree.node_count, dtype=np.int32)
+    frontier = np.array([0])
+    depth = 0
+    while len(frontier):
+        depths[frontier] = depth
+        children = np.concatenate([tree.children_left[frontier], tree.children_right[frontier]])
+        frontier = children[children != -1]
+        depth += 1
+    return depths
+
+class CompiledEnsemble:
+    """
+    Tree ensemble flattened into contiguous NumPy arrays
+
+    All trees share one set of node arrays (feature, threshold, children,
+    value). Leaves point to themselves, so a batch is evaluated by walking
+    every (row, tree) pair max_depth steps with vectorized gathers.
+    """
+
+    def __init__(self, kind, feature, threshold, children, value, roots, max_depth,
+                 n_features, feature_names=None, scale=1.0, bias=0.0, offset=0.0):
+        """
+        Initialize a compiled ensemble
+
+        Args:
+            kind: 'mean' (random forest), 'sum' (gradient boosting) or 'isolation'
+            feature, threshold, value: Flattened node arrays
+            children: (2, n_nodes) array of left and right child indices
+            roots: Root node index of each tree
+            max_depth: Deepest leaf across all trees
+            n_features: Number of input features
+            feature_names: Training column order, if fitted on a DataFrame
+            scale, bias: Output transform (value * scale + bias)
+            offset: Isolation forest decision offset
+        """
+        self.kind = kind
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.feature_names = feature_names
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self.offset = float(offset)
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """Flatten a fitted ensemble, or return None if it is not supported"""
+        if isinstance(estimator, RandomForestRegressor):
+            trees = [tree.tree_ for tree in estimator.estimators_]
+            if estimator.n_outputs_ != 1:
+                return None
+            return cls._flatten(estimator, trees, 'mean', scale=1.0 / len(trees))
+
+        if isinstance(estimator, GradientBoostingRegressor):
+            if estimator.init_ == 'zero':
+                bias = 0.0
+            elif hasattr(estimator.init_, 'constant_'):
+                bias = float(np.ravel(estimator.init_.constant_)[0])
+            else:
+                return None
+            trees = [tree.tree_ for tree in estimator.estimators_[:, 0]]
+            return cls._flatten(estimator, trees, 'sum', scale=estimator.learning_rate, bias=bias)
+
+        if isinstance(estimator, IsolationForest):
+            trees = [tree.tree_ for tree in estimator.estimators_]
+            features = estimator.estimators_features_
+            denominator = len(trees) * _average_path_length([estimator.max_samples_])[0]
+            return cls._flatten(estimator, trees, 'isolation', scale=1.0 / denominator,
+                                offset=estimator.offset_, tree_features=features)
+
+        return None
+
+    @classmethod
+    def _flatten(cls, estimator, trees, kind, scale=1.0, bias=0.0, offset=0.0, tree_features=None):
+        """Concatenate per-tree node arrays into one flat node table"""
+        sizes = [tree.node_count for tree in trees]
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        total = int(sum(sizes))
+
+        feature = np.zeros(total, dtype=np.int32)
+        threshold = np.full(total, np.inf, dtype=np.float64)
+        children = np.empty((2, total), dtype=np.int32)
+        value = np.empty(total, dtype=np.float64)
+        max_depth = 0
+
+        for i, (tree, start) in enumerate(zip(trees, starts)):
+            nodes = slice(start, start + tree.node_count)
+            own = np.arange(start, start + tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves; splits point to offset children
+            children[0, nodes] = np.where(is_leaf, own, tree.children_left + start)
+            children[1, nodes] = np.where(is_leaf, own, tree.children_right + start)
+            tree_feature = np.where(is_leaf, 0, tree.feature)
+            if tree_features is not None:
+                tree_feature = np.asarray(tree_features[i])[tree_feature]
+            feature[nodes] = tree_feature
+            threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+
+            depths = _node_depths(tree)
+            max_depth = max(max_depth, int(depths.max()))
+            if kind == 'isolation':
+                # Path length to the leaf plus the expected remaining depth
+                value[nodes] = depths + _average_path_length(tree.n_node_samples)
+            else:
+                value[nodes] = tree.value[:, 0, 0]
+
+        feature_names = getattr(estimator, 'feature_names_in_', None)
+        return cls(kind, feature, threshold, children, value, starts, max_depth,
+                   estimator.n_features_in_,
+                   feature_names=list(feature_names) if feature_names is not None else None,
+                   scale=scale, bias=bias, offset=offset)
+
+    def arrays(self):
+        """Node arrays keyed by name, e.g. for persisting"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'value': self.value,
+            'roots': self.roots
+        }
+
+    def params(self):
+        """Scalar parameters needed to rebuild the ensemble from its arrays"""
+        return {
+            'kind': self.kind,
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'feature_names': self.feature_names,
+            'scale': self.scale,
+            'bias': self.bias,
+            'offset': self.offset
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        """Rebuild an ensemble from arrays() and params() output (arrays may be memory-mapped)"""
+        return cls(
+            params['kind'], arrays['feature'], arrays['threshold'], arrays['children'],
+            arrays['value'], arrays['roots'], params['max_depth'], params['n_features'],
+            feature_names=params.get('feature_names'), scale=params['scale'],
+            bias=params['bias'], offset=params['offset']
+        )
+
+    def _as_matrix(self, X):
+        """Convert input to a float matrix in training column order"""
+        if self.feature_names is not None and hasattr(X, 'columns'):
+            X = X[self.feature_names]
+        # Trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+        return X
+
+    def _leaf_sum(self, X):
+        """Sum of leaf values across trees for every row"""
+        X = self._as_matrix(X)
+        flat_X = X.ravel()
+        row_offset = (np.arange(len(X)) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_right = ~(flat_X[row_offset + self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[go_right.astype(np.intp), nodes]
+        return self.value[nodes].sum(axis=1)
+
+    def predict(self, X):
+        """Predict like the source estimator (labels for isolation forests)"""
+        if self.kind == 'isolation':
+            return np.where(self.decision_function(X) < 0, -1, 1)
+        return self._leaf_sum(X) * self.scale + self.bias
+
+    def score_samples(self, X):
+        """Isolation forest anomaly score (lower is more abnormal)"""
+        if self.kind != 'isolation':
+            raise ValueError("score_samples is only defined for isolation forests")
+        return -(2.0 ** (-self._leaf_sum(X) * self.scale))
+
+    def decision_function(self, X):
+        """Isolation forest decision function (negative for anomalies)"""
+        return self.score_samples(X) - self.offset
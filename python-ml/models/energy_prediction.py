@@ -6,15 +6,20 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from datetime import datetime, timedelta
 
 from .base_model import BaseModel
-from ..utils import generate_time_features, generate_solar_output
+from .prediction_cache import PredictionCache
+from utils import generate_time_features_array, generate_solar_output_array
 
 class EnergyPredictionModel(BaseModel):
     """ML model for predicting solar energy production"""
     
-    def __init__(self):
+    def __init__(self, cache_size=4096, cache_ttl=3600):
         super().__init__("energy_prediction", "solar_output")
         self.scaler = StandardScaler()
         
+        # Features are purely calendar-derived, so predictions per feature
+        # tuple are deterministic for a given model version
+        self.cache = PredictionCache(cache_size, cache_ttl)
+        
     def preprocess(self, data):
         """Transform raw data into features for solar output prediction"""
         # Select relevant features
@@ -30,9 +35,10 @@ class EnergyPredictionModel(BaseModel):
                 return X, y
             return X
         else:
-            # Generate time features from datetime
-            time_features = generate_time_features(data)
-            return pd.DataFrame([time_features])[features]
+            # Generate time features from a datetime or a column of datetimes
+            timestamps = [data] if isinstance(data, datetime) else data
+            time_features = generate_time_features_array(timestamps)
+            return pd.DataFrame(time_features)[features]
     
     def train(self, data):
         """Train the solar output prediction model"""
@@ -72,7 +78,7 @@ class EnergyPredictionModel(BaseModel):
     
     def predict(self, input_data):
         """Predict solar output based on datetime"""
-        if self.model is None:
+        if not self.is_trained:
             raise ValueError("Model not trained or loaded")
             
         # Preprocess input
@@ -82,7 +88,7 @@ class EnergyPredictionModel(BaseModel):
             X = input_data
             
         # Make prediction
-        prediction = self.model.predict(X)
+        prediction = self._predict_cached(X)
         
         # For single prediction, return a scalar
         if len(prediction) == 1:
@@ -90,62 +96,141 @@ class EnergyPredictionModel(BaseModel):
             
         return prediction
     
-    def predict_next_24h(self, start_time=None):
-        """Predict solar output for the next 24 hours"""
+    def predict_batch(self, timestamps):
+        """Predict solar output for many datetimes with a single model call"""
+        if not self.is_trained:
+            raise ValueError("Model not trained or loaded")
+
+        if len(timestamps) == 0:
+            return np.empty(0)
+
+        # Build the feature matrix for all timestamps at once
+        X = self.preprocess(timestamps)
+        
+        # One vectorized pass over the whole batch
+        return self._predict_cached(X)
+    
+    def forecast(self, start_time=None, horizon_hours=24, resolution_minutes=60):
+        """
+        Predict solar output over a horizon in a single model call
+        
+        Args:
+            start_time: First forecast time (default: now)
+            horizon_hours: Length of the forecast window in hours
+            resolution_minutes: Minutes between consecutive forecast steps
+        
+        Returns:
+            List of {'time', 'output', 'timestamp'} points
+        """
         if start_time is None:
             start_time = datetime.now()
+        times, outputs, epoch_ms = self._forecast_arrays(start_time, horizon_hours, resolution_minutes)
+        return self._forecast_points(times, outputs, epoch_ms)
+    
+    def _forecast_arrays(self, start_time, horizon_hours, resolution_minutes):
+        """
+        Forecast as arrays
+        
+        Returns:
+            Tuple of ('HH:MM' labels, outputs rounded to 2 decimals, epoch
+            milliseconds), one entry per step
+        """
+        if horizon_hours <= 0 or resolution_minutes <= 0:
+            raise ValueError("horizon_hours and resolution_minutes must be positive")
             
-        # Generate hourly timestamps
-        timestamps = [start_time + timedelta(hours=i) for i in range(24)]
-        
-        # Make predictions for each hour
-        predictions = []
-        for dt in timestamps:
-            # Get time features
-            X = self.preprocess(dt)
-            
-            # Predict solar output
-            if self.model is not None:
-                output = float(self.model.predict(X)[0])
-            else:
-                # Fallback to simulation if model not trained
-                output = generate_solar_output(dt)
-                
-            # Format timestamp for return
-            hour_str = dt.strftime('%H:%M')
+        # Generate all forecast timestamps at once
+        steps = int(horizon_hours * 60 // resolution_minutes)
+        offsets = np.arange(steps) * np.timedelta64(int(resolution_minutes * 60), 's')
+        timestamps = np.datetime64(start_time, 'us') + offsets
+        
+        # Predict solar output for the whole horizon
+        outputs = np.round(self._predict_outputs(timestamps), 2)
+        
+        # Format timestamps for return
+        times = [value[11:16] for value in np.datetime_as_string(timestamps, unit='m')]
+        epoch_ms = start_time.timestamp() * 1000 + offsets / np.timedelta64(1, 'ms')
+        return times, outputs, epoch_ms
+    
+    @staticmethod
+    def _forecast_points(times, outputs, epoch_ms):
+        """Forecast points in the format returned by forecast()"""
+        return [
+            {'time': time_str, 'output': output, 'timestamp': timestamp}
+            for time_str, output, timestamp in zip(times, outputs.tolist(), epoch_ms.tolist())
+        ]
+    
+    def warm_up(self):
+        """Run a single prediction and a day-ahead forecast"""
+        super().warm_up()
+        self.predict(datetime.now())
+        self.forecast(horizon_hours=24)
+    
+    def predict_next_24h(self, start_time=None):
+        """Predict solar output for the next 24 hours"""
+        return self.forecast(start_time, horizon_hours=24, resolution_minutes=60)
+    
+    def calculate_daily_profile(self, date=None):
+        """Calculate a daily solar production profile"""
+        return self.calculate_daily_profiles(date)[0]
+    
+    def calculate_daily_profiles(self, start_date=None, days=1, resolution_minutes=60):
+        """Calculate per-day solar production profiles from one multi-day forecast"""
+        if start_date is None:
+            start_date = datetime.now().date()
+        if 1440 % resolution_minutes:
+            raise ValueError("resolution_minutes must divide a day evenly")
             
-            predictions.append({
-                'time': hour_str,
-                'output': round(output, 2),
-                'timestamp': dt.timestamp() * 1000
+        # Start at midnight and forecast every day in one pass
+        start_time = datetime.combine(start_date, datetime.min.time())
+        times, outputs, epoch_ms = self._forecast_arrays(start_time, 24 * days, resolution_minutes)
+        
+        # Aggregate each day as a row of the (days, steps_per_day) matrix
+        steps_per_day = 1440 // resolution_minutes
+        daily = outputs.reshape(days, steps_per_day)
+        total_output = np.round(daily.sum(axis=1) * resolution_minutes / 60, 2)
+        peak_index = daily.argmax(axis=1)
+        peak_output = daily[np.arange(days), peak_index]
+        
+        # Daylight hours (whole hours of output > 0.1)
+        daylight_hours = (daily > 0.1).sum(axis=1) * resolution_minutes // 60
+        
+        profiles = []
+        for day in range(days):
+            steps = slice(day * steps_per_day, (day + 1) * steps_per_day)
+            profiles.append({
+                'date': (start_date + timedelta(days=day)).strftime('%Y-%m-%d'),
+                'total_output': float(total_output[day]),
+                'peak_output': round(float(peak_output[day]), 2),
+                'peak_time': times[steps][peak_index[day]],
+                'daylight_hours': int(daylight_hours[day]),
+                'hourly_forecast': self._forecast_points(times[steps], outputs[steps], epoch_ms[steps])
             })
             
-        return predictions
+        return profiles
     
-    def calculate_daily_profile(self, date=None):
-        """Calculate a daily solar production profile"""
-        if date is None:
-            date = datetime.now().date()
+    def _predict_outputs(self, timestamps):
+        """Predict solar output for a datetime64 array, simulating if untrained"""
+        if self.is_trained:
+            return self._predict_cached(self.preprocess(timestamps))
             
-        # Start at midnight
-        start_time = datetime.combine(date, datetime.min.time())
-        
-        # Get 24-hour predictions
-        hourly_predictions = self.predict_next_24h(start_time)
-        
-        # Calculate daily statistics
-        total_output = sum(p['output'] for p in hourly_predictions)
-        peak_output = max(p['output'] for p in hourly_predictions)
-        peak_time = next(p['time'] for p in hourly_predictions if p['output'] == peak_output)
-        
-        # Daylight hours (when output > 0.1)
-        daylight_hours = sum(1 for p in hourly_predictions if p['output'] > 0.1)
-        
-        return {
-            'date': date.strftime('%Y-%m-%d'),
-            'total_output': round(total_output, 2),
-            'peak_output': round(peak_output, 2),
-            'peak_time': peak_time,
-            'daylight_hours': daylight_hours,
-            'hourly_forecast': hourly_predictions
-        }
\ No newline at end of file
+        # Fallback to simulation if model not trained
+        time_features = generate_time_features_array(timestamps)
+        return generate_solar_output_array(time_features['hour'], time_features['season'], np.random.default_rng())
+    
+    def _predict_cached(self, X):
+        """Predict each distinct feature row once, serving repeats from the cache"""
+        rows, inverse = np.unique(np.asarray(X, dtype=float), axis=0, return_inverse=True)
+        keys = [(self.version, tuple(row)) for row in rows.tolist()]
+        
+        values = np.array([self.cache.get(key, np.nan) for key in keys], dtype=float)
+        missing = np.flatnonzero(np.isnan(values))
+        if len(missing):
+            # Single model call for every uncached feature row
+            missing_X = rows[missing]
+            if isinstance(X, pd.DataFrame):
+                missing_X = pd.DataFrame(missing_X, columns=X.columns)
+            values[missing] = self._model_predict(missing_X)
+            for i in missing:
+                self.cache.put(keys[i], float(values[i]))
+                
+        return values[inverse.reshape(-1)]
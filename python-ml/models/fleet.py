@@ -0,0 +1,182 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from .model_store import ModelStore, default_store, _write_json_atomic
+from .sampling import ReservoirSampler
+
+def _train_member(factory, name, store_root, data):
+    """Train and save one fleet member in a worker process"""
+    model = factory()
+    model.name = name
+    model.metadata['name'] = name
+    model.store = ModelStore(store_root)
+    performance = model.train(data)
+    model.save()
+    return model.version, performance
+
+class ModelFleet:
+    """
+    One model per household (or cluster of households) of a single kind
+
+    Members are trained in parallel in a process pool and saved to the
+    model store as '{name}/household_{id}' or '{name}/cluster_{id}'. A
+    fleet manifest maps household ids to members; at most `capacity`
+    members are kept in memory (least recently used are dropped) and the
+    rest are loaded from the store on demand.
+    """
+
+    def __init__(self, factory, capacity=128, store=None, workers=None):
+        """
+        Initialize a fleet
+
+        Args:
+            factory: Picklable callable returning an untrained model
+            capacity: Maximum number of members kept loaded
+            store: ModelStore holding the members (default: shared store)
+            workers: Training processes (default: one per core)
+        """
+        self.factory = factory
+        self.name = factory().name
+        self.capacity = capacity
+        self.store = store or default_store
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self.training = {'status': 'idle'}  # Last training run, as reported by the server
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        manifest = self._read_manifest()
+        self.households = manifest.get('households', {})  # household id -> member key
+        self.updated_at = manifest.get('updated_at')
+
+    def _manifest_path(self):
+        return os.path.join(self.store.root, self.name, 'fleet.json')
+
+    def _read_manifest(self):
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def member_name(self, key):
+        """Model store name of a member"""
+        return f'{self.name}/{key}'
+
+    def get(self, household_id):
+        """
+        Model serving a household, loading it from the store if needed
+
+        Returns:
+            The household's (or its cluster's) model, or None if the fleet
+            has no member for it
+        """
+        key = self.households.get(str(household_id))
+        if key is None:
+            return None
+
+        with self._lock:
+            model = self._cache.get(key)
+            if model is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return model
+            self.misses += 1
+
+        model = self.factory()
+        model.name = self.member_name(key)
+        model.store = self.store
+        if not model.load():
+            return None
+
+        with self._lock:
+            self._cache[key] = model
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        return model
+
+    def train(self, data, by='household_id', clusters=None):
+        """
+        Train one member per household or cluster in parallel
+
+        Args:
+            data: Training DataFrame in the model's format with a `by` column
+            by: Column holding the household id
+            clusters: Optional mapping of household id to cluster id; households
+                of a cluster share one member, others get their own
+
+        Returns:
+            Dictionary of member key to version and training performance
+        """
+        if by not in data.columns:
+            raise ValueError(f"Training data has no '{by}' column")
+        clusters = {str(household): cluster for household, cluster in (clusters or {}).items()}
+
+        assignments = {}
+        for household_id in data[by].unique():
+            household = str(household_id)
+            cluster = clusters.get(household)
+            assignments[household] = f'cluster_{cluster}' if cluster is not None else f'household_{household}'
+
+        members = {}
+        keys = data[by].astype(str).map(assignments)
+        for key, frame in data.groupby(keys, sort=False):
+            members[key] = frame.drop(columns=[by]).reset_index(drop=True)
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(_train_member, self.factory, self.member_name(key), self.store.root, frame): key
+                for key, frame in members.items()
+            }
+            for future in as_completed(futures):
+                version, performance = future.result()
+                results[futures[future]] = {'version': version, 'performance': performance}
+
+        # Route to the new members only once all of them are saved
+        with self._lock:
+            self.households = {**self.households, **assignments}
+            self.updated_at = datetime.now().isoformat()
+            for key in results:
+                self._cache.pop(key, None)
+            manifest = {'households': self.households, 'updated_at': self.updated_at}
+        os.makedirs(os.path.dirname(self._manifest_path()), exist_ok=True)
+        _write_json_atomic(self._manifest_path(), manifest)
+        return results
+
+    def train_streaming(self, chunks, sample_size=20000, seed=42, by='household_id', clusters=None):
+        """
+        Train members from a stream of DataFrame chunks in bounded memory
+
+        Each household keeps its own reservoir sample of at most
+        sample_size rows, so memory grows with the number of households
+        but not with the length of their history.
+
+        Returns:
+            Dictionary of member key to version and training performance
+        """
+        sampler = ReservoirSampler(sample_size, seed, stratify=by)
+        for chunk in chunks:
+            sampler.add(chunk)
+        if not sampler.seen:
+            raise ValueError("No training data in stream")
+        return self.train(sampler.sample(), by, clusters)
+
+    def stats(self):
+        """Fleet size and LRU counters"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'households': len(self.households),
+                'members': len(set(self.households.values())),
+                'loaded': len(self._cache),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'updated_at': self.updated_at
+            }
@@ -0,0 +1,255 @@
+import threading
+import numpy as np
+
+from utils import generate_time_features_array
+
+class StreamingLeakDetector:
+    """
+    Stateful leak detector over per-household streams of water readings
+
+    Each household owns one row of a preallocated ring buffer together with
+    running sums, so rolling mean/std/slope and the night-time minimum are
+    updated in O(1) per reading and memory stays fixed per meter.
+
+    Leaks are scored against a per-household baseline for each hour of the
+    day, since normal usage swings from ~10 at night to ~90 in the evening.
+    The defaults are calibrated on client/data/water_data.csv.
+    """
+
+    def __init__(self, window=48, z_threshold=2.5, night_flow_threshold=12.0,
+                 min_samples=5, baseline_window=20, min_night_readings=3,
+                 initial_capacity=1024):
+        """
+        Initialize a streaming leak detector
+
+        Args:
+            window: Number of recent readings kept per household
+            z_threshold: Z-score against the household's baseline for the
+                reading's hour above which a reading is a usage spike
+            night_flow_threshold: Usage above the hour's baseline that counts
+                as unexplained flow during the night (23:00-04:59), when
+                normal usage is low and steady
+            min_samples: Readings of an hour of the day required before that
+                hour's baseline is used for detection
+            baseline_window: Effective number of days averaged by the hourly
+                baselines (older days are exponentially forgotten)
+            min_night_readings: Night readings required before the night minimum counts
+            initial_capacity: Number of households to preallocate state for
+        """
+        self.window = window
+        self.z_threshold = z_threshold
+        self.night_flow_threshold = night_flow_threshold
+        self.min_samples = min_samples
+        self.baseline_window = baseline_window
+        self.min_night_readings = min_night_readings
+
+        self.slots = {}  # household_id -> row in the state arrays
+        self._allocate(initial_capacity)
+        self._lock = threading.Lock()
+
+        # Constant sums over window positions used by the slope formula
+        n = np.arange(window + 1, dtype=np.float64)
+        self._sum_x = n * (n - 1) / 2
+        self._sum_xx = (n - 1) * n * (2 * n - 1) / 6
+
+    def _allocate(self, capacity):
+        """Allocate (or grow) the per-household state arrays"""
+        previous = getattr(self, '_capacity', 0)
+
+        def grow(name, dtype, fill, shape=()):
+            array = np.full((capacity, *shape), fill, dtype=dtype)
+            if previous:
+                array[:previous] = getattr(self, name)
+            setattr(self, name, array)
+
+        grow('buffer', np.float32, 0.0, (self.window,))
+        grow('position', np.int32, 0)
+        grow('count', np.int32, 0)
+        grow('sum', np.float64, 0.0)
+        grow('sum_sq', np.float64, 0.0)
+        grow('sum_xy', np.float64, 0.0)
+        grow('in_night', np.bool_, False)
+        grow('night_min', np.float32, np.inf)
+        grow('night_count', np.int32, 0)
+        grow('last_night_min', np.float32, np.nan)
+        grow('hour_mean', np.float64, 0.0, (24,))
+        grow('hour_var', np.float64, 0.0, (24,))
+        grow('hour_count', np.int32, 0, (24,))
+        self._capacity = capacity
+
+    def _slots_for(self, household_ids):
+        """Map household ids to state rows, registering unseen households"""
+        rows = np.empty(len(household_ids), dtype=np.int64)
+        for i, household_id in enumerate(household_ids):
+            row = self.slots.get(household_id)
+            if row is None:
+                row = len(self.slots)
+                if row >= self._capacity:
+                    self._allocate(self._capacity * 2)
+                self.slots[household_id] = row
+            rows[i] = row
+        return rows
+
+    def ingest(self, household_ids, water_usage, timestamps):
+        """
+        Feed a batch of readings and return one decision per reading
+
+        Readings for the same household are applied in the order given.
+
+        Args:
+            household_ids: Household id per reading
+            water_usage: Usage value per reading
+            timestamps: Reading times (datetime64 array, DatetimeIndex or datetimes)
+
+        Returns:
+            Dictionary of arrays with the rolling features and leak decision
+        """
+        with self._lock:
+            return self._ingest(household_ids, water_usage, timestamps)
+
+    def _ingest(self, household_ids, water_usage, timestamps):
+        """Unlocked body of ingest"""
+        rows = self._slots_for(household_ids)
+        values = np.asarray(water_usage, dtype=np.float64)
+        hours = generate_time_features_array(timestamps)['hour']
+        night = (hours >= 23) | (hours <= 4)
+
+        size = len(rows)
+        result = {
+            'household_id': np.asarray(household_ids),
+            'water_usage': values,
+            'rolling_mean': np.zeros(size),
+            'rolling_std': np.zeros(size),
+            'slope': np.zeros(size),
+            'z_score': np.zeros(size),
+            'hour_mean': np.zeros(size),
+            'night_min': np.full(size, np.nan),
+            'spike': np.zeros(size, dtype=bool),
+            'night_flow': np.zeros(size, dtype=bool)
+        }
+
+        # Process in rounds so each round touches every household at most once
+        order = np.argsort(rows, kind='stable')
+        sorted_rows = rows[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        rank = np.empty(size, dtype=np.int64)
+        rank[order] = np.arange(size) - np.repeat(group_start, np.diff(np.r_[group_start, size]))
+
+        for round_index in range(int(rank.max()) + 1 if size else 0):
+            selected = np.flatnonzero(rank == round_index)
+            self._update(rows[selected], values[selected], hours[selected], night[selected], selected, result)
+
+        result['leak_detected'] = result['spike'] | result['night_flow']
+        return result
+
+    def _update(self, rows, values, hours, night, selected, result):
+        """Apply one reading to each of the given (distinct) household rows"""
+        count = self.count[rows].astype(np.float64)
+        total = self.sum[rows]
+
+        # Rolling statistics of the window before this reading is added
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, 0.0)
+            variance = np.where(count > 0, self.sum_sq[rows] / count - mean ** 2, 0.0)
+            std = np.sqrt(np.maximum(variance, 0.0))
+
+        # Score against the household's baseline for this hour of the day
+        hour_count = self.hour_count[rows, hours]
+        hour_mean = self.hour_mean[rows, hours]
+        hour_var = self.hour_var[rows, hours]
+        hour_std = np.sqrt(hour_var)
+        excess = values - hour_mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z_score = np.where(hour_std > 0, excess / hour_std, 0.0)
+        baseline_ready = hour_count >= self.min_samples
+        spike = baseline_ready & (z_score > self.z_threshold)
+        night_flow = baseline_ready & night & (excess > self.night_flow_threshold)
+
+        # Exponentially weighted update of the hour's mean and variance
+        weight = 1.0 / np.minimum(hour_count + 1, self.baseline_window)
+        self.hour_mean[rows, hours] = hour_mean + weight * excess
+        self.hour_var[rows, hours] = (1 - weight) * (hour_var + weight * excess ** 2)
+        self.hour_count[rows, hours] = hour_count + 1
+
+        # Slide the window: drop the oldest reading once the buffer is full
+        full = count >= self.window
+        position = self.position[rows]
+        oldest = np.where(full, self.buffer[rows, position], 0.0)
+        self.sum_xy[rows] = np.where(
+            full,
+            self.sum_xy[rows] - (total - oldest) + (self.window - 1) * values,
+            self.sum_xy[rows] + count * values
+        )
+        self.sum[rows] = total - oldest + values
+        self.sum_sq[rows] = self.sum_sq[rows] - oldest ** 2 + values ** 2
+        self.buffer[rows, position] = values
+        self.position[rows] = (position + 1) % self.window
+        self.count[rows] = np.minimum(count + 1, self.window)
+
+        # Re-sync running sums from the buffer once per full cycle to avoid drift
+        wrapped = rows[full & (self.position[rows] == 0)]
+        if len(wrapped):
+            self._resync(wrapped)
+
+        # Night minimum: track the current night, remember the last completed one
+        ending = self.in_night[rows] & ~night
+        self.last_night_min[rows[ending]] = self.night_min[rows[ending]]
+        starting = night & ~self.in_night[rows]
+        self.night_min[rows[starting]] = np.inf
+        self.night_count[rows[starting]] = 0
+        self.night_min[rows[night]] = np.minimum(self.night_min[rows[night]], values[night])
+        self.night_count[rows[night]] += 1
+        self.in_night[rows] = night
+        night_ready = night & (self.night_count[rows] >= self.min_night_readings)
+        night_min = np.where(night_ready, self.night_min[rows], np.where(night, np.nan, self.last_night_min[rows]))
+
+        # Rolling slope over window positions (oldest=0, newest=n-1)
+        n = self.count[rows]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = (n * self.sum_xy[rows] - self._sum_x[n] * self.sum[rows]) / (n * self._sum_xx[n] - self._sum_x[n] ** 2)
+
+        result['rolling_mean'][selected] = mean
+        result['rolling_std'][selected] = std
+        result['slope'][selected] = np.nan_to_num(slope)
+        result['z_score'][selected] = z_score
+        result['hour_mean'][selected] = hour_mean
+        result['night_min'][selected] = night_min
+        result['spike'][selected] = spike
+        result['night_flow'][selected] = night_flow
+
+    def _resync(self, rows):
+        """Recompute running sums for full-window rows directly from their buffers"""
+        # Position is 0 for these rows, so buffer order is already oldest -> newest
+        window = self.buffer[rows].astype(np.float64)
+        self.sum[rows] = window.sum(axis=1)
+        self.sum_sq[rows] = (window ** 2).sum(axis=1)
+        self.sum_xy[rows] = window @ np.arange(self.window, dtype=np.float64)
+
+    def state(self, household_id):
+        """Return the rolling state of one household, or None if unseen"""
+        row = self.slots.get(household_id)
+        if row is None:
+            return None
+
+        count = int(self.count[row])
+        position = int(self.position[row])
+        recent = np.roll(self.buffer[row], -position)[self.window - count:] if count == self.window else self.buffer[row, :count]
+        return {
+            'household_id': household_id,
+            'readings': count,
+            'rolling_mean': float(recent.mean()) if count else 0.0,
+            'rolling_std': float(recent.std()) if count else 0.0,
+            'recent_usage': recent.tolist(),
+            'night_min': float(self.night_min[row]) if self.in_night[row] else float(self.last_night_min[row]),
+            'hour_baseline': self.hour_mean[row].tolist()
+        }
+
+    def memory_bytes(self):
+        """Approximate memory held by the per-household state arrays"""
+        return sum(
+            getattr(self, name).nbytes for name in (
+                'buffer', 'position', 'count', 'sum', 'sum_sq', 'sum_xy',
+                'in_night', 'night_min', 'night_count', 'last_night_min',
+                'hour_mean', 'hour_var', 'hour_count'
+            )
+        )
@@ -0,0 +1,270 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: refs updates are only serialized within a process
+    fcntl = None
+
+# Default artifact root, next to this module (python-ml/models/saved)
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'saved')
+
+# Serializes refs.json read-modify-write cycles between threads; the file
+# lock next to refs.json does the same between processes
+_refs_lock = threading.RLock()
+
+def _file_sha256(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_json_atomic(path, data):
+    """Write JSON via a temp file and rename so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ModelStore:
+    """
+    Versioned on-disk store for model artifacts
+
+    Layout per model:
+        {root}/{name}/refs.json                     current/pinned version and history
+        {root}/{name}/versions/{version}/metadata.json
+        {root}/{name}/versions/{version}/estimator.pkl
+        {root}/{name}/versions/{version}/{array}.npy
+
+    Versions are written to a temp directory and renamed into place, so a
+    version directory is either complete or absent. Numeric arrays are
+    stored as .npy files and loaded memory-mapped read-only, letting worker
+    processes share their pages.
+    """
+
+    def __init__(self, root=None):
+        """
+        Initialize a model store
+
+        Args:
+            root: Directory holding all models (default: python-ml/models/saved)
+        """
+        self.root = root or DEFAULT_ROOT
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def version_dir(self, name, version):
+        """Directory holding one version of a model"""
+        return os.path.join(self._model_dir(name), 'versions', version)
+
+    def _refs_path(self, name):
+        return os.path.join(self._model_dir(name), 'refs.json')
+
+    def has_version(self, name, version):
+        """Whether a version of a model has been saved"""
+        return os.path.exists(os.path.join(self.version_dir(name, version), 'metadata.json'))
+
+    def refs(self, name):
+        """Return the refs of a model: current and pinned version plus history"""
+        path = self._refs_path(name)
+        if not os.path.exists(path):
+            return {'current': None, 'pinned': False, 'history': []}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    @contextmanager
+    def _update_refs(self, name):
+        """
+        Read, modify and write a model's refs under a lock
+
+        Yields the current refs; they are written back atomically when the
+        block exits without an exception.
+        """
+        os.makedirs(self._model_dir(name), exist_ok=True)
+        with _refs_lock, open(os.path.join(self._model_dir(name), 'refs.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                refs = self.refs(name)
+                yield refs
+                _write_json_atomic(self._refs_path(name), refs)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self, name, version, estimator=None, arrays=None, metadata=None):
+        """
+        Atomically write a new version and make it current unless pinned
+
+        Args:
+            name: Model name
+            version: Version identifier (must be new)
+            estimator: Picklable estimator, stored as estimator.pkl
+            arrays: Dictionary of NumPy arrays, each stored as {key}.npy
+            metadata: JSON-serializable metadata
+
+        Returns:
+            Path of the version directory
+        """
+        final_dir = self.version_dir(name, version)
+        if os.path.exists(final_dir):
+            raise ValueError(f"Version {version} of {name} already exists")
+        versions_dir = os.path.dirname(final_dir)
+        os.makedirs(versions_dir, exist_ok=True)
+
+        tmp_dir = tempfile.mkdtemp(dir=versions_dir, prefix=f'.tmp-{version}-')
+        try:
+            files = {}
+            if estimator is not None:
+                with open(os.path.join(tmp_dir, 'estimator.pkl'), 'wb') as f:
+                    pickle.dump(estimator, f, protocol=pickle.HIGHEST_PROTOCOL)
+                files['estimator.pkl'] = None
+            for key, array in (arrays or {}).items():
+                np.save(os.path.join(tmp_dir, f'{key}.npy'), np.ascontiguousarray(array))
+                files[f'{key}.npy'] = None
+
+            # Content hashes of every artifact file
+            for filename in files:
+                files[filename] = _file_sha256(os.path.join(tmp_dir, filename))
+            content_hash = hashlib.sha256(
+                ''.join(f'{filename}:{files[filename]}' for filename in sorted(files)).encode()
+            ).hexdigest()
+
+            metadata = {
+                **(metadata or {}),
+                'version': version,
+                'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'files': files,
+                'arrays': sorted(arrays or {}),
+                'content_hash': content_hash
+            }
+            _write_json_atomic(os.path.join(tmp_dir, 'metadata.json'), metadata)
+            os.replace(tmp_dir, final_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # Advance the current pointer unless a version is pinned
+        with self._update_refs(name) as refs:
+            refs['history'].append(version)
+            if not refs['pinned']:
+                refs['current'] = version
+        return final_dir
+
+    def load(self, name, version=None, mmap=True, verify=False):
+        """
+        Load a version (default: current)
+
+        Args:
+            name: Model name
+            version: Version to load, or None for the current one
+            mmap: Memory-map arrays read-only instead of reading them into memory
+            verify: Check content hashes before loading
+
+        Returns:
+            Tuple of (metadata, arrays, load_estimator) where load_estimator
+            deserializes the pickled estimator on demand, or None if the
+            version is not found
+        """
+        version = version or self.refs(name)['current']
+        if version is None:
+            return None
+        version_dir = self.version_dir(name, version)
+        metadata_path = os.path.join(version_dir, 'metadata.json')
+        if not os.path.exists(metadata_path):
+            return None
+
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+
+        if verify:
+            for filename, expected in metadata['files'].items():
+                if _file_sha256(os.path.join(version_dir, filename)) != expected:
+                    raise ValueError(f"Artifact {filename} of {name}@{version} is corrupted")
+
+        arrays = {
+            key: np.load(os.path.join(version_dir, f'{key}.npy'), mmap_mode='r' if mmap else None)
+            for key in metadata['arrays']
+        }
+
+        estimator_path = os.path.join(version_dir, 'estimator.pkl')
+
+        def load_estimator():
+            if not os.path.exists(estimator_path):
+                return None
+            with open(estimator_path, 'rb') as f:
+                return pickle.load(f)
+
+        return metadata, arrays, load_estimator
+
+    def versions(self, name):
+        """List saved versions of a model, oldest first"""
+        refs = self.refs(name)
+        result = []
+        for version in refs['history']:
+            metadata_path = os.path.join(self.version_dir(name, version), 'metadata.json')
+            if not os.path.exists(metadata_path):
+                continue
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+            result.append({
+                'version': version,
+                'saved_at': metadata.get('saved_at'),
+                'content_hash': metadata.get('content_hash'),
+                'current': version == refs['current']
+            })
+        return result
+
+    def pin(self, name, version):
+        """Make a version current and keep it current across new saves"""
+        if not self.has_version(name, version):
+            raise ValueError(f"Unknown version {version} of {name}")
+        with self._update_refs(name) as refs:
+            refs['current'] = version
+            refs['pinned'] = True
+        return refs
+
+    def unpin(self, name):
+        """Let new saves advance the current version again"""
+        with self._update_refs(name) as refs:
+            refs['pinned'] = False
+        return refs
+
+    def restore_refs(self, name, refs):
+        """Write back refs captured earlier, e.g. to undo a failed pin"""
+        with self._update_refs(name) as current:
+            current['current'] = refs['current']
+            current['pinned'] = refs['pinned']
+        return current
+
+    def rollback(self, name):
+        """Pin the version saved before the current one"""
+        with self._update_refs(name) as refs:
+            history = refs['history']
+            if refs['current'] not in history or history.index(refs['current']) == 0:
+                raise ValueError(f"No earlier version of {name} to roll back to")
+            refs['current'] = history[history.index(refs['current']) - 1]
+            refs['pinned'] = True
+        return refs
+
+# Shared store used by models unless one is passed explicitly
+default_store = ModelStore()
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+
+class PredictionCache:
+    """Bounded LRU cache with per-entry TTL for deterministic model predictions"""
+    
+    def __init__(self, maxsize=4096, ttl=3600):
+        """
+        Initialize a prediction cache
+        
+        Args:
+            maxsize: Maximum number of cached entries
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def __getstate__(self):
+        """Pickle configuration only; entries and the lock are process-local"""
+        return {'maxsize': self.maxsize, 'ttl': self.ttl}
+    
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'], state['ttl'])
+    
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+class _Reservoir:
+    """Fixed-size uniform sample of the rows seen so far (Algorithm R)"""
+
+    __slots__ = ('size', 'columns', 'filled', 'seen')
+
+    def __init__(self, size):
+        self.size = size
+        self.columns = None
+        self.filled = 0
+        self.seen = 0
+
+    def add(self, columns, rows, rng):
+        """Fold `rows` rows given as a dictionary of column arrays into the sample"""
+        if self.columns is None:
+            self.columns = {name: np.empty(self.size, dtype=values.dtype) for name, values in columns.items()}
+
+        # Fill phase: the first `size` rows are kept as they are
+        take = min(self.size - self.filled, rows)
+        if take:
+            for name, values in columns.items():
+                self.columns[name][self.filled:self.filled + take] = values[:take]
+            self.filled += take
+            self.seen += take
+
+        rest = rows - take
+        if not rest:
+            return
+
+        # Row number n (1-based) replaces a uniform slot in [0, n) if that slot exists
+        positions = self.seen + np.arange(1, rest + 1)
+        slots = (rng.random(rest) * positions).astype(np.int64)
+        accepted = np.flatnonzero(slots < self.size)
+        if len(accepted):
+            # Later rows overwrite earlier ones that drew the same slot
+            slots = slots[accepted]
+            _, last = np.unique(slots[::-1], return_index=True)
+            keep = len(slots) - 1 - last
+            for name, values in columns.items():
+                self.columns[name][slots[keep]] = values[take + accepted[keep]]
+        self.seen += rest
+
+    def arrays(self):
+        """Sampled column arrays"""
+        return {name: values[:self.filled] for name, values in (self.columns or {}).items()}
+
+class ReservoirSampler:
+    """
+    Uniform random sample of a stream of DataFrame chunks in bounded memory
+
+    Every row seen has the same probability of ending up in the sample,
+    whatever the stream length. With `stratify`, a separate reservoir of
+    `size` rows is kept per value of that column (e.g. household_id or
+    season), so small strata are not crowded out by large ones.
+    """
+
+    def __init__(self, size, seed=None, stratify=None):
+        """
+        Initialize a sampler
+
+        Args:
+            size: Rows kept (per stratum when stratifying)
+            seed: Seed or numpy.random.Generator for reproducible samples
+            stratify: Column whose values each get their own reservoir
+        """
+        if size < 1:
+            raise ValueError("size must be positive")
+        self.size = size
+        self.stratify = stratify
+        self.rng = np.random.default_rng(seed)
+        self.reservoirs = {}
+
+    @property
+    def seen(self):
+        """Number of rows added so far"""
+        return sum(reservoir.seen for reservoir in self.reservoirs.values())
+
+    def _reservoir(self, key):
+        reservoir = self.reservoirs.get(key)
+        if reservoir is None:
+            reservoir = self.reservoirs[key] = _Reservoir(self.size)
+        return reservoir
+
+    def add(self, frame):
+        """Fold a DataFrame chunk into the sample"""
+        if not len(frame):
+            return
+        columns = {name: frame[name].to_numpy() for name in frame.columns}
+
+        if self.stratify is None:
+            self._reservoir(None).add(columns, len(frame), self.rng)
+            return
+
+        for key, positions in frame.groupby(self.stratify, sort=False, observed=True).indices.items():
+            subset = {name: values[positions] for name, values in columns.items()}
+            self._reservoir(key).add(subset, len(positions), self.rng)
+
+    def sample(self):
+        """
+        The current sample as a DataFrame
+
+        Returns:
+            Sampled rows, grouped by stratum when stratifying
+        """
+        parts = [reservoir.arrays() for reservoir in self.reservoirs.values() if reservoir.filled]
+        if not parts:
+            return pd.DataFrame()
+        return pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in parts[0]})
@@ -5,38 +5,82 @@ from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
 
 from .base_model import BaseModel
-from ..utils import generate_time_features, save_model_data
+from utils import generate_time_features_array
+
+# Raw input columns and the columns the forest is fitted on
+FEATURES = ['water_usage', 'hour', 'is_weekend', 'is_day']
+MODEL_FEATURES = ['water_usage_scaled', 'hour', 'is_weekend', 'is_day']
 
 class WaterLeakDetectionModel(BaseModel):
     """Anomaly detection model for identifying potential water leaks"""
     
     def __init__(self):
         super().__init__("water_leak_detection", "water_usage")
-        self.scaler = StandardScaler()
         
-    def preprocess(self, data):
-        """Transform raw data into features for anomaly detection"""
-        # Select relevant features
-        features = ['water_usage', 'hour', 'is_weekend', 'is_day']
+        # (mean, scale) of water_usage, fitted in train() and saved with the
+        # model; replaced as a whole so readers never see half an update
+        self.scaler_state = None
+        
+    def fit_preprocess(self, data):
+        """
+        Fit the water_usage scaler on training data
+        
+        Returns:
+            Tuple of (mean, scale) for preprocess()
+        """
+        if 'water_usage' not in data.columns:
+            raise ValueError("Required feature 'water_usage' not found in data")
+        scaler = StandardScaler().fit(data[['water_usage']])
+        return float(scaler.mean_[0]), float(scaler.scale_[0])
+        
+    def preprocess(self, data, scaler_state=None):
+        """
+        Transform raw data into features for anomaly detection
+        
+        Pure function of the data and the fitted scaler: the model is never
+        modified, so threads can score on one shared instance without locks.
         
+        Args:
+            data: DataFrame with water_usage and the hour, is_weekend and
+                is_day time features
+            scaler_state: (mean, scale) to use instead of the model's own
+        """
         if 'water_usage' not in data.columns:
             raise ValueError("Required feature 'water_usage' not found in data")
             
+        if scaler_state is None:
+            scaler_state = self.scaler_state
+        if scaler_state is None:
+            raise ValueError("Water usage scaler not fitted; train the model first")
+        mean, scale = scaler_state
+            
         # Extract features from DataFrame
-        X = data[features].copy()
+        X = data[FEATURES].copy()
         
         # Scale numeric features
-        if self.feature_columns is None:
-            self.feature_columns = features
-            self.scaler.fit(X[['water_usage']])
-            
-        X['water_usage_scaled'] = self.scaler.transform(X[['water_usage']])
+        X['water_usage_scaled'] = (X['water_usage'].to_numpy(dtype=float) - mean) / scale
             
         return X
     
+    def preprocessing_arrays(self):
+        """Persist the fitted scaler alongside the estimator"""
+        if self.scaler_state is None:
+            return {}
+        mean, scale = self.scaler_state
+        return {'scaler_mean': np.array([mean]), 'scaler_scale': np.array([scale])}
+    
+    def restore_preprocessing(self, arrays):
+        """Restore the scaler saved with the estimator (None for older artifacts)"""
+        if 'scaler_mean' in arrays and 'scaler_scale' in arrays:
+            self.scaler_state = (float(arrays['scaler_mean'][0]), float(arrays['scaler_scale'][0]))
+        else:
+            self.scaler_state = None
+    
     def train(self, data):
         """Train the anomaly detection model"""
-        X = self.preprocess(data)
+        # Always refit the scaler on the training data, even after load()
+        scaler_state = self.fit_preprocess(data)
+        X = self.preprocess(data, scaler_state)
         
         # Create and train Isolation Forest model for anomaly detection
         model = IsolationForest(
@@ -45,15 +89,16 @@ class WaterLeakDetectionModel(BaseModel):
             random_state=42
         )
         
-        model.fit(X[['water_usage_scaled', 'hour', 'is_weekend', 'is_day']])
+        model.fit(X[MODEL_FEATURES])
+        self.scaler_state = scaler_state
+        self.feature_columns = FEATURES
         self.model = model
         
         # Calculate performance on training data
-        anomaly_scores = model.decision_function(X[['water_usage_scaled', 'hour', 'is_weekend', 'is_day']])
-        predictions = model.predict(X[['water_usage_scaled', 'hour', 'is_weekend', 'is_day']])
+        anomaly_scores = model.decision_function(X[MODEL_FEATURES])
         
-        # Count anomalies detected
-        anomalies_count = (predictions == -1).sum()
+        # Count anomalies detected (negative scores, as in model.predict)
+        anomalies_count = (anomaly_scores < 0).sum()
         
         # Update metadata
         self.metadata['performance'] = {
@@ -64,12 +109,11 @@ class WaterLeakDetectionModel(BaseModel):
         }
         self.metadata['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        save_model_data(self.name, self.metadata)
         return self.metadata['performance']
     
     def predict(self, input_data):
         """Predict anomalies in water usage data"""
-        if self.model is None:
+        if not self.is_trained:
             raise ValueError("Model not trained or loaded")
             
         # Process input data
@@ -78,34 +122,33 @@ class WaterLeakDetectionModel(BaseModel):
             if 'water_usage' not in input_data:
                 raise ValueError("Required feature 'water_usage' not found in input")
                 
-            if 'hour' not in input_data and 'datetime' not in input_data:
-                # Use current time if not provided
-                dt = datetime.now()
-                time_features = generate_time_features(dt)
-                input_data.update(time_features)
-                
             # Create DataFrame from dict
             input_df = pd.DataFrame([input_data])
+            
+            if 'hour' not in input_data and 'datetime' not in input_data:
+                # Use current time if not provided
+                time_features = generate_time_features_array([datetime.now()])
+                input_df = input_df.assign(**time_features)
         else:
-            # Use provided DataFrame
-            input_df = input_data.copy()
+            # Use provided DataFrame (preprocess works on a copy)
+            input_df = input_data
             
-        # Preprocess data
-        X = self.preprocess(input_df)
-        
-        # Get anomaly scores and predictions
-        anomaly_scores = self.model.decision_function(X[['water_usage_scaled', 'hour', 'is_weekend', 'is_day']])
-        predictions = self.model.predict(X[['water_usage_scaled', 'hour', 'is_weekend', 'is_day']])
-        
-        # Create result with predictions and scores
-        results = []
-        for i in range(len(X)):
-            results.append({
-                'is_anomaly': predictions[i] == -1,
-                'anomaly_score': float(anomaly_scores[i]),
-                'confidence': min(100, max(0, (0.5 - anomaly_scores[i]) * 100)) if anomaly_scores[i] < 0 else 0,
-                'water_usage': float(X.iloc[i]['water_usage'])
-            })
+        # Score once and build the dict view of the columnar result
+        scores = self.score_batch(input_df)
+        results = [
+            {
+                'is_anomaly': is_anomaly,
+                'anomaly_score': anomaly_score,
+                'confidence': confidence,
+                'water_usage': water_usage
+            }
+            for is_anomaly, anomaly_score, confidence, water_usage in zip(
+                scores['is_anomaly'].tolist(),
+                scores['anomaly_score'].tolist(),
+                scores['confidence'].tolist(),
+                scores['water_usage'].tolist()
+            )
+        ]
             
         # Return single result for single input
         if len(results) == 1:
@@ -113,21 +156,92 @@ class WaterLeakDetectionModel(BaseModel):
             
         return results
     
+    def score_batch(self, data):
+        """
+        Score many readings with a single forest pass
+        
+        Labels come from the sign of the decision function, which already
+        includes the learned offset (exactly what IsolationForest.predict
+        does), so the forest is only evaluated once.
+        
+        Args:
+            data: DataFrame with water_usage and the hour, is_weekend and
+                is_day time features
+        
+        Returns:
+            DataFrame with water_usage, anomaly_score, is_anomaly and
+            confidence columns, one row per reading
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained or loaded")
+            
+        X = self.preprocess(data)
+        anomaly_scores = np.asarray(self._model_decision_function(X[MODEL_FEATURES]), dtype=float)
+        is_anomaly = anomaly_scores < 0
+        
+        return pd.DataFrame({
+            'water_usage': X['water_usage'].to_numpy(dtype=float),
+            'anomaly_score': anomaly_scores,
+            'is_anomaly': is_anomaly,
+            'confidence': np.where(is_anomaly, np.clip((0.5 - anomaly_scores) * 100, 0, 100), 0.0)
+        })
+    
     def detect_leaks_realtime(self, current_usage, time=None):
         """Detect potential leaks based on current water usage data"""
         if time is None:
             time = datetime.now()
             
         # Generate inputs for anomaly detection
-        input_data = {
-            'water_usage': current_usage,
-            **generate_time_features(time)
-        }
+        input_df = pd.DataFrame(generate_time_features_array([time]))
+        input_df['water_usage'] = float(current_usage)
         
         # Get prediction
-        result = self.predict(input_data)
+        result = self.predict(input_df)
         
-        # Add context to the prediction
+        return self._leak_status(result)
+    
+    def warm_up(self):
+        """Score one reading and a day of readings"""
+        super().warm_up()
+        now = datetime.now()
+        self.detect_leaks_realtime(50.0, now)
+        self.detect_leaks_batch([50.0] * 24, [now - timedelta(hours=h) for h in range(24)])
+    
+    def detect_leaks_batch(self, usages, times):
+        """Detect potential leaks for many readings with a single model call"""
+        if len(usages) != len(times):
+            raise ValueError("usages and times must have the same length")
+            
+        if len(usages) == 0:
+            return []
+            
+        # Build the feature columns for all readings at once
+        input_df = pd.DataFrame(generate_time_features_array(times))
+        input_df['water_usage'] = np.asarray(usages, dtype=float)
+        
+        # Score the whole batch at once
+        results = self.predict(input_df)
+        if isinstance(results, dict):
+            results = [results]
+            
+        return [self._leak_status(result) for result in results]
+    
+    def score_history(self, frames):
+        """
+        Re-score a meter history chunk by chunk
+        
+        Args:
+            frames: Iterable of DataFrames with water_usage and time features
+                (e.g. datasets.iter_training_frames('water'))
+        
+        Yields:
+            One score_batch() DataFrame per chunk
+        """
+        for frame in frames:
+            yield self.score_batch(frame)
+    
+    def _leak_status(self, result):
+        """Add leak context to a single anomaly prediction"""
         if result['is_anomaly']:
             leak_confidence = result['confidence']
             return {
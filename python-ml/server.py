@@ -1,81 +1,260 @@
 from flask import Flask, request, jsonify
-import pandas as pd
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import functools
+import math
 import os
 import sys
 import json
+import threading
 import traceback
 
 # Add the current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import utility functions
-from utils import generate_synthetic_data, generate_time_features
-
-# Import ML models
-from models.energy_prediction import EnergyPredictionModel
-from models.water_analysis import WaterLeakDetectionModel
-from models.agriculture_optimization import IrrigationOptimizationModel
+# Heavy dependencies (pandas, numpy, sklearn) are imported on first use of
+# each model so the worker starts serving /health immediately
+from training_jobs import METER_TRAINING, MODEL_KINDS, TrainingJobManager, create_model, train_fleet
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Global model instances
+# Global model instances, only ever replaced together under models_lock
 energy_model = None
 water_model = None
 agriculture_model = None
+models_lock = threading.Lock()
 
-def initialize_models(train=False):
-    """Initialize and optionally train all models"""
+# Startup mode: 'eager' loads and warms all models in parallel at boot,
+# 'lazy' loads each model on the first request that needs it
+STARTUP_MODE = os.environ.get('ML_STARTUP_MODE', 'eager')
+
+# Boot progress reported by /health
+boot_state = {
+    'status': 'starting',
+    'models': {kind: 'pending' for kind in MODEL_KINDS},
+    'started_at': None,
+    'ready_at': None,
+    'error': None
+}
+boot_lock = threading.Lock()
+
+# Cleared while an eager boot is loading the models; requests wait on it
+# instead of loading (or training) a model a second time
+boot_done = threading.Event()
+boot_done.set()
+
+# Rolling per-household state for streaming leak detection (created on first use)
+leak_stream = None
+
+# Per-household model fleets by kind (created on first use); at most
+# FLEET_CAPACITY members of each fleet are kept loaded
+fleets = {}
+fleets_lock = threading.Lock()
+FLEET_CAPACITY = int(os.environ.get('ML_FLEET_CAPACITY', 128))
+
+# Upper bound on readings accepted by a single batch request
+MAX_BATCH_SIZE = 10000
+
+# Upper bound on steps in a single forecast (two weeks at 5-minute resolution)
+MAX_FORECAST_STEPS = 14 * 24 * 12
+
+def swap_models(models):
+    """Atomically replace the served models with the given {kind: model} instances"""
     global energy_model, water_model, agriculture_model
     
-    # Initialize models
-    energy_model = EnergyPredictionModel()
-    water_model = WaterLeakDetectionModel()
-    agriculture_model = IrrigationOptimizationModel()
-    
-    # Try to load pre-trained models
-    energy_loaded = energy_model.load()
-    water_loaded = water_model.load()
-    agriculture_loaded = agriculture_model.load()
-    
-    # If any model failed to load or training is requested, train with synthetic data
-    if train or not (energy_loaded and water_loaded and agriculture_loaded):
-        print("Generating synthetic data and training models...")
-        data = generate_synthetic_data(days=90)
-        
-        if not energy_loaded or train:
-            print("Training energy prediction model...")
-            energy_model.train(data)
-            energy_model.save()
-            
-        if not water_loaded or train:
-            print("Training water leak detection model...")
-            water_model.train(data)
-            water_model.save()
+    with models_lock:
+        energy_model = models.get('energy', energy_model)
+        water_model = models.get('water', water_model)
+        agriculture_model = models.get('agriculture', agriculture_model)
+
+def current_model(kind):
+    """Return the served model of the given kind, or None if not loaded yet"""
+    return {'energy': energy_model, 'water': water_model, 'agriculture': agriculture_model}[kind]
+
+def prepare_model(kind, train=False):
+    """Load (or train) one model and run a warm-up prediction"""
+    from utils import generate_synthetic_data
+    
+    boot_state['models'][kind] = 'loading'
+    model = create_model(kind)
+    loaded = not train and model.load()
+    
+    if loaded:
+        try:
+            boot_state['models'][kind] = 'warming'
+            model.warm_up()
+            boot_state['models'][kind] = 'ready'
+            return model
+        except Exception:
+            # Unusable artifact; fall through and retrain
+            traceback.print_exc()
+            print(f"Warm-up of saved {kind} model failed, retraining...")
             
-        if not agriculture_loaded or train:
-            print("Training irrigation optimization model...")
-            agriculture_model.train(data)
-            agriculture_model.save()
+    boot_state['models'][kind] = 'training'
+    print(f"Training {kind} model with synthetic data...")
+    model.train(generate_synthetic_data(days=90))
+    model.save()
+    
+    boot_state['models'][kind] = 'warming'
+    model.warm_up()
+    boot_state['models'][kind] = 'ready'
+    return model
+
+def initialize_models(train=False):
+    """Load (or train) and warm all models in parallel, then swap them in together"""
+    boot_state['status'] = 'starting'
+    boot_state['started_at'] = datetime.now().isoformat()
+    try:
+        with ThreadPoolExecutor(max_workers=len(MODEL_KINDS)) as executor:
+            models = dict(zip(MODEL_KINDS, executor.map(lambda kind: prepare_model(kind, train), MODEL_KINDS)))
+        swap_models(models)
+        boot_state['status'] = 'ready'
+        boot_state['ready_at'] = datetime.now().isoformat()
+        print("All models loaded and warmed up.")
+    except Exception as e:
+        boot_state['status'] = 'failed'
+        boot_state['error'] = str(e)
+        raise
+
+def require_model(kind):
+    """
+    Return the served model of the given kind
+    
+    Waits for an eager boot in progress; loads the model itself in lazy
+    mode or if the boot failed.
+    """
+    model = current_model(kind)
+    if model is not None:
+        return model
+        
+    boot_done.wait()
+    with boot_lock:
+        model = current_model(kind)
+        if model is None:
+            model = prepare_model(kind)
+            swap_models({kind: model})
+    return model
+
+def get_leak_stream():
+    """Return the shared streaming leak detector, creating it on first use"""
+    global leak_stream
+    
+    if leak_stream is None:
+        with boot_lock:
+            if leak_stream is None:
+                from models.leak_stream import StreamingLeakDetector
+                leak_stream = StreamingLeakDetector()
+    return leak_stream
+
+def get_fleet(kind):
+    """Return the per-household model fleet of a kind, creating it on first use"""
+    fleet = fleets.get(kind)
+    if fleet is None:
+        with fleets_lock:
+            fleet = fleets.get(kind)
+            if fleet is None:
+                from models.fleet import ModelFleet
+                fleet = fleets[kind] = ModelFleet(functools.partial(create_model, kind), capacity=FLEET_CAPACITY)
+    return fleet
+
+def model_for(kind, household_id=None):
+    """Return the household's fleet model if it has one, else the global model"""
+    if household_id is not None:
+        model = get_fleet(kind).get(household_id)
+        if model is not None:
+            return model
+    return require_model(kind)
+
+def route_readings(kind, household_ids):
+    """
+    Group reading positions by the model serving their household
+    
+    Returns:
+        List of (model, positions) pairs covering every reading
+    """
+    by_household = {}
+    groups = {}
+    for i, household_id in enumerate(household_ids):
+        key = str(household_id)
+        if key not in by_household:
+            by_household[key] = model_for(kind, household_id)
+        model = by_household[key]
+        groups.setdefault(id(model), (model, []))[1].append(i)
+    return list(groups.values())
+
+def model_store():
+    """Return the shared model store"""
+    from models.model_store import default_store
+    return default_store
+
+def start_boot():
+    """Load and warm all models in a background thread"""
+    def boot():
+        try:
+            initialize_models()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            boot_done.set()
             
-        print("All models trained and saved successfully.")
-    else:
-        print("All models loaded successfully.")
+    boot_done.clear()
+    thread = threading.Thread(target=boot, name='model-boot', daemon=True)
+    thread.start()
+    return thread
+
+# Background retraining; fitted models are swapped in only when all succeed
+training_jobs = TrainingJobManager(on_success=swap_models)
+
+def parse_readings(data, required=()):
+    """
+    Validate the readings array of a batch request
+    
+    Args:
+        data: Parsed JSON request body
+        required: Keys every reading must provide
+    
+    Returns:
+        Tuple of (readings, household_ids, datetimes)
+    """
+    readings = (data or {}).get('readings')
+    if not isinstance(readings, list) or not readings:
+        raise ValueError('readings must be a non-empty array')
+    if len(readings) > MAX_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_BATCH_SIZE} readings are accepted per request')
+        
+    now_ms = datetime.now().timestamp() * 1000
+    household_ids = []
+    datetimes = []
+    for i, reading in enumerate(readings):
+        if not isinstance(reading, dict):
+            raise ValueError(f'Reading {i} must be an object')
+        for key in required:
+            if reading.get(key) is None:
+                raise ValueError(f'Reading {i} is missing {key}')
+        household_ids.append(reading.get('household_id'))
+        datetimes.append(datetime.fromtimestamp(reading.get('timestamp', now_ms) / 1000))
+        
+    return readings, household_ids, datetimes
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+    
+    Reports ready once boot has finished: in eager mode when every model is
+    warm, in lazy mode as soon as the server is up. Which models are loaded
+    is reported separately under 'models'.
+    """
+    ready = boot_state['status'] == 'ready'
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if ready else boot_state['status'],
+        'ready': ready,
+        'startup_mode': STARTUP_MODE,
         'timestamp': datetime.now().isoformat(),
-        'models': {
-            'energy': energy_model is not None,
-            'water': water_model is not None,
-            'agriculture': agriculture_model is not None
-        }
-    })
+        'boot': boot_state,
+        'models': {kind: current_model(kind) is not None for kind in MODEL_KINDS}
+    }), 200 if ready else 503
 
 @app.route('/api/energy/predict', methods=['POST'])
 def predict_energy():
@@ -90,8 +269,12 @@ def predict_energy():
             if 'timestamp' in data:
                 start_time = datetime.fromtimestamp(data['timestamp'] / 1000)
                 
-            # Generate 24-hour forecast
-            forecast = energy_model.predict_next_24h(start_time)
+            # Generate forecast (24 hourly steps unless a horizon is requested)
+            horizon_hours = float(data.get('horizon_hours', 24))
+            resolution_minutes = float(data.get('resolution_minutes', 60))
+            if horizon_hours * 60 / resolution_minutes > MAX_FORECAST_STEPS:
+                raise ValueError(f'Forecasts are limited to {MAX_FORECAST_STEPS} steps')
+            forecast = model_for('energy', data.get('household_id')).forecast(start_time, horizon_hours, resolution_minutes)
             return jsonify({
                 'success': True,
                 'forecast': forecast
@@ -104,7 +287,7 @@ def predict_energy():
             dt = datetime.fromtimestamp(timestamp / 1000)
             
             # Make prediction
-            prediction = energy_model.predict(dt)
+            prediction = model_for('energy', data.get('household_id')).predict(dt)
             
             return jsonify({
                 'success': True,
@@ -121,6 +304,85 @@ def predict_energy():
             'error': str(e)
         }), 400
 
+@app.route('/api/energy/predict-batch', methods=['POST'])
+def predict_energy_batch():
+    """Predict energy production for an array of readings in one call"""
+    try:
+        readings, household_ids, datetimes = parse_readings(request.json)
+        
+        # One vectorized prediction per serving model
+        predictions = [None] * len(readings)
+        for model, positions in route_readings('energy', household_ids):
+            batch = model.predict_batch([datetimes[i] for i in positions])
+            for i, prediction in zip(positions, batch):
+                predictions[i] = prediction
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {
+                    'household_id': household_id,
+                    'solar_output': round(float(prediction), 2),
+                    'timestamp': dt.isoformat()
+                }
+                for household_id, dt, prediction in zip(household_ids, datetimes, predictions)
+            ]
+        })
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/energy/cache', methods=['GET'])
+def energy_cache_stats():
+    """Hit/miss counters for the energy forecast cache"""
+    try:
+        model = require_model('energy')
+        return jsonify({
+            'success': True,
+            'model_version': model.version,
+            'cache': model.cache.stats()
+        })
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/energy/daily-profile', methods=['POST'])
+def energy_daily_profile():
+    """Aggregate daily solar production profiles for one or more days"""
+    try:
+        data = request.json or {}
+        
+        # Start date if provided, otherwise today
+        start_date = None
+        if 'timestamp' in data:
+            start_date = datetime.fromtimestamp(data['timestamp'] / 1000).date()
+            
+        days = int(data.get('days', 1))
+        resolution_minutes = int(data.get('resolution_minutes', 60))
+        if days < 1 or days * 1440 / resolution_minutes > MAX_FORECAST_STEPS:
+            raise ValueError(f'Profiles are limited to {MAX_FORECAST_STEPS} forecast steps')
+            
+        profiles = model_for('energy', data.get('household_id')).calculate_daily_profiles(start_date, days, resolution_minutes)
+        return jsonify({
+            'success': True,
+            'profiles': profiles
+        })
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/water/detect-leak', methods=['POST'])
 def detect_water_leak():
     """Detect potential water leaks based on usage patterns"""
@@ -140,7 +402,7 @@ def detect_water_leak():
         dt = datetime.fromtimestamp(timestamp / 1000)
         
         # Detect leaks
-        result = water_model.detect_leaks_realtime(water_usage, dt)
+        result = model_for('water', data.get('household_id')).detect_leaks_realtime(water_usage, dt)
         
         return jsonify({
             'success': True,
@@ -154,6 +416,95 @@ def detect_water_leak():
             'error': str(e)
         }), 400
 
+@app.route('/api/water/detect-leak-batch', methods=['POST'])
+def detect_water_leak_batch():
+    """Detect potential water leaks for an array of readings in one call"""
+    try:
+        data = request.json or {}
+        
+        # Accept either an explicit water_usage or the generic value field
+        for reading in data.get('readings') or []:
+            if isinstance(reading, dict) and reading.get('water_usage') is None:
+                reading['water_usage'] = reading.get('value')
+                
+        readings, household_ids, datetimes = parse_readings(data, required=('water_usage',))
+        usages = [reading['water_usage'] for reading in readings]
+        
+        # Score each serving model's readings at once
+        results = [None] * len(readings)
+        for model, positions in route_readings('water', household_ids):
+            batch = model.detect_leaks_batch([usages[i] for i in positions], [datetimes[i] for i in positions])
+            for i, result in zip(positions, batch):
+                results[i] = result
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {
+                    'household_id': household_id,
+                    'timestamp': dt.isoformat(),
+                    **result
+                }
+                for household_id, dt, result in zip(household_ids, datetimes, results)
+            ]
+        })
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/water/stream', methods=['POST'])
+def ingest_water_stream():
+    """Feed readings to the streaming leak detector and return rolling decisions"""
+    try:
+        data = request.json or {}
+        
+        # Accept either an explicit water_usage or the generic value field
+        for reading in data.get('readings') or []:
+            if isinstance(reading, dict) and reading.get('water_usage') is None:
+                reading['water_usage'] = reading.get('value')
+                
+        readings, household_ids, datetimes = parse_readings(data, required=('household_id', 'water_usage'))
+        result = get_leak_stream().ingest(
+            household_ids,
+            [reading['water_usage'] for reading in readings],
+            datetimes
+        )
+        
+        # Dict view of the columnar result
+        results = []
+        for i, dt in enumerate(datetimes):
+            night_min = float(result['night_min'][i])
+            results.append({
+                'household_id': household_ids[i],
+                'timestamp': dt.isoformat(),
+                'leak_detected': bool(result['leak_detected'][i]),
+                'spike': bool(result['spike'][i]),
+                'night_flow': bool(result['night_flow'][i]),
+                'water_usage': float(result['water_usage'][i]),
+                'rolling_mean': round(float(result['rolling_mean'][i]), 2),
+                'rolling_std': round(float(result['rolling_std'][i]), 2),
+                'slope': round(float(result['slope'][i]), 4),
+                'z_score': round(float(result['z_score'][i]), 2),
+                'hour_mean': round(float(result['hour_mean'][i]), 2),
+                'night_min': round(night_min, 2) if math.isfinite(night_min) else None
+            })
+            
+        return jsonify({
+            'success': True,
+            'results': results
+        })
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/agriculture/optimize-irrigation', methods=['POST'])
 def optimize_irrigation():
     """Optimize irrigation schedules based on soil conditions"""
@@ -175,7 +526,7 @@ def optimize_irrigation():
         dt = datetime.fromtimestamp(timestamp / 1000)
         
         # Calculate optimal irrigation
-        result = agriculture_model.calculate_optimal_irrigation(soil_moisture, temperature, dt)
+        result = model_for('agriculture', data.get('household_id')).calculate_optimal_irrigation(soil_moisture, temperature, dt)
         
         return jsonify({
             'success': True,
@@ -189,15 +540,66 @@ def optimize_irrigation():
             'error': str(e)
         }), 400
 
+@app.route('/api/agriculture/optimize-irrigation-batch', methods=['POST'])
+def optimize_irrigation_batch():
+    """Optimize irrigation schedules for an array of readings in one call"""
+    try:
+        data = request.json or {}
+        
+        # Accept either an explicit soil_moisture or the generic value field
+        for reading in data.get('readings') or []:
+            if isinstance(reading, dict) and reading.get('soil_moisture') is None:
+                reading['soil_moisture'] = reading.get('value')
+                
+        readings, household_ids, datetimes = parse_readings(data, required=('soil_moisture', 'temperature'))
+        
+        # Calculate irrigation plans with one moisture prediction pass per serving model
+        results = [None] * len(readings)
+        for model, positions in route_readings('agriculture', household_ids):
+            batch = model.calculate_optimal_irrigation_batch(
+                [readings[i]['soil_moisture'] for i in positions],
+                [readings[i]['temperature'] for i in positions],
+                [datetimes[i] for i in positions]
+            )
+            for i, result in zip(positions, batch):
+                results[i] = result
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {
+                    'household_id': household_id,
+                    'timestamp': dt.isoformat(),
+                    **result
+                }
+                for household_id, dt, result in zip(household_ids, datetimes, results)
+            ]
+        })
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/train', methods=['POST'])
 def train_models():
-    """Force retraining of all models"""
+    """Start retraining all models in the background"""
     try:
-        initialize_models(train=True)
+        data = request.get_json(silent=True) or {}
+        job, created = training_jobs.submit(days=int(data.get('days', 90)), source=data.get('source', 'synthetic'))
         return jsonify({
             'success': True,
-            'message': 'All models trained successfully'
-        })
+            'job_id': job['id'],
+            'status': job['status'],
+            'message': 'Training started' if created else 'Training already in progress'
+        }), 202 if created else 409
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         traceback.print_exc()
         return jsonify({
@@ -205,19 +607,193 @@ def train_models():
             'error': str(e)
         }), 500
 
-# Initialize models on startup
-@app.before_first_request
-def before_first_request():
-    """Initialize models before first request"""
-    initialize_models()
+@app.route('/api/train/<job_id>', methods=['GET'])
+def training_status(job_id):
+    """Report status and progress of a training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown training job {job_id}'
+        }), 404
+    return jsonify({
+        'success': True,
+        'job': job
+    })
 
-if __name__ == '__main__':
-    # Create necessary directories
-    os.makedirs('python-ml/models/saved', exist_ok=True)
-    os.makedirs('python-ml/data', exist_ok=True)
+@app.route('/api/fleet/<kind>', methods=['GET'])
+def fleet_status(kind):
+    """Size, LRU counters and last training run of a per-household fleet"""
+    if kind not in MODEL_KINDS:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown model kind {kind}'
+        }), 404
+    fleet = get_fleet(kind)
+    return jsonify({
+        'success': True,
+        'fleet': fleet.stats(),
+        'training': fleet.training
+    })
+
+@app.route('/api/fleet/<kind>/train', methods=['POST'])
+def train_fleet_models(kind):
+    """Start training one model per household (or cluster) from meter history"""
+    try:
+        if kind not in METER_TRAINING:
+            raise ValueError(f'No meter history to train per-household {kind} models')
+        data = request.get_json(silent=True) or {}
+        sample_size = int(data.get('sample_size', 20000))
+        clusters = data.get('clusters')
+        fleet = get_fleet(kind)
+        
+        with fleets_lock:
+            if fleet.training['status'] == 'running':
+                return jsonify({
+                    'success': False,
+                    'error': 'Fleet training already in progress'
+                }), 409
+            fleet.training = {'status': 'running', 'started_at': datetime.now().isoformat()}
+            
+        def run():
+            try:
+                members = train_fleet(fleet, kind, sample_size, clusters)
+                fleet.training = {**fleet.training, 'status': 'succeeded', 'members': len(members)}
+            except Exception as e:
+                traceback.print_exc()
+                fleet.training = {**fleet.training, 'status': 'failed', 'error': str(e)}
+            fleet.training['finished_at'] = datetime.now().isoformat()
+            
+        threading.Thread(target=run, name=f'fleet-{kind}', daemon=True).start()
+        return jsonify({
+            'success': True,
+            'status': 'running'
+        }), 202
+    
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+# Model store name -> model kind, for the version management routes
+MODEL_STORE_NAMES = {
+    'energy_prediction': 'energy',
+    'water_leak_detection': 'water',
+    'irrigation_optimization': 'agriculture'
+}
+
+def load_model_version(name, version=None):
+    """Load a saved version of a model and swap it in for serving"""
+    if name not in MODEL_STORE_NAMES:
+        raise ValueError(f'Unknown model {name}')
+        
+    kind = MODEL_STORE_NAMES[name]
+    model = create_model(kind)
+    if not model.load(version):
+        raise ValueError(f'Could not load {name} version {version or "current"}')
+        
+    swap_models({kind: model})
+    return model
+
+@app.route('/api/models/<name>/versions', methods=['GET'])
+def list_model_versions(name):
+    """List saved versions of a model"""
+    if name not in MODEL_STORE_NAMES:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown model {name}'
+        }), 404
+    return jsonify({
+        'success': True,
+        'refs': model_store().refs(name),
+        'versions': model_store().versions(name)
+    })
+
+@app.route('/api/models/<name>/pin', methods=['POST'])
+def pin_model_version(name):
+    """Pin a saved version of a model and serve it"""
+    try:
+        version = (request.json or {}).get('version')
+        if version is None:
+            return jsonify({
+                'success': False,
+                'error': 'version parameter is required'
+            }), 400
+            
+        if name not in MODEL_STORE_NAMES:
+            raise ValueError(f'Unknown model {name}')
+        if not model_store().has_version(name, version):
+            raise ValueError(f'Unknown version {version} of {name}')
+            
+        # Undo the pin if the version cannot be served
+        previous = model_store().refs(name)
+        model_store().pin(name, version)
+        try:
+            model = load_model_version(name, version)
+        except Exception:
+            model_store().restore_refs(name, previous)
+            raise
+        return jsonify({
+            'success': True,
+            'version': model.version
+        })
     
-    # Initialize models at startup
-    initialize_models()
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/models/<name>/unpin', methods=['POST'])
+def unpin_model_version(name):
+    """Let newly trained versions of a model become current again"""
+    if name not in MODEL_STORE_NAMES:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown model {name}'
+        }), 404
+    return jsonify({
+        'success': True,
+        'refs': model_store().unpin(name)
+    })
+
+@app.route('/api/models/<name>/rollback', methods=['POST'])
+def rollback_model_version(name):
+    """Pin and serve the version saved before the current one"""
+    try:
+        if name not in MODEL_STORE_NAMES:
+            raise ValueError(f'Unknown model {name}')
+            
+        previous = model_store().refs(name)
+        refs = model_store().rollback(name)
+        try:
+            model = load_model_version(name, refs['current'])
+        except Exception:
+            model_store().restore_refs(name, previous)
+            raise
+        return jsonify({
+            'success': True,
+            'version': model.version
+        })
     
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+# Load and warm models at boot so the first request doesn't pay for it
+if STARTUP_MODE == 'eager':
+    start_boot()
+else:
+    # Nothing to load up front; each model is loaded by its first request
+    boot_state['status'] = 'ready'
+    boot_state['ready_at'] = datetime.now().isoformat()
+
+if __name__ == '__main__':
     # Run Flask server
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
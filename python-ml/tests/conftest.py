@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Tests import python-ml modules the way server.py does: with python-ml on sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never start the eager background boot when a test imports server
+os.environ.setdefault('ML_STARTUP_MODE', 'lazy')
+
+@pytest.fixture(autouse=True)
+def isolated_store(tmp_path, monkeypatch):
+    """Point the shared model store and the working directory at a temp dir"""
+    from models.model_store import default_store
+    monkeypatch.setattr(default_store, 'root', str(tmp_path / 'saved'))
+    monkeypatch.chdir(tmp_path)
+    return default_store
@@ -0,0 +1,37 @@
+import pytest
+
+from blockchain.energy_trading import Blockchain
+
+@pytest.fixture
+def chain():
+    blockchain = Blockchain(difficulty=0)
+    for i in range(30):
+        blockchain.add_transaction('alice', 'bob', 1.0 + i, 0.1)
+        blockchain.mine_pending_transactions('miner')
+    return blockchain
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_audit_valid_chain(chain, workers):
+    result = chain.audit_chain(workers=workers, blocks_per_task=4)
+    assert result == {'valid': True, 'first_invalid': None, 'blocks_checked': 30}
+    assert chain.verified_height == 31
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_audit_reports_first_invalid_block(chain, workers):
+    chain.chain[25].transactions[0]['amount'] = 99.0
+    chain.chain[9].transactions[0]['amount'] = 99.0
+    result = chain.audit_chain(workers=workers, blocks_per_task=4)
+    assert result == {'valid': False, 'first_invalid': 9, 'blocks_checked': 9}
+
+def test_audit_serializes_ranges_lazily(chain, monkeypatch):
+    serialized = []
+    original = type(chain.chain[1]).to_dict
+
+    def to_dict(block):
+        serialized.append(block.index)
+        return original(block)
+
+    monkeypatch.setattr(type(chain.chain[1]), 'to_dict', to_dict)
+    chain.chain[2].transactions[0]['amount'] = 99.0
+    assert chain.audit_chain(workers=1, blocks_per_task=4)['first_invalid'] == 2
+    assert serialized == [1, 2, 3, 4]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, IsolationForest, RandomForestRegressor
+
+from models.compiled_ensemble import CompiledEnsemble
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 5)), columns=list('abcde'))
+    y = X['a'] * 3 + np.sin(X['b']) + rng.normal(scale=0.1, size=len(X))
+    test = pd.DataFrame(rng.normal(size=(300, 5)), columns=list('abcde'))
+    return X, y, test
+
+@pytest.mark.parametrize('estimator', [
+    RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0),
+    GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0),
+])
+def test_regressor_parity(data, estimator):
+    X, y, test = data
+    estimator.fit(X, y)
+    compiled = CompiledEnsemble.from_estimator(estimator)
+    np.testing.assert_allclose(compiled.predict(test), estimator.predict(test), rtol=1e-9, atol=1e-9)
+
+    # Column order comes from the training frame, not the input
+    shuffled = test[list('edcba')]
+    np.testing.assert_allclose(compiled.predict(shuffled), estimator.predict(test), rtol=1e-9, atol=1e-9)
+
+def test_isolation_forest_parity(data):
+    X, _, test = data
+    estimator = IsolationForest(n_estimators=50, max_features=3, random_state=0).fit(X)
+    compiled = CompiledEnsemble.from_estimator(estimator)
+    np.testing.assert_allclose(compiled.score_samples(test), estimator.score_samples(test), rtol=1e-9)
+    np.testing.assert_allclose(compiled.decision_function(test), estimator.decision_function(test), rtol=1e-9, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(test), estimator.predict(test))
+
+def test_arrays_round_trip(data):
+    X, y, test = data
+    estimator = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    compiled = CompiledEnsemble.from_estimator(estimator)
+    rebuilt = CompiledEnsemble.from_arrays(compiled.arrays(), compiled.params())
+    np.testing.assert_array_equal(rebuilt.predict(test), compiled.predict(test))
+
+def test_unsupported_estimator_and_bad_shape(data):
+    X, y, _ = data
+    assert CompiledEnsemble.from_estimator(object()) is None
+    compiled = CompiledEnsemble.from_estimator(RandomForestRegressor(n_estimators=2, random_state=0).fit(X.values, y))
+    with pytest.raises(ValueError):
+        compiled.predict(np.zeros((3, 4)))
@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+import pytest
+
+from models.energy_prediction import EnergyPredictionModel
+from utils import generate_synthetic_data
+
+@pytest.fixture(scope='module')
+def model():
+    model = EnergyPredictionModel()
+    model.train(generate_synthetic_data(days=30))
+    return model
+
+def test_daily_profile_matches_hourly_forecast(model):
+    day = date(2025, 6, 1)
+    profile = model.calculate_daily_profile(day)
+    hourly = model.predict_next_24h(datetime(2025, 6, 1))
+
+    outputs = [point['output'] for point in hourly]
+    assert profile['hourly_forecast'] == hourly
+    assert profile['total_output'] == round(sum(outputs), 2)
+    assert profile['peak_output'] == max(outputs)
+    assert profile['peak_time'] == hourly[outputs.index(max(outputs))]['time']
+    assert profile['daylight_hours'] == sum(1 for output in outputs if output > 0.1)
+    assert isinstance(profile['daylight_hours'], int)
+
+def test_multi_day_profiles(model):
+    profiles = model.calculate_daily_profiles(date(2025, 6, 1), days=3, resolution_minutes=15)
+    assert [profile['date'] for profile in profiles] == ['2025-06-01', '2025-06-02', '2025-06-03']
+    assert all(len(profile['hourly_forecast']) == 96 for profile in profiles)
+    assert profiles[1] == model.calculate_daily_profiles(date(2025, 6, 2), resolution_minutes=15)[0]
+    with pytest.raises(ValueError):
+        model.calculate_daily_profiles(date(2025, 6, 1), resolution_minutes=7)
@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from models.fleet import ModelFleet
+from models.model_store import ModelStore
+from models.water_analysis import WaterLeakDetectionModel
+from utils import generate_time_features_array
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'client', 'data', 'water_data.csv')
+
+def household_frames(households):
+    data = pd.read_csv(DATA_PATH, parse_dates=['timestamp'])
+    data = data[data['household_id'].isin(households)]
+    features = generate_time_features_array(data['timestamp'].to_numpy())
+    return pd.DataFrame({
+        'household_id': data['household_id'].to_numpy(),
+        'water_usage': data['water_usage'].to_numpy(),
+        'hour': features['hour'],
+        'is_weekend': features['is_weekend'],
+        'is_day': features['is_day']
+    })
+
+def test_train_and_get_two_household_fleet(tmp_path):
+    store = ModelStore(str(tmp_path / 'saved'))
+    fleet = ModelFleet(WaterLeakDetectionModel, capacity=1, store=store, workers=1)
+    results = fleet.train(household_frames([1, 2]))
+    assert set(results) == {'household_1', 'household_2'}
+
+    for household in (1, 2):
+        model = fleet.get(household)
+        assert model.name == f'water_leak_detection/household_{household}'
+        assert model.version == results[f'household_{household}']['version']
+        assert model.scaler_state is not None
+        assert 'leak_detected' in model.detect_leaks_realtime(50.0, pd.Timestamp('2025-03-01 02:00'))
+    assert fleet.get(3) is None
+    assert fleet.stats()['loaded'] == 1
+
+    # Members and routing survive a restart
+    reopened = ModelFleet(WaterLeakDetectionModel, store=store)
+    assert reopened.get('2').version == results['household_2']['version']
+
+    # Nothing is written outside the store
+    assert sorted(os.listdir(tmp_path)) == ['saved']
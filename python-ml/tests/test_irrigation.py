@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.agriculture_optimization import IrrigationOptimizationModel
+from utils import generate_synthetic_data
+
+@pytest.fixture(scope='module')
+def model():
+    model = IrrigationOptimizationModel()
+    model.train(generate_synthetic_data(days=10, seed=3, start_date=datetime(2025, 1, 1)))
+    return model
+
+def test_batch_matches_single_readings(model):
+    start = datetime(2025, 6, 1)
+    moistures = [10.0, 35.5, 49.9, 50.0, 72.0, 20.0]
+    temperatures = [15.0, 26.0, 29.5, 31.0, 40.0, 22.0]
+    timestamps = [start + timedelta(hours=5 * i) for i in range(len(moistures))]
+
+    batch = model.calculate_optimal_irrigation_batch(moistures, temperatures, timestamps)
+
+    assert batch == [
+        model.calculate_optimal_irrigation(*reading) for reading in zip(moistures, temperatures, timestamps)
+    ]
+    assert all('predicted_moisture' in result for result in batch)
+
+def test_plan_for_dry_summer_afternoon(model):
+    result = model.calculate_optimal_irrigation(30.0, 32.0, datetime(2025, 7, 1, 14))
+
+    # rate = 0.8 * 0.8 (hot daytime) * 1.2 (summer) / 1.14 (temperature)
+    assert result['moisture_deficit'] == 20.0
+    assert result['expected_moisture'] == 50.0
+    assert [zone['duration'] for zone in result['zones']] == ['27 min', '33 min', '30 min']
+    assert 'Summer season detected' in result['recommendation']
+
+def test_batch_rejects_mismatched_lengths(model):
+    with pytest.raises(ValueError):
+        model.calculate_optimal_irrigation_batch([40.0], [25.0, 26.0], [datetime(2025, 1, 1)])
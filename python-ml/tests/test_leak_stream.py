@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.leak_stream import StreamingLeakDetector
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'client', 'data', 'water_data.csv')
+
+@pytest.fixture(scope='module')
+def water_data():
+    data = pd.read_csv(DATA_PATH, parse_dates=['timestamp'])
+    return data.sort_values(['timestamp', 'household_id']).reset_index(drop=True)
+
+def detection_quality(detected, leaking):
+    true_positives = (detected & leaking).sum()
+    return true_positives / max(detected.sum(), 1), true_positives / leaking.sum()
+
+def test_detection_quality_on_repo_dataset(water_data):
+    # Meters measure the total flow, leaks included
+    result = StreamingLeakDetector().ingest(
+        water_data['household_id'].to_numpy(),
+        water_data['total_consumption'].to_numpy(),
+        water_data['timestamp'].to_numpy()
+    )
+    leaking = (water_data['leak_amount'] > 0).to_numpy()
+    base_rate = leaking.mean()
+
+    precision, recall = detection_quality(result['leak_detected'], leaking)
+    assert precision > 5 * base_rate
+    assert recall > 0.2
+
+    night = water_data['timestamp'].dt.hour.isin([23, 0, 1, 2, 3, 4]).to_numpy()
+    precision, recall = detection_quality(result['night_flow'], leaking & night)
+    assert result['night_flow'].sum() > 0
+    assert precision > 5 * base_rate
+    assert recall > 0.4
+
+def test_batch_matches_reading_by_reading(water_data):
+    sample = water_data[water_data['household_id'].isin([1, 2, 3])].head(600)
+    batch = StreamingLeakDetector().ingest(
+        sample['household_id'].to_numpy(),
+        sample['total_consumption'].to_numpy(),
+        sample['timestamp'].to_numpy()
+    )
+
+    detector = StreamingLeakDetector()
+    for column in ('z_score', 'hour_mean', 'rolling_mean'):
+        batch[column] = np.round(batch[column], 9)
+    single = [
+        detector.ingest([row.household_id], [row.total_consumption], [row.timestamp])
+        for row in sample.itertuples()
+    ]
+    for column in ('leak_detected', 'z_score', 'hour_mean', 'rolling_mean'):
+        values = np.concatenate([result[column] for result in single])
+        np.testing.assert_allclose(values.astype(float), batch[column].astype(float), atol=1e-6)
+
+def test_flat_usage_is_not_a_leak():
+    timestamps = pd.date_range('2025-01-01', periods=24 * 10, freq='h')
+    usage = np.where(timestamps.hour.isin([18, 19]), 80.0, 10.0) + np.tile([0.0, 1.0], 120)
+    result = StreamingLeakDetector().ingest(['h1'] * len(usage), usage, timestamps)
+    assert not result['leak_detected'].any()
+
+    # A night leak against the same baseline is flagged
+    timestamp = pd.Timestamp('2025-01-11 02:00')
+    detector = StreamingLeakDetector()
+    detector.ingest(['h1'] * len(usage), usage, timestamps)
+    flagged = detector.ingest(['h1'], [40.0], [timestamp])
+    assert flagged['night_flow'][0] and flagged['leak_detected'][0]
@@ -0,0 +1,67 @@
+import json
+import os
+
+from blockchain.energy_trading import EnergyTrading
+
+def trade_blocks(trading, users, blocks):
+    for i in range(blocks):
+        seller, buyer = users[i % len(users)], users[(i + 1) % len(users)]
+        trading.create_energy_transaction(seller['address'], buyer['address'], 1.0 + i, 0.1)
+        trading.create_energy_transaction(buyer['address'], seller['address'], 0.5, 0.2)
+        trading.process_transactions()
+
+def ledger_state(trading):
+    return {
+        'height': len(trading.blockchain.chain),
+        'balances': {user['id']: round(trading.get_user_balance(user['id']), 6) for user in trading.users.values()},
+        'users': {address: (user['energy_produced'], user['energy_consumed']) for address, user in trading.users.items()},
+        'market': trading.get_market_stats(),
+        'history': [tx['id'] for tx in trading.get_user_transactions('u1')]
+    }
+
+def test_restart_keeps_state_across_base_and_delta_snapshots(tmp_path):
+    data_dir = str(tmp_path / 'ledger')
+    trading = EnergyTrading(difficulty=0, data_dir=data_dir, snapshot_interval=1000)
+    users = [trading.register_user(f'u{i}', f'User {i}') for i in range(3)]
+
+    trade_blocks(trading, users, 4)
+    trading.snapshot()  # First snapshot is a full base
+    trade_blocks(trading, users, 2)
+    trading.snapshot()  # Small enough to be a delta
+    trade_blocks(trading, users, 2)  # Left for log replay
+    trading.create_energy_transaction(users[0]['address'], users[1]['address'], 7.0, 0.1)  # Pending
+
+    manifest = json.load(open(os.path.join(data_dir, 'snapshot.json')))
+    assert manifest['base'] == 'snapshot-base-5.json'
+    assert manifest['deltas'] == ['snapshot-delta-7.json']
+
+    expected = ledger_state(trading)
+    tx_id = expected['history'][0]
+    trading.close()
+
+    restored = EnergyTrading(difficulty=0, data_dir=data_dir)
+    state = ledger_state(restored)
+    pending_id = expected['history'][-1]
+    expected['history'].remove(pending_id)
+    expected['market']['pending_transactions'] = 0
+    assert state == expected
+    assert restored.blockchain.get_transaction_proof(tx_id) is not None
+    assert restored.blockchain.audit_chain(workers=1)['valid']
+
+    # Once the deltas outgrow the base, a new base replaces all old files
+    trade_blocks(restored, users, 8)
+    restored.snapshot()
+    files = sorted(name for name in os.listdir(data_dir) if name.startswith('snapshot-'))
+    assert files == ['snapshot-base-17.json']
+    restored.close()
+
+def test_background_snapshots(tmp_path):
+    data_dir = str(tmp_path / 'ledger')
+    trading = EnergyTrading(difficulty=0, data_dir=data_dir, snapshot_interval=2)
+    users = [trading.register_user(f'u{i}', f'User {i}') for i in range(2)]
+    trade_blocks(trading, users, 5)
+    expected = ledger_state(trading)
+    trading.close()
+
+    assert os.path.exists(os.path.join(data_dir, 'snapshot.json'))
+    assert ledger_state(EnergyTrading(difficulty=0, data_dir=data_dir)) == expected
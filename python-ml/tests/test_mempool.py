@@ -0,0 +1,62 @@
+from blockchain.energy_trading import Blockchain, EnergyTrading
+from blockchain.mempool import Mempool
+from blockchain.transaction import Transaction
+
+def test_address_index_follows_add_evict_take_and_remove():
+    pool = Mempool(capacity=3)
+    a = Transaction.create('alice', 'bob', 1.0, 0.1)
+    b = Transaction.create('carol', 'alice', 2.0, 0.1)
+    c = Transaction.create('bob', 'carol', 3.0, 0.1)
+    pool.add(a, fee=1.0)
+    pool.add(b, fee=2.0)
+    pool.add(c, fee=3.0)
+    assert pool.for_address('alice') == [a, b]
+    assert pool.for_address('bob') == [a, c]
+
+    # Evicts a, the lowest fee
+    d = Transaction.create('alice', 'alice', 4.0, 0.1)
+    pool.add(d, fee=4.0)
+    assert pool.for_address('alice') == [b, d]
+    assert pool.for_address('bob') == [c]
+
+    assert pool.take(1) == [d]
+    assert pool.for_address('alice') == [b]
+    assert pool.remove(b['id']) is b
+    assert pool.for_address('alice') == []
+    assert pool.for_address('carol') == [c]
+    assert set(pool.by_address) == {'bob', 'carol'}
+
+def test_transactions_for_address_include_confirmed_then_pending():
+    chain = Blockchain(difficulty=0)
+    first = chain.add_transaction('alice', 'bob', 1.0, 0.1)
+    chain.mine_pending_transactions('miner')
+    second = chain.add_transaction('bob', 'alice', 2.0, 0.1)
+    chain.add_transaction('carol', 'dave', 3.0, 0.1)
+
+    assert [tx['id'] for tx in chain.get_transactions_for_address('alice')] == [first['id'], second['id']]
+    assert chain.get_transactions_for_address('erin') == []
+
+def test_evicted_transactions_never_reach_user_totals():
+    trading = EnergyTrading(difficulty=0, mempool_capacity=1)
+    seller = trading.register_user('seller', 'Seller')['address']
+    buyer = trading.register_user('buyer', 'Buyer')['address']
+
+    evicted = trading.blockchain.add_transaction(seller, buyer, 5.0, 0.1, fee=0.0)
+    kept = trading.blockchain.add_transaction(seller, buyer, 2.0, 0.1, fee=1.0)
+    assert evicted['id'] not in trading.blockchain.pending_index
+    assert trading.users[seller]['energy_produced'] == 0.0
+
+    trading.process_transactions()
+    assert trading.users[seller]['energy_produced'] == 2.0
+    assert trading.users[buyer]['energy_consumed'] == 2.0
+    assert trading.blockchain.get_transaction(kept['id'])['status'] == 'confirmed'
+
+def test_heaps_stay_bounded_under_sustained_eviction():
+    pool = Mempool(capacity=100)
+    for i in range(20000):
+        pool.add(Transaction.create('alice', 'bob', 1.0, 0.1), fee=float(i))
+
+    assert len(pool) == 100
+    assert len(pool._best) <= 2 * len(pool) + 1024
+    assert len(pool._worst) <= 2 * len(pool) + 1024
+    assert [tx['amount'] for tx in pool.take(1)] == [1.0]
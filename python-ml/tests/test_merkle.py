@@ -0,0 +1,50 @@
+import hashlib
+
+import pytest
+
+from blockchain.energy_trading import Block, verify_block
+from blockchain.merkle import merkle_proof, merkle_root, transaction_hash, verify_proof
+from blockchain.transaction import Transaction
+
+def transactions(count):
+    return [Transaction.create(f'seller{i}', f'buyer{i}', 1.0 + i, 0.1, timestamp=1700000000 + i) for i in range(count)]
+
+@pytest.mark.parametrize('count', [1, 2, 3, 5, 8, 13])
+def test_every_transaction_has_a_valid_proof(count):
+    txs = transactions(count)
+    leaves = [transaction_hash(tx) for tx in txs]
+    root = merkle_root(leaves)
+    for index, tx in enumerate(txs):
+        proof = merkle_proof(leaves, index)
+        assert verify_proof(tx.to_dict(), proof, root)
+        assert verify_proof(tx, proof, root)
+
+def test_proof_rejects_tampering():
+    txs = transactions(5)
+    leaves = [transaction_hash(tx) for tx in txs]
+    root = merkle_root(leaves)
+    proof = merkle_proof(leaves, 2)
+
+    tampered = {**txs[2].to_dict(), 'amount': 999.0}
+    assert not verify_proof(tampered, proof, root)
+    assert not verify_proof(txs[3].to_dict(), proof, root)
+    assert not verify_proof(txs[2].to_dict(), proof, hashlib.sha256(b'other').hexdigest())
+
+    # Status changes after mining do not change the leaf
+    confirmed = {**txs[2].to_dict(), 'status': 'confirmed'}
+    assert verify_proof(confirmed, proof, root)
+
+    with pytest.raises(ValueError):
+        merkle_proof(leaves, 5)
+
+def test_block_proofs_and_duplicate_transactions():
+    txs = transactions(3)
+    block = Block(1, 1700000000.0, txs, 'previous')
+    for position, tx in enumerate(block.transactions):
+        assert verify_proof(tx.to_dict(), block.get_proof(position), block.merkle_root)
+    assert verify_block(block, 'previous', 0)
+
+    # Repeating the odd last transaction keeps the Merkle root (CVE-2012-2459)
+    forged = Block(1, block.timestamp, txs + [txs[-1]], 'previous')
+    assert forged.merkle_root == block.merkle_root
+    assert not verify_block(forged, 'previous', 0)
@@ -0,0 +1,94 @@
+import threading
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest, RandomForestRegressor
+
+from models.base_model import BaseModel
+from models.model_store import ModelStore
+
+def trained_model(name, store, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 4))
+    model = BaseModel(name, store=store)
+    model.model = RandomForestRegressor(n_estimators=10, random_state=seed).fit(X, X[:, 0])
+    return model
+
+def test_concurrent_saves_keep_every_version(tmp_path):
+    store = ModelStore(str(tmp_path))
+    models = [trained_model('m', store, seed) for seed in range(12)]
+    threads = [threading.Thread(target=model.save) for model in models]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    refs = store.refs('m')
+    assert sorted(refs['history']) == sorted(model.version for model in models)
+    assert refs['current'] in refs['history']
+
+def test_pin_rollback_and_restore(tmp_path):
+    store = ModelStore(str(tmp_path))
+    first, second = trained_model('m', store, 0), trained_model('m', store, 1)
+    first.save()
+    second.save()
+
+    with pytest.raises(ValueError):
+        store.pin('m', 'missing')
+    assert store.refs('m')['current'] == second.version
+
+    previous = store.refs('m')
+    assert store.rollback('m')['current'] == first.version
+    with pytest.raises(ValueError):
+        store.rollback('m')
+    restored = store.restore_refs('m', previous)
+    assert restored['current'] == second.version and not restored['pinned']
+
+def test_warm_up_and_small_batches_stay_on_compiled_path(tmp_path):
+    store = ModelStore(str(tmp_path))
+    model = trained_model('m', store)
+    model.save()
+    estimator = model.model
+
+    loaded = BaseModel('m', store=store)
+    assert loaded.load()
+    loaded.warm_up()
+    X = np.random.default_rng(1).normal(size=(1000, 4))
+    small = loaded._model_predict(X[:loaded.compiled_batch_limit])
+    assert loaded._model is None  # Estimator never unpickled
+    np.testing.assert_allclose(small, estimator.predict(X[:loaded.compiled_batch_limit]), rtol=1e-9)
+
+    # Large batches go to sklearn, which is faster there
+    np.testing.assert_allclose(loaded._model_predict(X), estimator.predict(X), rtol=1e-9)
+    assert loaded._model is not None
+
+def test_decision_function_matches_sklearn_on_both_paths():
+    X = np.random.default_rng(2).normal(size=(700, 3))
+    model = BaseModel('iso')
+    model.model = IsolationForest(n_estimators=20, random_state=0).fit(X)
+    for rows in (X[:10], X):
+        np.testing.assert_allclose(model._model_decision_function(rows), model.model.decision_function(rows), rtol=1e-9, atol=1e-12)
+
+def test_failed_pin_is_undone(isolated_store, monkeypatch):
+    import server
+
+    first = trained_model('energy_prediction', isolated_store, 0)
+    second = trained_model('energy_prediction', isolated_store, 1)
+    first.save()
+    second.save()
+    client = server.app.test_client()
+
+    response = client.post('/api/models/energy_prediction/pin', json={'version': 'missing'})
+    assert response.status_code == 400
+    response = client.post('/api/models/unknown/pin', json={'version': first.version})
+    assert response.status_code == 400
+
+    class Unloadable:
+        def load(self, version=None):
+            return False
+
+    monkeypatch.setattr(server, 'create_model', lambda kind: Unloadable())
+    response = client.post('/api/models/energy_prediction/pin', json={'version': first.version})
+    assert response.status_code == 400
+    refs = isolated_store.refs('energy_prediction')
+    assert refs['current'] == second.version and not refs['pinned']
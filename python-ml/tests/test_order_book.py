@@ -0,0 +1,26 @@
+from blockchain.energy_trading import EnergyTrading
+
+def test_full_mempool_stops_matching_without_crossing_the_book():
+    trading = EnergyTrading(difficulty=0, mempool_capacity=2)
+    seller = trading.register_user('seller', 'Seller')['address']
+    buyer = trading.register_user('buyer', 'Buyer')['address']
+    for _ in range(3):
+        trading.submit_order(seller, 'sell', 1.0, 0.10, delivery_hour=1000)
+
+    result = trading.submit_order(buyer, 'buy', 3.0, 0.12, delivery_hour=1000)
+    assert result['backpressure']
+    assert len(result['trades']) == 2
+    assert all(trade['transaction_id'] in trading.blockchain.pending_index for trade in result['trades'])
+    assert result['order']['status'] == 'unfilled' and result['order']['remaining'] == 1.0
+    assert trading.order_book.get_order(result['order']['id']) is None
+    depth = trading.order_book.depth(1000)
+    assert depth['bids'] == []
+    assert depth['asks'] == [{'price': 0.10, 'amount': 1.0}]
+
+    # Once the mempool drains, the remainder can be resubmitted and matches normally
+    trading.process_transactions()
+    assert trading.users[seller]['energy_produced'] == 2.0
+    result = trading.submit_order(buyer, 'buy', 1.0, 0.12, delivery_hour=1000)
+    assert not result['backpressure']
+    assert len(result['trades']) == 1 and result['order']['status'] == 'filled'
+    assert trading.order_book.depth(1000) == {'delivery_hour': 1000, 'bids': [], 'asks': []}
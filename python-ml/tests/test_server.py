@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+import server
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+def test_lazy_health_is_ready_before_models_load(client, monkeypatch):
+    monkeypatch.setattr(server, 'water_model', None)
+    monkeypatch.setattr(server, 'prepare_model', lambda kind: object())
+
+    response = client.get('/health')
+    body = response.get_json()
+    assert server.STARTUP_MODE == 'lazy'
+    assert response.status_code == 200 and body['ready']
+    assert body['models']['water'] is False
+
+    server.require_model('water')
+    body = client.get('/health').get_json()
+    assert body['ready'] and body['models']['water'] is True
+
+def test_energy_cache_reports_load_errors_as_json(client, monkeypatch):
+    def fail(kind):
+        raise RuntimeError('no energy model')
+
+    monkeypatch.setattr(server, 'energy_model', None)
+    monkeypatch.setattr(server, 'prepare_model', fail)
+    response = client.get('/api/energy/cache')
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'error': 'no energy model'}
+
+def test_requests_wait_for_eager_boot(monkeypatch):
+    for kind in server.MODEL_KINDS:
+        monkeypatch.setattr(server, f'{kind}_model', None)
+    monkeypatch.setattr(server, 'boot_state', {**server.boot_state, 'models': {}})
+    calls = []
+
+    def prepare_model(kind, train=False):
+        calls.append(kind)
+        time.sleep(0.2)
+        return f'{kind} model'
+
+    monkeypatch.setattr(server, 'prepare_model', prepare_model)
+    boot = server.start_boot()
+    results = []
+    request = threading.Thread(target=lambda: results.append(server.require_model('energy')))
+    request.start()
+    request.join()
+    boot.join()
+
+    assert results == ['energy model']
+    assert sorted(calls) == sorted(server.MODEL_KINDS)
+    assert server.boot_done.is_set()
@@ -0,0 +1,30 @@
+import time
+
+from training_jobs import MODEL_KINDS, TrainingJobManager
+
+def run_job(manager):
+    job, created = manager.submit(days=3)
+    assert created
+    while manager.get(job['id'])['finished_at'] is None:
+        time.sleep(0.05)
+    return manager.get(job['id'])
+
+def test_retraining_skips_pinned_models(isolated_store):
+    swapped = []
+    manager = TrainingJobManager(on_success=swapped.append)
+    try:
+        first = run_job(manager)
+        assert first['status'] == 'succeeded'
+        assert set(swapped[0]) == set(MODEL_KINDS)
+
+        isolated_store.pin('energy_prediction', first['versions']['energy'])
+        second = run_job(manager)
+    finally:
+        manager.shutdown()
+
+    assert second['status'] == 'succeeded'
+    assert second['models'] == {'energy': 'pinned', 'water': 'trained', 'agriculture': 'trained'}
+    assert set(swapped[1]) == {'water', 'agriculture'}
+    refs = isolated_store.refs('energy_prediction')
+    assert refs['current'] == first['versions']['energy']
+    assert second['versions']['energy'] in refs['history']
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from utils import generate_time_features, generate_time_features_array
+
+def test_time_features_array_matches_scalar():
+    start = datetime(2025, 1, 1)
+    timestamps = [start + timedelta(hours=7 * i) for i in range(400)]
+
+    features = generate_time_features_array(timestamps)
+
+    for i, dt in enumerate(timestamps):
+        for key, value in generate_time_features(dt).items():
+            assert features[key][i] == value
+
+def test_time_features_array_accepts_datetime64():
+    timestamps = np.array(['2025-07-05T13:00', '2025-12-01T03:00'], dtype='datetime64[ns]')
+
+    features = generate_time_features_array(timestamps)
+
+    assert features['season'].tolist() == [2, 0]
+    assert features['is_weekend'].tolist() == [1, 0]
+    assert features['is_day'].tolist() == [1, 0]
+
+def test_models_import_alongside_server():
+    import server
+    from models.agriculture_optimization import IrrigationOptimizationModel
+    from models.energy_prediction import EnergyPredictionModel
+    from models.leak_stream import StreamingLeakDetector
+    from models.water_analysis import WaterLeakDetectionModel
+
+    assert server.app is not None
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.water_analysis import WaterLeakDetectionModel
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    hours = np.arange(2000) % 24
+    return pd.DataFrame({
+        'water_usage': rng.gamma(2.0, 20.0, len(hours)),
+        'hour': hours,
+        'is_weekend': (np.arange(2000) // 24) % 7 >= 5,
+        'is_day': (hours >= 6) & (hours < 18)
+    }).astype({'is_weekend': int, 'is_day': int})
+
+def test_scaler_is_saved_and_restored(data, isolated_store):
+    model = WaterLeakDetectionModel()
+    model.train(data)
+    model.save()
+    expected = model.score_batch(data)
+
+    loaded = WaterLeakDetectionModel()
+    assert loaded.load()
+    assert loaded.scaler_state == model.scaler_state
+    pd.testing.assert_frame_equal(loaded.score_batch(data), expected)
+
+def test_preprocess_is_pure(data):
+    model = WaterLeakDetectionModel()
+    with pytest.raises(ValueError):
+        model.preprocess(data)
+
+    model.train(data)
+    fitted = model.scaler_state
+    other = (0.0, 1.0)
+    X = model.preprocess(data, other)
+    np.testing.assert_allclose(X['water_usage_scaled'], data['water_usage'])
+    assert model.scaler_state == fitted
+    mean, scale = fitted
+    np.testing.assert_allclose(model.preprocess(data)['water_usage_scaled'], (data['water_usage'] - mean) / scale)
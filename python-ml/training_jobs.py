@@ -0,0 +1,209 @@
+import threading
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+# Models trained by a job, keyed by the name used in job progress
+MODEL_KINDS = ('energy', 'water', 'agriculture')
+
+# Training data sources: generated data, or recorded meter history where
+# a model has one (the others fall back to synthetic data)
+TRAINING_SOURCES = ('synthetic', 'meter')
+
+# Meter history dataset and training columns per model kind
+METER_TRAINING = {
+    'energy': ('energy', ['solar_output', 'hour', 'month', 'is_weekend', 'is_day', 'season']),
+    'water': ('water', ['water_usage', 'hour', 'is_weekend', 'is_day'])
+}
+
+# Rows kept from meter history for fitting the tree ensembles
+METER_SAMPLE_SIZE = 200000
+
+# Rows kept per household when training per-household fleet members
+FLEET_SAMPLE_SIZE = 20000
+
+def create_model(kind):
+    """Create an untrained model instance of the given kind"""
+    if kind == 'energy':
+        from models.energy_prediction import EnergyPredictionModel
+        return EnergyPredictionModel()
+    if kind == 'water':
+        from models.water_analysis import WaterLeakDetectionModel
+        return WaterLeakDetectionModel()
+    if kind == 'agriculture':
+        from models.agriculture_optimization import IrrigationOptimizationModel
+        return IrrigationOptimizationModel()
+    raise ValueError(f"Unknown model kind '{kind}'")
+
+def train_model(kind, data):
+    """
+    Train one model in a worker process and return the fitted instance
+
+    Args:
+        kind: Model kind
+        data: Training DataFrame, or None to stream the kind's meter history
+    """
+    model = create_model(kind)
+    if data is None:
+        from datasets import iter_training_frames
+        dataset, columns = METER_TRAINING[kind]
+        model.train_streaming(iter_training_frames(dataset, columns=columns), sample_size=METER_SAMPLE_SIZE)
+    else:
+        model.train(data)
+    return model
+
+def train_fleet(fleet, kind, sample_size=FLEET_SAMPLE_SIZE, clusters=None):
+    """
+    Train per-household members of a fleet from the kind's meter history
+
+    Args:
+        fleet: ModelFleet of the given kind
+        kind: Model kind with meter history
+        sample_size: Rows sampled per household
+        clusters: Optional mapping of household id to cluster id
+
+    Returns:
+        Dictionary of member key to version and training performance
+    """
+    if kind not in METER_TRAINING:
+        raise ValueError(f"No meter history to train per-household {kind} models")
+    from datasets import iter_training_frames
+    dataset, columns = METER_TRAINING[kind]
+    frames = iter_training_frames(dataset, columns=columns + ['household_id'])
+    return fleet.train_streaming(frames, sample_size=sample_size, clusters=clusters)
+
+class TrainingJobManager:
+    """
+    Runs model retraining in the background
+
+    Each job prepares training data once (synthetic, or streamed from meter
+    history by the workers themselves), fits every model in parallel in a
+    process pool and hands the fitted models to on_success only if all of
+    them trained and saved, so serving never sees a partial swap. Kinds
+    whose model has a pinned version in the store are saved but not
+    swapped in, and are reported as 'pinned'.
+    """
+
+    def __init__(self, on_success, max_workers=len(MODEL_KINDS)):
+        """
+        Initialize a job manager
+
+        Args:
+            on_success: Callback receiving {kind: model} once a job succeeds
+            max_workers: Size of the training process pool
+        """
+        self.on_success = on_success
+        self.max_workers = max_workers
+        self.jobs = {}
+        self._executor = None
+        self._active_job = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, days=90, source='synthetic'):
+        """
+        Start a retraining job, or return the one already running
+
+        Args:
+            days: Days of synthetic data to generate
+            source: 'synthetic' or 'meter' (recorded meter history where available)
+
+        Returns:
+            Tuple of (job, created) where created is False if a job was
+            already in progress
+        """
+        if source not in TRAINING_SOURCES:
+            raise ValueError(f"source must be one of {TRAINING_SOURCES}")
+        with self._lock:
+            if self._active_job is not None:
+                return self.jobs[self._active_job], False
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'days': days,
+                'source': source,
+                'models': {kind: 'pending' for kind in MODEL_KINDS},
+                'progress': 0.0,
+                'versions': {},
+                'error': None,
+                'created_at': datetime.now().isoformat(),
+                'finished_at': None
+            }
+            self._active_job = job_id
+
+        threading.Thread(target=self._run, args=(job_id,), daemon=True).start()
+        return self.jobs[job_id], True
+
+    def get(self, job_id):
+        """Return a snapshot of a job's status, or None if unknown"""
+        job = self.jobs.get(job_id)
+        return None if job is None else {**job, 'models': dict(job['models']), 'versions': dict(job['versions'])}
+
+    def _run(self, job_id):
+        """Coordinate one job: generate data, train in parallel, save, then swap"""
+        from utils import generate_synthetic_data
+        
+        job = self.jobs[job_id]
+        try:
+            job['status'] = 'running'
+            streamed = METER_TRAINING if job['source'] == 'meter' else {}
+            data = None
+            if any(kind not in streamed for kind in MODEL_KINDS):
+                data = generate_synthetic_data(days=job['days'])
+
+            futures = {}
+            executor = self._get_executor()
+            for kind in MODEL_KINDS:
+                futures[executor.submit(train_model, kind, None if kind in streamed else data)] = kind
+                job['models'][kind] = 'training'
+
+            trained = {}
+            for future in as_completed(futures):
+                kind = futures[future]
+                try:
+                    trained[kind] = future.result()
+                except Exception:
+                    job['models'][kind] = 'failed'
+                    raise
+                job['models'][kind] = 'trained'
+                job['progress'] = len(trained) / (len(MODEL_KINDS) + 1)
+
+            # Persist every model before any of them goes live
+            for kind, model in trained.items():
+                model.save()
+                job['versions'][kind] = model.version
+
+            # A pinned version keeps serving until it is unpinned
+            live = {}
+            for kind, model in trained.items():
+                if model.store.refs(model.name)['pinned']:
+                    job['models'][kind] = 'pinned'
+                else:
+                    live[kind] = model
+            if live:
+                self.on_success(live)
+            job['progress'] = 1.0
+            job['status'] = 'succeeded'
+
+        except Exception as e:
+            traceback.print_exc()
+            job['status'] = 'failed'
+            job['error'] = str(e)
+
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+            with self._lock:
+                self._active_job = None
+
+    def shutdown(self):
+        """Stop the process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -1,18 +1,8 @@
-import os
-import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
 
-def save_model_data(model_name, data):
-    """Save model metadata to a file"""
-    os.makedirs('python-ml/models/saved', exist_ok=True)
-    
-    # Save metadata to a JSON file
-    with open(f'python-ml/models/saved/{model_name}_metadata.json', 'w') as f:
-        json.dump(data, f, indent=2)
-
 def generate_time_features(dt):
     """Generate time-based features from a datetime object"""
     hour = dt.hour
@@ -42,6 +32,39 @@ def generate_time_features(dt):
         'season': season
     }
 
+# Season indexed by month (1-12, slot 0 unused): 0=Winter, 1=Spring, 2=Summer, 3=Fall
+SEASON_BY_MONTH = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+def generate_time_features_array(timestamps):
+    """
+    Generate time-based features for a whole column of timestamps in one pass
+    
+    Args:
+        timestamps: NumPy datetime64 array, pandas DatetimeIndex/Series or a
+            sequence of datetime objects (timezone-aware values use wall-clock time)
+    
+    Returns:
+        Dictionary with the same keys as generate_time_features, each an int8 array
+    """
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    seconds = index.values.astype('datetime64[s]')
+    days = seconds.astype('datetime64[D]')
+    
+    hour = ((seconds - days) // np.timedelta64(1, 'h')).astype(np.int8)
+    month = (days.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.int8)
+    day_of_week = ((days.astype(np.int64) + 3) % 7).astype(np.int8)  # 1970-01-01 was a Thursday
+    
+    return {
+        'hour': hour,
+        'month': month,
+        'day_of_week': day_of_week,
+        'is_weekend': (day_of_week >= 5).astype(np.int8),
+        'is_day': ((hour >= 6) & (hour < 18)).astype(np.int8),
+        'season': SEASON_BY_MONTH[month]
+    }
+
 def generate_solar_output(dt, noise=0.1):
     """Generate realistic solar output based on time of day, season, and weather"""
     time_features = generate_time_features(dt)
@@ -127,63 +150,153 @@ def generate_soil_moisture(dt, last_irrigation=None, noise=0.1):
     # Return as percentage (0-100%)
     return min(100.0, max(0.0, base_moisture * noise_factor))
 
-def generate_synthetic_data(days=30, interval_hours=1):
-    """Generate synthetic data for training models"""
+def generate_solar_output_array(hour, season, rng, noise=0.1):
+    """Vectorized generate_solar_output over arrays of hours and seasons"""
+    hour = np.asarray(hour)
+    season = np.asarray(season)
+    
+    # Bell curve centered at noon during daylight hours, zero at night
+    daylight = (hour >= 6) & (hour <= 18)
+    hour_factor = np.where(daylight, 1.0 - np.abs(hour - 12) / 6, 0.0)
+    
+    # Season factor: highest in summer, lowest in winter
+    season_factor = np.array([0.4, 0.8, 1.0, 0.6])[season]
+    
+    # Random weather factor (cloudy vs sunny) and noise
+    weather_factor = rng.uniform(0.5, 1.0, size=hour.shape)
+    noise_factor = rng.uniform(1 - noise, 1 + noise, size=hour.shape)
+    
+    # Scale to 0-10 kW range
+    return np.clip(hour_factor * season_factor * weather_factor * 10 * noise_factor, 0.0, 10.0)
+
+def generate_water_usage_array(hour, is_weekend, rng, noise=0.2):
+    """Vectorized generate_water_usage over arrays of hours and weekend flags"""
+    hour = np.asarray(hour)
+    
+    # Usage range per time-of-day bucket: morning, evening, night, midday
+    buckets = [(hour >= 5) & (hour <= 9), (hour >= 17) & (hour <= 22), (hour >= 23) | (hour <= 4)]
+    low = np.select(buckets, [60.0, 70.0, 10.0], default=30.0)
+    high = np.select(buckets, [80.0, 90.0, 20.0], default=50.0)
+    base_usage = rng.uniform(low, high)
+    
+    # Weekend factor: typically higher on weekends
+    weekend_factor = rng.uniform(1.1, 1.3, size=hour.shape)
+    base_usage = np.where(np.asarray(is_weekend) == 1, base_usage * weekend_factor, base_usage)
+    
+    # Return as percentage of capacity (0-100%)
+    noise_factor = rng.uniform(1 - noise, 1 + noise, size=hour.shape)
+    return np.clip(base_usage * noise_factor, 0.0, 100.0)
+
+def generate_soil_moisture_array(is_day, season, hours_since_irrigation, rng, noise=0.1):
+    """
+    Vectorized generate_soil_moisture over arrays of time features
+    
+    Args:
+        is_day: Daylight flags
+        season: Season codes
+        hours_since_irrigation: Hours since the last irrigation event (inf if none)
+        rng: numpy.random.Generator used for all draws
+        noise: Relative noise amplitude
+    """
+    season = np.asarray(season)
+    shape = np.broadcast_shapes(np.shape(is_day), season.shape, np.shape(hours_since_irrigation))
+    
+    # Base moisture: wetter in winter, drier in summer
+    low = np.select([season == 0, season == 2], [50.0, 30.0], default=40.0)
+    base_moisture = np.broadcast_to(low, shape) + 20.0 * rng.random(size=shape)
+    
+    # Temperature effect (moisture decreases faster during day in summer)
+    evaporation = rng.uniform(5, 15, size=shape)
+    base_moisture = np.where((np.asarray(is_day) == 1) & (season == 2), base_moisture - evaporation, base_moisture)
+    
+    # Moisture boost from irrigation within the last 24 hours
+    with np.errstate(invalid='ignore'):
+        boost = np.where(hours_since_irrigation < 24, np.maximum(0, 30 * (1 - hours_since_irrigation / 24)), 0.0)
+    base_moisture = base_moisture + boost
+    
+    # Return as percentage (0-100%)
+    noise_factor = rng.uniform(1 - noise, 1 + noise, size=shape)
+    return np.clip(base_moisture * noise_factor, 0.0, 100.0)
+
+def generate_synthetic_arrays(days=30, households=1, interval_hours=1, seed=None, start_date=None):
+    """
+    Generate synthetic data for many households as NumPy arrays
+    
+    Args:
+        days: Number of days to generate
+        households: Number of independent households
+        interval_hours: Hours between consecutive readings
+        seed: Seed or numpy.random.Generator for reproducible output
+        start_date: First timestamp (default: `days` before now)
+    
+    Returns:
+        Dictionary with 'datetime', 'timestamp' and time feature arrays of
+        shape (T,) and measurement arrays of shape (households, T)
+    """
+    rng = np.random.default_rng(seed)
+    
     # Calculate number of data points
-    points = days * 24 // interval_hours
+    points = int(days * 24 // interval_hours)
+    shape = (households, points)
     
     # Start date (going back from now)
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=days)
+        
     # Generate timestamps
-    timestamps = [start_date + timedelta(hours=i*interval_hours) for i in range(points)]
+    offsets = np.arange(points) * interval_hours * 3600.0
+    datetimes = np.datetime64(start_date, 'us') + (offsets * 1e6).astype('timedelta64[us]')
+    time_features = generate_time_features_array(datetimes)
+    hour = np.broadcast_to(time_features['hour'], shape)
+    season = np.broadcast_to(time_features['season'], shape)
     
-    # Initialize data storage
-    data = []
-    last_irrigation = None
+    # Irrigation events (~2% chance each step), independent of moisture
+    irrigated = rng.random(size=shape) < 0.02
+    irrigation_amount = np.where(irrigated, rng.uniform(10, 30, size=shape), 0.0)
     
-    # Generate data for each timestamp
-    for dt in timestamps:
-        # Time features
-        time_features = generate_time_features(dt)
-        
-        # Energy features
-        solar_output = generate_solar_output(dt)
-        battery_level = random.uniform(20, 90)  # Battery charge level (%)
-        
-        # Water features
-        water_usage = generate_water_usage(dt)
-        water_quality = random.uniform(85, 100)  # Water quality index
-        
-        # Agriculture features
-        soil_moisture = generate_soil_moisture(dt, last_irrigation)
-        temperature = random.uniform(10, 35)  # Temperature in Celsius
+    # Carry irrigation state forward: index of the last event strictly before each step
+    event_index = np.where(irrigated, np.arange(points), -1)
+    last_event = np.maximum.accumulate(event_index, axis=1)
+    last_event = np.concatenate([np.full((households, 1), -1), last_event[:, :-1]], axis=1)
+    hours_since_irrigation = np.where(
+        last_event >= 0, (np.arange(points) - last_event) * float(interval_hours), np.inf
+    )
+    
+    return {
+        'datetime': datetimes,
+        'timestamp': start_date.timestamp() + offsets,
+        **time_features,
+        'solar_output': generate_solar_output_array(hour, season, rng),
+        'battery_level': rng.uniform(20, 90, size=shape),  # Battery charge level (%)
+        'water_usage': generate_water_usage_array(hour, np.broadcast_to(time_features['is_weekend'], shape), rng),
+        'water_quality': rng.uniform(85, 100, size=shape),  # Water quality index
+        'soil_moisture': generate_soil_moisture_array(
+            np.broadcast_to(time_features['is_day'], shape), season, hours_since_irrigation, rng
+        ),
+        'temperature': rng.uniform(10, 35, size=shape),  # Temperature in Celsius
+        'irrigation_amount': irrigation_amount
+    }
+
+def generate_synthetic_data(days=30, interval_hours=1, households=1, seed=None, start_date=None):
+    """
+    Generate synthetic data for training models
+    
+    Rows are ordered by household, then time. A household_id column is
+    added when more than one household is generated. Pass both seed and
+    start_date for fully reproducible output.
+    """
+    arrays = generate_synthetic_arrays(days, households, interval_hours, seed, start_date)
+    points = len(arrays['datetime'])
+    
+    columns = {}
+    if households > 1:
+        columns['household_id'] = np.repeat(np.arange(1, households + 1, dtype=np.int32), points)
         
-        # Simulate irrigation events (randomly, about once every 2-3 days)
-        if random.random() < 0.02:  # ~2% chance each hour
-            irrigation_amount = random.uniform(10, 30)  # mm of water
-            last_irrigation = dt
+    for name, values in arrays.items():
+        if values.ndim == 1:
+            # Per-timestamp columns repeat for every household
+            columns[name] = np.tile(values, households)
         else:
-            irrigation_amount = 0
+            columns[name] = values.reshape(-1)
             
-        # Add data point
-        data_point = {
-            'datetime': dt,
-            'timestamp': dt.timestamp(),
-            **time_features,
-            'solar_output': solar_output,
-            'battery_level': battery_level,
-            'water_usage': water_usage,
-            'water_quality': water_quality,
-            'soil_moisture': soil_moisture,
-            'temperature': temperature,
-            'irrigation_amount': irrigation_amount
-        }
-        
-        data.append(data_point)
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    return df
\ No newline at end of file
+    return pd.DataFrame(columns)